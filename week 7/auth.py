@@ -2,9 +2,14 @@ import bcrypt
 import os
 
 from pathlib import Path
+from user_store import open_store
 BASE_DIR = Path(__file__).resolve().parent
 USER_DATA_FILE = BASE_DIR / "users.txt"
 
+# "file" keeps users.txt with an in-memory index; "sqlite" uses users.db.
+USER_STORE = os.environ.get("USER_STORE", "file")
+store = open_store(USER_STORE)
+
 def hash_password(plain_text_password):
     password_bytes = plain_text_password.encode('utf-8')
     salt = bcrypt.gensalt()
@@ -20,18 +25,7 @@ def verify_password(plain_text_password, hashed_password):
         return False
 
 def user_exists(username):
-    if not os.path.exists(USER_DATA_FILE):
-        return False
-        
-    with open(USER_DATA_FILE, 'r') as f:
-        for line in f:
-            try:
-                stored_username = line.strip().split(',', 1)[0]
-                if stored_username == username:
-                    return True
-            except IndexError:
-                continue 
-    return False
+    return store.exists(username)
 
 def register_user(username, password):
     if user_exists(username):
@@ -40,36 +34,23 @@ def register_user(username, password):
         
     hashed_pass = hash_password(password)
     
-    with open(USER_DATA_FILE, 'a') as f:
-        f.write(f"{username},{hashed_pass}\n")
+    if not store.add(username, hashed_pass):
+        print(f"Error: Username '{username}' already exists.")
+        return False
         
     print(f"Success: User '{username}' registered successfully!")
     return True
 
 def login_user(username, password):
-    if not os.path.exists(USER_DATA_FILE):
+    stored_hash = store.get_hash(username)
+    if stored_hash is None:
         print("Error: Username not found.")
         return False
-        
-    with open(USER_DATA_FILE, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line: continue
-            
-            try:
-                stored_username, stored_hash = line.split(',', 1)
-            except ValueError:
-                continue
-            
-            if stored_username == username:
-                if verify_password(password, stored_hash):
-                    print(f"Success: Welcome, {username}!")
-                    return True
-                else:
-                    print("Error: Invalid password.")
-                    return False
-                    
-    print("Error: Username not found.")
+    
+    if verify_password(password, stored_hash):
+        print(f"Success: Welcome, {username}!")
+        return True
+    print("Error: Invalid password.")
     return False
 
 def validate_username(username): 
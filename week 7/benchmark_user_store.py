@@ -0,0 +1,91 @@
+"""
+Compare user lookups and registrations: linear users.txt scan vs the
+indexed file store vs the SQLite store.
+
+    python benchmark_user_store.py [sizes...]     (default: 1000 100000 1000000)
+
+Users get a fixed dummy hash so the numbers measure the store, not bcrypt.
+"""
+import random
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+from user_store import FileUserStore, SqliteUserStore
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+LOOKUPS = 1_000
+SCAN_LOOKUPS = 20   # the linear scan gets slow quickly
+REGISTRATIONS = 1_000
+DUMMY_HASH = "$2b$12$" + "x" * 53
+
+
+def scan_lookup(path, username):
+    """The original auth.py lookup: read the file until the username turns up."""
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip().split(',', 1)[0] == username:
+                return True
+    return False
+
+
+def per_op_us(seconds, count):
+    return seconds / count * 1_000_000
+
+
+def bench(size, workdir):
+    users_file = workdir / f"users_{size}.txt"
+    with open(users_file, 'w') as f:
+        for i in range(size):
+            f.write(f"user{i},{DUMMY_HASH}\n")
+    names = [f"user{random.randrange(size)}" for _ in range(LOOKUPS)]
+    results = {}
+
+    start = time.perf_counter()
+    for name in names[:SCAN_LOOKUPS]:
+        scan_lookup(users_file, name)
+    results["scan lookup"] = per_op_us(time.perf_counter() - start, SCAN_LOOKUPS)
+
+    store = FileUserStore(users_file)
+    start = time.perf_counter()
+    len(store)
+    results["index build (ms)"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for name in names:
+        store.exists(name)
+    results["index lookup"] = per_op_us(time.perf_counter() - start, LOOKUPS)
+    start = time.perf_counter()
+    for i in range(REGISTRATIONS):
+        store.add(f"new{i}", DUMMY_HASH)
+    results["index register"] = per_op_us(time.perf_counter() - start, REGISTRATIONS)
+
+    db_store = SqliteUserStore(workdir / f"users_{size}.db")
+    start = time.perf_counter()
+    db_store.add_many((f"user{i}", DUMMY_HASH) for i in range(size))
+    results["sqlite load (ms)"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for name in names:
+        db_store.exists(name)
+    results["sqlite lookup"] = per_op_us(time.perf_counter() - start, LOOKUPS)
+    start = time.perf_counter()
+    for i in range(REGISTRATIONS):
+        db_store.add(f"new{i}", DUMMY_HASH)
+    results["sqlite register"] = per_op_us(time.perf_counter() - start, REGISTRATIONS)
+    db_store.close()
+    return results
+
+
+def main(sizes):
+    print(f"{'users':>10}  {'metric':<18}{'value':>14}")
+    print("-" * 44)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            for metric, value in bench(size, Path(tmp)).items():
+                unit = "" if "(ms)" in metric else " us/op"
+                print(f"{size:>10,}  {metric:<18}{value:>8.1f}{unit}")
+            print()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,188 @@
+import os
+import sqlite3
+
+from contextlib import contextmanager
+from pathlib import Path
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+BASE_DIR = Path(__file__).resolve().parent
+USER_DATA_FILE = BASE_DIR / "users.txt"
+USER_DB_FILE = BASE_DIR / "users.db"
+# Indexed bytes compared with the file when it changes, to spot rewrites.
+TAIL_BYTES = 4096
+
+
+@contextmanager
+def _file_lock(path):
+    """Hold an exclusive lock on path (created if missing) for the with block."""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileUserStore:
+    """
+    users.txt as an append log with an in-memory username -> hash index.
+
+    The index is built on first use. Before every lookup the file's inode,
+    mtime and size are checked. When they changed, the last TAIL_BYTES
+    indexed are compared with the file: if they are intact, only lines
+    appended by another process are read; if the file was replaced,
+    shrank or its tail was rewritten, it is re-indexed. An in-place edit
+    further up is not noticed; replace the file to have it re-read.
+    Lookups and registrations are O(1) instead of a full file scan, and
+    registrations lock users.txt.lock so two processes cannot both add
+    the same username.
+    """
+
+    def __init__(self, path=USER_DATA_FILE):
+        self.path = Path(path)
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self._reset()
+
+    def _reset(self):
+        self._index = {}
+        self._offset = 0
+        self._stamp = None
+        # The last indexed bytes, ending at _offset.
+        self._tail = bytearray()
+
+    def _read_from(self, offset):
+        tail = self._tail
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Half-written last line: pick it up on the next refresh.
+                    break
+                offset += len(raw)
+                tail += raw
+                if len(tail) > 2 * TAIL_BYTES:
+                    del tail[:-TAIL_BYTES]
+                try:
+                    username, password_hash = raw.decode('utf-8').strip().split(',', 1)
+                except ValueError:
+                    continue
+                # The first entry for a username wins, as with the old linear scan.
+                self._index.setdefault(username, password_hash)
+        del tail[:-TAIL_BYTES]
+        self._offset = offset
+
+    def _tail_intact(self):
+        """Whether the last indexed bytes are still on disk where they were read."""
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset - len(self._tail))
+            return f.read(len(self._tail)) == self._tail
+
+    def _refresh(self):
+        if not os.path.exists(self.path):
+            self._reset()
+            return
+        stat = os.stat(self.path)
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+        replaced = self._stamp is not None and stat.st_ino != self._stamp[0]
+        if replaced or stat.st_size < self._offset or not self._tail_intact():
+            self._reset()
+        self._read_from(self._offset)
+        self._stamp = stamp
+
+    def get_hash(self, username):
+        self._refresh()
+        return self._index.get(username)
+
+    def exists(self, username):
+        return self.get_hash(username) is not None
+
+    def add(self, username, password_hash):
+        """Append a user; returns False if the username is already taken."""
+        with _file_lock(self._lock_path):
+            # Checked under the lock, so a concurrent add of the same name waits and fails.
+            if self.exists(username):
+                return False
+            with open(self.path, 'a') as f:
+                f.write(f"{username},{password_hash}\n")
+            # Index our own line directly so the next lookup stays O(1).
+            self._read_from(self._offset)
+            stat = os.stat(self.path)
+            self._stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        return True
+
+    def __len__(self):
+        self._refresh()
+        return len(self._index)
+
+
+class SqliteUserStore:
+    """Users in a small SQLite table keyed on username."""
+
+    def __init__(self, path=USER_DB_FILE):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                password_hash TEXT NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def get_hash(self, username):
+        row = self.conn.execute(
+            "SELECT password_hash FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def exists(self, username):
+        return self.get_hash(username) is not None
+
+    def add(self, username, password_hash):
+        """Insert a user; returns False if the username is already taken."""
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                    (username, password_hash)
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def add_many(self, users):
+        """Bulk insert (username, password_hash) pairs, skipping taken usernames."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+                users
+            )
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def open_store(kind="file", path=None):
+    """Return a user store: 'file' (users.txt + index) or 'sqlite'."""
+    if kind == "file":
+        return FileUserStore(path or USER_DATA_FILE)
+    if kind == "sqlite":
+        return SqliteUserStore(path or USER_DB_FILE)
+    raise ValueError(f"Unknown user store: {kind}")
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from app.data.db import DB_PATH
+
+# Process-wide cache shared by every Streamlit session:
+#   source -> (change token, loaded value)
+_lock = threading.Lock()
+_entries = {}
+_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+# Per-table generation, bumped by the data layer after each write.
+_generations = defaultdict(int)
+
+# Writes from any connection or process are seen through table_versions,
+# the per-table counters that triggers bump in the writing transaction
+# (see snapshots.py). A dedicated watcher connection reads them, so a
+# write to one table never invalidates another table's token. Tables
+# without a table_versions row only see in-process writes (invalidate()).
+_watcher = None
+
+
+def _table_version(table):
+    """The table's table_versions counter, or None (caller holds _lock)."""
+    global _watcher
+    if _watcher is None:
+        _watcher = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+    try:
+        row = _watcher.execute(
+            "SELECT version FROM table_versions WHERE table_name = ? COLLATE NOCASE", (table,)
+        ).fetchone()
+    except sqlite3.OperationalError:  # database older than migration 6
+        return None
+    return row[0] if row else None
+
+
+def file_token(path):
+    """Change token for a file: (mtime_ns, size), or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def table_token(table):
+    """Change token for a SQLite table: (in-process generation, table_versions counter)."""
+    with _lock:
+        return (_generations[table.lower()], _table_version(table))
+
+
+def invalidate(table):
+    """Mark one table as changed by an in-process write."""
+    with _lock:
+        _generations[table.lower()] += 1
+
+
+def invalidate_file(path):
+    """Drop the cached copy of a file after writing to it."""
+    with _lock:
+        _entries.pop(f"file:{os.path.abspath(path)}", None)
+
+
+def record_access(page, hit):
+    with _lock:
+        _stats[page]["hits" if hit else "misses"] += 1
+
+
+def load_cached(source, token, loader, page=None):
+    """
+    Return the cached value for source while its token is unchanged.
+
+    On a miss loader() is called and its result stored under the new
+    token. Cached values are shared between sessions; do not mutate them.
+    """
+    with _lock:
+        entry = _entries.get(source)
+    hit = entry is not None and entry[0] == token
+    record_access(page or source, hit)
+    if hit:
+        return entry[1]
+
+    value = loader()
+    with _lock:
+        _entries[source] = (token, value)
+    return value
+
+
+def load_table(table, loader, page=None):
+    """Cached load of a SQLite table, keyed on table_token()."""
+    return load_cached(f"sqlite:{table.lower()}", table_token(table), loader, page)
+
+
+def load_file(path, loader, page=None):
+    """Cached load of a file, keyed on its mtime and size."""
+    return load_cached(f"file:{os.path.abspath(path)}", file_token(path), loader, page)
+
+
+def cache_stats(page=None):
+    """Return hits, misses and hit_rate for one page, or for all pages."""
+    with _lock:
+        if page is not None:
+            pages = {page: dict(_stats[page])}
+        else:
+            pages = {name: dict(counts) for name, counts in _stats.items()}
+    for counts in pages.values():
+        total = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / total if total else 0.0
+    return pages[page] if page is not None else pages
@@ -0,0 +1,243 @@
+"""
+Append-only change log (change data capture) for the domain tables.
+
+Triggers on each table in CHANGE_LOG_TABLES append one change_log row per
+inserted, updated or deleted record: a monotonically increasing seq, the
+table, the operation, the row's id and, for updates, the columns whose
+values changed. Updates that change nothing are not logged. Bulk loads
+that suspend the triggers log a single 'reload' entry for the table.
+
+Readers remember the last seq they applied and ask changes_since(seq) for
+the rest, applying each change by primary key (so applying one twice is
+harmless). Reading never writes. Compaction is the writers' job: every
+COMPACT_EVERY entries, a trigger on change_log drops the oldest entries
+older than RETAIN_SECONDS, in the writer's own transaction.
+compact_change_log() does the same in one go (migration 8 runs the
+equivalent SQL once to clear the backlog the trigger would otherwise work
+through slowly).
+A reader that falls behind the compacted range is told to reload.
+
+    python -m app.data.changes     # self-check on a scratch database
+"""
+import time
+from app.data.db import DB_PATH, get_connection
+
+CHANGE_LOG_TABLES = ("cyber_incidents", "IT_tickets", "datasets_metadata")
+# Readers with more pending changes than this reload instead.
+MAX_CHANGES = 5000
+RETAIN_SECONDS = 24 * 3600
+# Entries between compactions by trg_change_log_compact. Each one looks
+# at the oldest 2 * COMPACT_EVERY entries only, so it stays cheap and
+# still keeps pace with the inserts. Both values are built into the
+# trigger; changing them takes a migration.
+COMPACT_EVERY = 1000
+
+# AUTOINCREMENT: seq values are never reused, even after compaction.
+CHANGE_LOG_SQL = """
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        op TEXT NOT NULL,
+        pk INTEGER,
+        changed_columns TEXT,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def change_source(table_name):
+    """Return the CHANGE_LOG_TABLES name for a table name, or None."""
+    for source in CHANGE_LOG_TABLES:
+        if source.lower() == table_name.lower():
+            return source
+    return None
+
+
+def _log_sql(source, op, pk, changed="NULL"):
+    return (f"INSERT INTO change_log (table_name, op, pk, changed_columns) "
+            f"VALUES ('{source}', '{op}', {pk}, {changed});")
+
+
+def create_change_triggers(conn, source):
+    """Log every insert, update and delete on one table."""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({source})")]
+    differs = [f"OLD.{col} IS NOT NEW.{col}" for col in columns]
+    # "status,description": the columns this update changed.
+    changed = "rtrim(" + " || ".join(
+        f"CASE WHEN {test} THEN '{col},' ELSE '' END" for col, test in zip(columns, differs)
+    ) + ", ',')"
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_changes_{source}_insert AFTER INSERT ON {source} "
+        f"BEGIN {_log_sql(source, 'insert', 'NEW.id')} END"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_changes_{source}_update AFTER UPDATE ON {source} "
+        f"WHEN {' OR '.join(differs)} "
+        f"BEGIN {_log_sql(source, 'update', 'NEW.id', changed)} END"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_changes_{source}_delete AFTER DELETE ON {source} "
+        f"BEGIN {_log_sql(source, 'delete', 'OLD.id')} END"
+    )
+
+
+def drop_change_triggers(conn, source):
+    """Drop one table's change triggers, e.g. around a bulk load."""
+    for action in ("insert", "update", "delete"):
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_changes_{source}_{action}")
+
+
+def log_reload(conn, source):
+    """Record that a table changed wholesale (readers reload it). Does not commit."""
+    conn.execute(_log_sql(source, "reload", "NULL"))
+
+
+def compaction_trigger_sql(retain=RETAIN_SECONDS, every=COMPACT_EVERY):
+    """Trigger that compacts the log from the insert path (see module docstring)."""
+    # Floor first, then delete up to it; the floor only moves forward,
+    # since everything at or below it is already gone.
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_compact AFTER INSERT ON change_log
+        WHEN NEW.seq % {int(every)} = 0
+        BEGIN
+            INSERT OR REPLACE INTO schema_meta (key, value)
+                SELECT 'change_log_floor', max(seq) FROM (
+                    SELECT seq, changed_at FROM change_log ORDER BY seq LIMIT {2 * int(every)}
+                ) WHERE changed_at < datetime('now', '{-int(retain)} seconds')
+                HAVING max(seq) IS NOT NULL;
+            DELETE FROM change_log WHERE seq <= (
+                SELECT CAST(value AS INTEGER) FROM schema_meta WHERE key = 'change_log_floor'
+            );
+        END
+    """
+
+
+def change_log_schema_sql(sources=CHANGE_LOG_TABLES):
+    """The change_log table and the triggers that fill it, for migrations."""
+    return [CHANGE_LOG_SQL] + [
+        lambda conn, source=source: create_change_triggers(conn, source) for source in sources
+    ]
+
+
+def _latest(conn):
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
+
+
+def _floor(conn):
+    row = conn.execute(
+        "SELECT value FROM schema_meta WHERE key = 'change_log_floor'"
+    ).fetchone()
+    return int(row[0]) if row else 0
+
+
+def latest_seq(db_path=DB_PATH):
+    """The seq of the newest change (0 if none). Readers start here after a full load."""
+    with get_connection(db_path) as conn:
+        return _latest(conn)
+
+
+def changes_since(seq, tables=None, limit=MAX_CHANGES, db_path=DB_PATH):
+    """
+    Return (changes, latest): the changes after seq, oldest first, as dicts
+    with seq, table, op ('insert', 'update', 'delete' or 'reload'), pk and
+    columns (changed columns, for updates), and the seq to ask from next.
+
+    changes is None when the log no longer covers seq (compacted) or more
+    than limit changes are pending: reload everything, then continue from
+    latest. tables limits the changes returned, not latest.
+    """
+    sql = "SELECT seq, table_name, op, pk, changed_columns FROM change_log WHERE seq > ? AND seq <= ?"
+    params = [seq]
+    if tables:
+        sql += f" AND table_name IN ({', '.join('?' for _ in tables)})"
+        params += [change_source(t) or t for t in tables]
+    with get_connection(db_path) as conn:
+        # One read transaction, so latest matches the rows read.
+        conn.execute("BEGIN")
+        latest = _latest(conn)
+        if seq < _floor(conn):
+            return None, latest
+        rows = conn.execute(f"{sql} ORDER BY seq LIMIT ?",
+                            [seq, latest] + params[1:] + [limit + 1]).fetchall()
+    if len(rows) > limit:
+        return None, latest
+    return [
+        {"seq": row[0], "table": row[1], "op": row[2], "pk": row[3],
+         "columns": row[4].split(",") if row[4] else []}
+        for row in rows
+    ], latest
+
+
+def compact_change_log(conn, retain=RETAIN_SECONDS):
+    """Delete entries older than retain seconds. Returns the number deleted. Does not commit."""
+    cutoff = conn.execute(
+        "SELECT max(seq) FROM change_log WHERE changed_at < datetime('now', ?)",
+        (f"{-int(retain)} seconds",)
+    ).fetchone()[0]
+    if cutoff is None:
+        return 0
+    deleted = conn.execute("DELETE FROM change_log WHERE seq <= ?", (cutoff,)).rowcount
+    # Readers at or past cutoff still see everything after it.
+    conn.execute(
+        "INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('change_log_floor', ?)",
+        (str(max(cutoff, _floor(conn))),)
+    )
+    return deleted
+
+
+def change_log_stats(db_path=DB_PATH):
+    """Entries kept, the oldest seq still readable and the latest seq."""
+    with get_connection(db_path) as conn:
+        entries = conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0]
+        return {"entries": entries, "floor": _floor(conn), "latest": _latest(conn)}
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    from app.data import schema
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "changes.db"
+        with get_connection(path) as conn:
+            for sql in (schema.SCHEMA_META_TABLE_SQL, schema.CYBER_INCIDENTS_TABLE_SQL):
+                conn.execute(sql)
+            conn.execute(CHANGE_LOG_SQL)
+            create_change_triggers(conn, "cyber_incidents")
+            conn.executemany(
+                "INSERT INTO cyber_incidents (date, incident_type, severity, status) VALUES (?, ?, ?, ?)",
+                [("2025-11-01", "Phishing", "High", "Open")] * 3
+            )
+            conn.execute("UPDATE cyber_incidents SET status = 'Closed', severity = 'Low' WHERE id = 2")
+            conn.execute("UPDATE cyber_incidents SET status = 'Open' WHERE id = 1")  # no change
+            conn.execute("DELETE FROM cyber_incidents WHERE id = 3")
+        changes, latest = changes_since(0, db_path=path)
+        for change in changes:
+            print(change)
+        assert [c["op"] for c in changes] == ["insert"] * 3 + ["update", "delete"]
+        assert changes[3]["columns"] == ["severity", "status"] and latest == 5
+        assert changes_since(latest, db_path=path) == ([], 5)
+        assert changes_since(0, limit=2, db_path=path)[0] is None
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            changes_since(latest, ["cyber_incidents"], db_path=path)
+        print(f"idle changes_since: {(time.perf_counter() - start) * 1000:.3f} us per call")
+
+        with get_connection(path) as conn:
+            assert compact_change_log(conn, retain=-1) == 5
+        assert changes_since(2, db_path=path)[0] is None      # compacted away
+        assert changes_since(5, db_path=path) == ([], 5)
+        print(change_log_stats(path))
+
+        # Write-side compaction: the trigger fires on seq 8 and trims up to it.
+        with get_connection(path) as conn:
+            conn.execute(compaction_trigger_sql(retain=-1, every=4))
+            conn.executemany(
+                "INSERT INTO cyber_incidents (date, incident_type, severity, status) VALUES (?, ?, ?, ?)",
+                [("2025-11-02", "Malware", "Low", "Open")] * 4
+            )
+        stats = change_log_stats(path)
+        print(stats)
+        assert stats == {"entries": 1, "floor": 8, "latest": 9}
+        assert changes_since(7, db_path=path)[0] is None
+        assert [c["seq"] for c in changes_since(8, db_path=path)[0]] == [9]
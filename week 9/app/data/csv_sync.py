@@ -0,0 +1,235 @@
+import csv
+import hashlib
+import os
+import sqlite3
+import time
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+from app.data.ingest import DEFAULT_CHUNK_SIZE, get_table_columns, iter_csv_chunks, stream_csv_to_table
+
+
+def create_sync_state_table(conn):
+    """Per-file bookkeeping for incremental CSV syncs."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS csv_sync_state (
+            path TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            byte_offset INTEGER NOT NULL,
+            checksum TEXT NOT NULL,
+            synced_at TEXT NOT NULL
+        )
+    """)
+
+
+def _checksum(path, length):
+    """sha256 of the first `length` bytes of a file."""
+    digest = hashlib.sha256()
+    remaining = length
+    with open(path, "rb") as f:
+        while remaining > 0:
+            block = f.read(min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _complete_length(path, size):
+    """Length of the file up to its last newline; a partial last line waits for the next sync."""
+    if size == 0:
+        return 0
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return size
+        # Walk back to the previous newline in small blocks.
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                return position + newline + 1
+    return 0
+
+
+def _read_lines(path, start, end):
+    """Decoded lines from byte start up to byte end (a line boundary)."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line.decode("utf-8")
+
+
+def _upsert_sql(table_name, columns, key):
+    update_cols = [col for col in columns if col not in (key, "id")]
+    assignments = ", ".join(f"{col} = excluded.{col}" for col in update_cols)
+    current = ", ".join(f"{table_name}.{col}" for col in update_cols)
+    incoming = ", ".join(f"excluded.{col}" for col in update_cols)
+    col_list = ", ".join(columns)
+    # Rows whose values are unchanged are left alone, so their triggers do not fire.
+    return (
+        f"INSERT INTO {table_name} ({col_list}) "
+        f"SELECT {col_list} FROM temp.sync_staging WHERE true "
+        f"ON CONFLICT ({key}) DO UPDATE SET {assignments} "
+        f"WHERE ({current}) IS NOT ({incoming})"
+    )
+
+
+def _unique_columns(conn, table_name, columns, key):
+    """Column sets of the table's UNIQUE constraints other than key, when the CSV sets them."""
+    unique = []
+    for _, name, is_unique, *_ in conn.execute(f"PRAGMA index_list({table_name})"):
+        if not is_unique:
+            continue
+        cols = [row[2] for row in conn.execute(f"PRAGMA index_info({name})")]
+        if cols != [key] and all(col in columns for col in cols):
+            unique.append(cols)
+    return unique
+
+
+def _drop_conflicts(conn, table_name, key, unique):
+    """
+    Remove staged rows that would take another row's UNIQUE value (say a
+    ticket_id already used under a different id), or that repeat one
+    used by an earlier staged row. Returns their keys.
+    """
+    skipped = []
+    for cols in unique:
+        same = " AND ".join(f"other.{col} = s.{col}" for col in cols)
+        conflict = (
+            f"EXISTS (SELECT 1 FROM {table_name} other WHERE {same} AND other.{key} IS NOT s.{key}) "
+            f"OR EXISTS (SELECT 1 FROM temp.sync_staging other WHERE {same} "
+            f"AND other.{key} IS NOT s.{key} AND other.rowid < s.rowid)"
+        )
+        rows = conn.execute(
+            f"SELECT s.rowid, s.{key} FROM temp.sync_staging s WHERE {conflict}"
+        ).fetchall()
+        if rows:
+            conn.executemany("DELETE FROM temp.sync_staging WHERE rowid = ?",
+                             [(rowid,) for rowid, _ in rows])
+            skipped += [value for _, value in rows]
+    return skipped
+
+
+def _merge_rows(conn, table_name, columns, key, lines, chunk_size):
+    """
+    Upsert CSV lines via a staging table, one transaction per chunk.
+    Returns (rows merged, keys of rows skipped for UNIQUE conflicts).
+    """
+    col_list = ", ".join(columns)
+    conn.execute("DROP TABLE IF EXISTS temp.sync_staging")
+    conn.execute(f"CREATE TEMP TABLE sync_staging AS SELECT {col_list} FROM {table_name} WHERE 0")
+    stage_sql = f"INSERT INTO temp.sync_staging ({col_list}) VALUES ({', '.join('?' for _ in columns)})"
+    merge_sql = _upsert_sql(table_name, columns, key)
+    unique = _unique_columns(conn, table_name, columns, key)
+    for i, cols in enumerate(unique):
+        # Keeps the staged-duplicates check in _drop_conflicts linear.
+        conn.execute(f"CREATE INDEX temp.sync_staging_unique_{i} ON sync_staging ({', '.join(cols)})")
+
+    rows, skipped = 0, []
+    try:
+        for chunk in iter_csv_chunks(lines, columns, chunk_size):
+            try:
+                conn.executemany(stage_sql, chunk)
+                dropped = _drop_conflicts(conn, table_name, key, unique)
+                conn.execute(merge_sql)
+                conn.execute("DELETE FROM temp.sync_staging")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            rows += len(chunk) - len(dropped)
+            skipped += dropped
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.sync_staging")
+    return rows, skipped
+
+
+def sync_csv_to_table(conn, csv_path, table_name, key="id", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Idempotently bring table_name up to date with a CSV file.
+
+    Rows are upserted by `key`, so re-running never duplicates data.
+    csv_sync_state remembers each file's size, mtime, synced byte offset
+    and a checksum of the synced bytes:
+      * unchanged size and mtime: skipped without reading the file;
+      * old bytes intact and the file has grown: only the new tail is read;
+      * the table is empty: bulk-loaded by ingest.stream_csv_to_table()
+        (indexes and summary triggers deferred), falling back to the
+        full upsert if the file breaks a UNIQUE constraint;
+      * anything else: the whole file is re-upserted.
+    Rows deleted from the CSV are not deleted from the table. Rows that
+    would break another UNIQUE column (a ticket_id already used by a
+    different id) are skipped and reported instead of aborting the sync.
+
+    Returns a dict with mode ('unchanged', 'append', 'initial' or 'full'), rows,
+    skipped (keys of the rows left out) and seconds.
+    """
+    start = time.perf_counter()
+    csv_file = Path(csv_path).resolve()
+    create_sync_state_table(conn)
+
+    stat = csv_file.stat()
+    state = conn.execute(
+        "SELECT size, mtime_ns, byte_offset, checksum FROM csv_sync_state WHERE path = ?",
+        (str(csv_file),)
+    ).fetchone()
+
+    if state and state[0] == stat.st_size and state[1] == stat.st_mtime_ns:
+        return {"mode": "unchanged", "rows": 0, "skipped": [], "seconds": time.perf_counter() - start}
+
+    offset = _complete_length(csv_file, stat.st_size)
+    checksum = _checksum(csv_file, offset)
+
+    if state and offset == state[2] and checksum == state[3]:
+        # Touched but not modified.
+        mode, rows, skipped = "unchanged", 0, []
+    else:
+        with open(csv_file, "rb") as f:
+            header_line = f.readline().decode("utf-8")
+            header_end = f.tell()
+        table_columns = set(get_table_columns(conn, table_name))
+        columns = [col for col in next(csv.reader([header_line]), []) if col in table_columns]
+
+        # Append-only: the previously synced bytes are byte-for-byte unchanged.
+        appended = (
+            state is not None
+            and header_end <= state[2] < offset
+            and _checksum(csv_file, state[2]) == state[3]
+        )
+        mode = "append" if appended else "full"
+        if not appended and conn.execute(f"SELECT 1 FROM {table_name} LIMIT 1").fetchone() is None:
+            try:
+                rows = stream_csv_to_table(conn, csv_file, table_name, chunk_size,
+                                           rebuild_indexes=True, defer_summaries=True,
+                                           end=offset)["rows"]
+                mode, skipped = "initial", []
+            except sqlite3.IntegrityError:
+                # Rows already loaded are matched by key in the full upsert.
+                pass
+        if mode != "initial":
+            lines = _read_lines(csv_file, state[2] if appended else header_end, offset)
+            rows, skipped = _merge_rows(conn, table_name, columns, key,
+                                        chain([header_line], lines), chunk_size)
+
+    conn.execute("""
+        INSERT INTO csv_sync_state (path, table_name, size, mtime_ns, byte_offset, checksum, synced_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET
+            table_name = excluded.table_name, size = excluded.size,
+            mtime_ns = excluded.mtime_ns, byte_offset = excluded.byte_offset,
+            checksum = excluded.checksum, synced_at = excluded.synced_at
+    """, (str(csv_file), table_name, stat.st_size, stat.st_mtime_ns, offset, checksum,
+          datetime.now().isoformat(timespec="seconds")))
+    conn.commit()
+    return {"mode": mode, "rows": rows, "skipped": skipped, "seconds": time.perf_counter() - start}
@@ -1,53 +1,59 @@
-from app.data.db import connect_database
+import pandas as pd
+from app.data.db import get_connection
+from app.data.cache import invalidate
+from app.data.dtypes import apply_dtypes
 
 def insert_incident(date, incident_type, severity, status, description, reported_by=None):
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO cyber_incidents 
-        (date, incident_type, severity, status, description, reported_by)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (date, incident_type, severity, status, description, reported_by))
-    conn.commit()
-    incident_id = cursor.lastrowid
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO cyber_incidents 
+            (date, incident_type, severity, status, description, reported_by)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (date, incident_type, severity, status, description, reported_by))
+        incident_id = cursor.lastrowid
+    invalidate("cyber_incidents")
     return incident_id
 
 def get_all_incidents():
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM cyber_incidents ORDER BY id DESC",
-        conn
-    )
-    conn.close()
+    with get_connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM cyber_incidents ORDER BY id DESC",
+            conn
+        )
+    return apply_dtypes(df, "cyber_incidents")
+
+def get_incident_by_id(incident_id):
+    with get_connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM cyber_incidents WHERE id = ?",
+            conn,
+            params=(incident_id,)
+        )
     return df
 
 def update_incident_status(incident_id, new_status):
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE cyber_incidents SET status = ? WHERE id = ?",
-        (new_status, incident_id)
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE cyber_incidents SET status = ? WHERE id = ?",
+            (new_status, incident_id)
+        )
+        rows_affected = cursor.rowcount
+    invalidate("cyber_incidents")
     return rows_affected
 
 def delete_incident(incident_id):
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM cyber_incidents WHERE id = ?",
-        (incident_id,)
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM cyber_incidents WHERE id = ?",
+            (incident_id,)
+        )
+        rows_affected = cursor.rowcount
+    invalidate("cyber_incidents")
     return rows_affected
 
-import pandas as pd
-
 def get_incidents_by_type_count(conn):
     query = """
     SELECT incident_type, COUNT(*) as count
@@ -1,48 +1,71 @@
 import pandas as pd
-from app.data.db import connect_database
+from app.data.db import get_connection
+from app.data.cache import invalidate
+from app.data.dtypes import apply_dtypes
 
 def insert_dataset(dataset_name, category, source, last_updated, record_count, file_size_mb):
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO datasets_metadata 
-        (dataset_name, category, source, last_updated, record_count, file_size_mb)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (dataset_name, category, source, last_updated, record_count, file_size_mb))
-    conn.commit()
-    dataset_id = cursor.lastrowid
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO datasets_metadata 
+            (dataset_name, category, source, last_updated, record_count, file_size_mb)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (dataset_name, category, source, last_updated, record_count, file_size_mb))
+        dataset_id = cursor.lastrowid
+    invalidate("datasets_metadata")
     return dataset_id
 
 def get_all_datasets():
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM datasets_metadata ORDER BY id DESC",
-        conn
-    )
-    conn.close()
-    return df
+    with get_connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM datasets_metadata ORDER BY id DESC",
+            conn
+        )
+    return apply_dtypes(df, "datasets_metadata")
+
+def get_dataset_by_name(dataset_name):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM datasets_metadata WHERE dataset_name = ?",
+            (dataset_name,)
+        )
+        dataset = cursor.fetchone()
+    return dataset
+
+def update_dataset(id, record_count, file_size_mb, last_updated):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE datasets_metadata
+            SET record_count = ?, file_size_mb = ?, last_updated = ?
+            WHERE id = ?
+            """,
+            (record_count, file_size_mb, last_updated, id)
+        )
+        rows_affected = cursor.rowcount
+    invalidate("datasets_metadata")
+    return rows_affected
 
 def update_dataset_record_count(id, new_count):
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE datasets_metadata SET record_count = ? WHERE id = ?",
-        (new_count, id)
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE datasets_metadata SET record_count = ? WHERE id = ?",
+            (new_count, id)
+        )
+        rows_affected = cursor.rowcount
+    invalidate("datasets_metadata")
     return rows_affected
 
 def delete_dataset(id):
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM datasets_metadata WHERE id = ?",
-        (id,)
-    )
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM datasets_metadata WHERE id = ?",
+            (id,)
+        )
+        rows_affected = cursor.rowcount
+    invalidate("datasets_metadata")
     return rows_affected
\ No newline at end of file
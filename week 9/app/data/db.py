@@ -1,18 +1,169 @@
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
-DB_PATH = Path("DATA") / "intelligence_platform.db"
+BASE_DIR = Path(__file__).resolve().parents[2]
+# PLATFORM_DATA_DIR points the app at another data directory (the tests
+# use a scratch one, so they never touch the committed database).
+DATA_DIR = Path(os.environ.get("PLATFORM_DATA_DIR") or BASE_DIR / "DATA")
+DB_PATH = DATA_DIR / "intelligence_platform.db"
+
+# Pragmas applied once to every pooled connection.
+POOL_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,   # 256 MB
+    "cache_size": -20000,     # ~20 MB (negative means KiB)
+    "busy_timeout": 5000,
+}
+
+# Idle connections kept per database file. Callers borrow one for the
+# length of a `with get_connection()` block and hand it back, so any
+# thread (Streamlit runs every rerun on a fresh one) reuses the same few
+# connections. At most POOL_SIZE are open per file; a caller finding them
+# all busy waits up to POOL_TIMEOUT seconds, then gets a one-off
+# connection that is closed when the block ends.
+POOL_SIZE = 8
+POOL_TIMEOUT = 2.0
+
+_pool_lock = threading.Lock()
+_pools = {}
+_pool_generation = 0
+_pool_stats = {"hits": 0, "misses": 0, "overflow": 0}
+
 
 def connect_database(db_path=DB_PATH):
     return sqlite3.connect(str(db_path))
 
+
+def _open_pooled_connection(db_path):
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    for name, value in POOL_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def _pool_for(key):
+    """The pool for one database file (caller holds _pool_lock)."""
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = {"idle": queue.LifoQueue(), "open": 0}
+    return pool
+
+
+def _acquire(db_path):
+    """
+    Borrow a connection to db_path. Returns (conn, pool, generation);
+    pool is None for a one-off connection.
+    """
+    key = str(Path(db_path).resolve())
+    with _pool_lock:
+        pool = _pool_for(key)
+        generation = _pool_generation
+        try:
+            conn = pool["idle"].get_nowait()
+            _pool_stats["hits"] += 1
+            return conn, pool, generation
+        except queue.Empty:
+            opening = pool["open"] < POOL_SIZE
+            if opening:
+                pool["open"] += 1
+                _pool_stats["misses"] += 1
+    if opening:
+        try:
+            return _open_pooled_connection(key), pool, generation
+        except Exception:
+            with _pool_lock:
+                pool["open"] -= 1
+            raise
+    try:
+        conn = pool["idle"].get(timeout=POOL_TIMEOUT)
+        with _pool_lock:
+            _pool_stats["hits"] += 1
+        return conn, pool, generation
+    except queue.Empty:
+        with _pool_lock:
+            _pool_stats["overflow"] += 1
+        return _open_pooled_connection(key), None, generation
+
+
+def _release(conn, pool, generation):
+    """Hand a borrowed connection back, or close it if it does not belong in the pool."""
+    with _pool_lock:
+        # After close_pool() the old pools are gone; their connections close here.
+        keep = pool is not None and generation == _pool_generation
+        if keep:
+            pool["idle"].put(conn)
+    if not keep:
+        conn.close()
+
+
+@contextmanager
+def get_connection(db_path=DB_PATH):
+    """
+    Borrow a pooled connection for the length of the block.
+
+    Commits when the block exits cleanly and rolls back on error, then
+    returns the connection to the pool for the next caller, on any thread.
+    """
+    conn, pool, generation = _acquire(db_path)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _release(conn, pool, generation)
+
+
+def pool_stats():
+    """Return pool hit/miss counters and the number of open connections."""
+    with _pool_lock:
+        stats = dict(_pool_stats)
+        stats["open_connections"] = sum(pool["open"] for pool in _pools.values())
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / total if total else 0.0
+    return stats
+
+
+def close_pool():
+    """Close every idle pooled connection and reset the counters; borrowed ones close on return."""
+    global _pool_generation
+    with _pool_lock:
+        for pool in _pools.values():
+            while True:
+                try:
+                    conn = pool["idle"].get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+        _pools.clear()
+        for name in _pool_stats:
+            _pool_stats[name] = 0
+        _pool_generation += 1
+
 import pandas as pd
 
-def load_csv_to_table(conn, csv_path, table_name):
+def load_csv_to_table(conn, csv_path, table_name, chunk_size=None, rebuild_indexes=False,
+                      defer_summaries=False):
     path = Path(csv_path)
     if not path.exists():
         return 0
-    
+
+    # Streaming mode: bounded memory, one transaction per chunk.
+    if chunk_size:
+        from app.data.ingest import stream_csv_to_table
+        stats = stream_csv_to_table(conn, path, table_name, chunk_size,
+                                    rebuild_indexes, defer_summaries)
+        return stats["rows"]
+
     df = pd.read_csv(path)
     df.to_sql(name=table_name, con=conn, if_exists='append', index=False)
     return len(df)
@@ -0,0 +1,112 @@
+"""
+Compact in-memory dtypes for the domain tables.
+
+schema.py defines how the tables are stored in SQLite; this module defines
+how they are held in pandas once loaded. Every column gets a declared
+dtype: categoricals for the low-cardinality text columns (with the known
+vocabulary fixed up front, so category codes are stable across loads),
+datetime64 for dates, 32-bit ids, nullable ints and float32 sizes. Only
+free text (descriptions, ticket ids) stays as strings, in pandas 3's
+"str" dtype: missing values stay NaN, and the text is held in Arrow
+buffers when pyarrow is installed (both are in requirements.txt).
+Without pyarrow they are Python objects, which about doubles the typed
+incident and ticket frames.
+
+apply_dtypes() is used by every loader (snapshots, repositories), so the
+pages and services always see the same types.
+
+    python -m app.data.dtypes     # memory per table, as loaded vs typed
+"""
+import pandas as pd
+
+# Values the dashboards and imported data use. Anything else found in the
+# table is appended, so an unexpected value is never turned into NaN.
+INCIDENT_TYPES = ["DDoS", "DDoS Attack", "Data Leak", "Malware", "Malware Infection",
+                  "Phishing", "Phishing Email", "Ransomware", "Unauthorized Access"]
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+INCIDENT_STATUSES = ["Triage", "Active", "Contained", "Open", "In Progress", "Resolved", "Closed"]
+TICKET_PRIORITIES = ["Low", "Medium", "High", "Urgent"]
+TICKET_STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+TICKET_CATEGORIES = ["Access", "Hardware", "Network", "Security", "Software"]
+DATASET_CATEGORIES = ["Analytics", "Computer Vision", "Monitoring", "NLP", "Networking",
+                      "Predictive Modeling", "Security", "System", "Time Series"]
+
+# Open categoricals: repetitive text whose values are not known up front.
+CATEGORY = "category"
+DATETIME = "datetime64[s]"
+
+# table -> column -> dtype, or a list for a categorical with that vocabulary.
+TABLE_DTYPES = {
+    "cyber_incidents": {
+        "id": "int32",
+        "date": DATETIME,
+        "incident_type": INCIDENT_TYPES,
+        "severity": SEVERITIES,
+        "status": INCIDENT_STATUSES,
+        "description": "str",
+        "reported_by": CATEGORY,
+        "created_at": DATETIME,
+    },
+    "IT_tickets": {
+        "id": "int32",
+        "ticket_id": "str",
+        "priority": TICKET_PRIORITIES,
+        "status": TICKET_STATUSES,
+        "category": TICKET_CATEGORIES,
+        "subject": CATEGORY,
+        "description": "str",
+        "created_date": DATETIME,
+        "resolved_date": DATETIME,
+        "assigned_to": CATEGORY,
+        "created_at": DATETIME,
+    },
+    "datasets_metadata": {
+        "id": "int32",
+        "dataset_name": CATEGORY,
+        "category": DATASET_CATEGORIES,
+        "source": CATEGORY,
+        "last_updated": DATETIME,
+        "record_count": "Int64",
+        "file_size_mb": "float32",
+        "created_at": DATETIME,
+    },
+}
+
+
+def _categorical(series, vocabulary):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    extra = sorted(set(series.dropna().astype(str)) - set(vocabulary))
+    return series.astype(pd.CategoricalDtype(list(vocabulary) + extra))
+
+
+def apply_dtypes(df, table):
+    """Convert a freshly read frame to the table's declared dtypes, in place. Returns df."""
+    for column, dtype in TABLE_DTYPES[table].items():
+        if column not in df.columns:
+            continue
+        if isinstance(dtype, list):
+            df[column] = _categorical(df[column], dtype)
+        elif dtype == DATETIME:
+            df[column] = pd.to_datetime(df[column], format="ISO8601", errors="coerce").astype(DATETIME)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def megabytes(df):
+    """Memory held by a frame, strings included."""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+if __name__ == "__main__":
+    from app.data.db import get_connection
+    for table in TABLE_DTYPES:
+        with get_connection() as conn:
+            df = pd.read_sql_query(f"SELECT * FROM {table} ORDER BY id", conn)
+        before = megabytes(df)
+        after = megabytes(apply_dtypes(df, table))
+        ratio = before / after if after else 0
+        print(f"{table:18} {len(df):>8} rows  {before:8.2f} MB -> {after:7.2f} MB  ({ratio:.1f}x)")
+        for column, usage in df.memory_usage(deep=True, index=False).items():
+            print(f"    {column:15} {str(df[column].dtype):18} {usage / 1024:10.1f} KB")
@@ -0,0 +1,128 @@
+import csv
+import time
+from itertools import chain, islice
+from pathlib import Path
+from app.data import changes, search, snapshots, summary
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def get_table_columns(conn, table_name):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+
+
+def _drop_indexes(conn, table_name):
+    """Drop the table's explicit indexes and return their CREATE statements."""
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = ? COLLATE NOCASE AND sql IS NOT NULL",
+        (table_name,)
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+    return [sql for _, sql in indexes]
+
+
+def iter_csv_chunks(f, columns, chunk_size):
+    """Yield chunks of row tuples holding only `columns`; empty fields become None."""
+    reader = csv.reader(f)
+    header = next(reader, [])
+    positions = [header.index(col) for col in columns]
+    while True:
+        chunk = [
+            tuple(row[i] or None if i < len(row) else None for i in positions)
+            for row in islice(reader, chunk_size)
+        ]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _read_lines(csv_file, end=None):
+    """Decoded lines of a file, stopping at byte end (a line boundary) if given."""
+    position = 0
+    with open(csv_file, "rb") as f:
+        for raw in f:
+            position += len(raw)
+            if end is not None and position > end:
+                return
+            yield raw.decode("utf-8")
+
+
+def stream_csv_to_table(conn, csv_path, table_name, chunk_size=DEFAULT_CHUNK_SIZE,
+                        rebuild_indexes=False, defer_summaries=False, end=None):
+    """
+    Append a CSV to a table without loading the whole file into memory.
+
+    The file is read chunk_size rows at a time and each chunk is written
+    with executemany inside its own transaction. CSV columns that the
+    table does not have are ignored. With end set, only the first end
+    bytes (a line boundary) are read.
+
+    For large files, rebuild_indexes=True drops the table's secondary
+    indexes and rebuilds them once at the end, and defer_summaries=True
+    suspends the summary and full-text triggers and recomputes the
+    table's summaries and search index in one pass afterwards. The change
+    log then gets one 'reload' entry instead of one entry per row.
+
+    Returns a dict with rows, seconds and rows_per_sec.
+    """
+    csv_file = Path(csv_path)
+    table_columns = set(get_table_columns(conn, table_name))
+    lines = _read_lines(csv_file, end)
+    header_line = next(lines, "")
+    header = next(csv.reader([header_line]), [])
+    columns = [col for col in header if col in table_columns]
+
+    insert_sql = (
+        f"INSERT INTO {table_name} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)})"
+    )
+
+    start = time.perf_counter()
+    rows = 0
+    index_sql = _drop_indexes(conn, table_name) if rebuild_indexes else []
+    source = summary.summary_source(table_name) if defer_summaries else None
+    fts_source = search.fts_source(table_name) if defer_summaries else None
+    change_source = changes.change_source(table_name) if defer_summaries else None
+    if change_source:
+        changes.drop_change_triggers(conn, change_source)
+    if source:
+        summary.drop_summary_triggers(conn, source)
+    if fts_source:
+        search.drop_fts_triggers(conn, fts_source)
+    conn.commit()
+    try:
+        for chunk in iter_csv_chunks(chain([header_line], lines), columns, chunk_size):
+            try:
+                conn.executemany(insert_sql, chunk)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            rows += len(chunk)
+    finally:
+        lines.close()
+        for sql in index_sql:
+            conn.execute(sql)
+        if source:
+            summary.create_summary_triggers(conn, source)
+            summary.rebuild_summaries(conn, [source])
+        if fts_source:
+            search.create_fts_triggers(conn, fts_source)
+            search.rebuild_search_index(conn, [fts_source])
+        if change_source:
+            changes.create_change_triggers(conn, change_source)
+            if rows:
+                changes.log_reload(conn, change_source)
+        if rows:
+            snapshots.bump_table_version(conn, table_name)
+        conn.commit()
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds else 0.0,
+    }
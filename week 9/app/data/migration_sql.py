@@ -0,0 +1,1162 @@
+"""
+Frozen SQL for each shipped migration step (see migrations.py).
+
+Every list is exactly what its step ran when it shipped, so a database
+migrated today ends up with the same schema as one migrated back then,
+however schema.py, summary.py, search.py, snapshots.py and changes.py
+have moved on since. Never edit a list here; a schema change is a new
+step with its own list.
+"""
+
+
+V1_BASE_TABLES = [
+    """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            role TEXT DEFAULT 'user'
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            incident_type TEXT,
+            severity TEXT,
+            status TEXT,
+            description TEXT,
+            reported_by TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            -- Optional: Add a foreign key constraint for data integrity
+            FOREIGN KEY (reported_by) REFERENCES users(username)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS datasets_metadata (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dataset_name TEXT NOT NULL,
+            category TEXT,
+            source TEXT,
+            last_updated TEXT,
+            record_count INTEGER,
+            file_size_mb REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS IT_tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id TEXT UNIQUE NOT NULL,
+            priority TEXT,
+            status TEXT,
+            category TEXT,
+            subject TEXT NOT NULL,
+            description TEXT,
+            created_date TEXT,
+            resolved_date TEXT,
+            assigned_to TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+]
+
+
+V2_SECONDARY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_incidents_type ON cyber_incidents(incident_type)",
+    """
+        CREATE INDEX IF NOT EXISTS idx_incidents_severity_status ON cyber_incidents(severity,
+            status)
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_incidents_status ON cyber_incidents(status)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_date ON cyber_incidents(date)",
+    "CREATE INDEX IF NOT EXISTS idx_it_tickets_status ON IT_tickets(status)",
+    "CREATE INDEX IF NOT EXISTS idx_it_tickets_priority ON IT_tickets(priority)",
+    """
+        CREATE INDEX IF NOT EXISTS idx_it_tickets_created_date ON IT_tickets(created_date)
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_datasets_category ON datasets_metadata(category)",
+    "CREATE INDEX IF NOT EXISTS idx_datasets_name ON datasets_metadata(dataset_name)",
+    "ANALYZE",
+    """
+        CREATE TABLE IF NOT EXISTS schema_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """,
+    """
+        INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('index_set_version', '1')
+    """,
+]
+
+
+V3_SUMMARY_TABLES = [
+    """
+        CREATE TABLE IF NOT EXISTS summary_counts (
+            source TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (source, dimension, value)
+        ) WITHOUT ROWID
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS summary_totals (
+            source TEXT NOT NULL,
+            measure TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (source, measure)
+        ) WITHOUT ROWID
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_insert
+            AFTER INSERT ON cyber_incidents
+        BEGIN
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'day', coalesce(substr(NEW.date, 1, 10), ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'status', coalesce(NEW.status, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'severity', coalesce(NEW.severity, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'incident_type', coalesce(NEW.incident_type, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'all', coalesce('', ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_delete
+            AFTER DELETE ON cyber_incidents
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'day'
+                    AND value = coalesce(substr(OLD.date, 1, 10), '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'status'
+                    AND value = coalesce(OLD.status, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'severity'
+                    AND value = coalesce(OLD.severity, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'incident_type'
+                    AND value = coalesce(OLD.incident_type, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'all'
+                    AND value = coalesce('', '');
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_day_update
+            AFTER UPDATE OF date ON cyber_incidents
+            WHEN coalesce(substr(OLD.date, 1, 10), '') IS NOT coalesce(substr(NEW.date, 1, 10),
+                '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'day'
+                    AND value = coalesce(substr(OLD.date, 1, 10), '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'day', coalesce(substr(NEW.date, 1, 10), ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_status_update
+            AFTER UPDATE OF status ON cyber_incidents
+            WHEN coalesce(OLD.status, '') IS NOT coalesce(NEW.status, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'status'
+                    AND value = coalesce(OLD.status, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'status', coalesce(NEW.status, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_severity_update
+            AFTER UPDATE OF severity ON cyber_incidents
+            WHEN coalesce(OLD.severity, '') IS NOT coalesce(NEW.severity, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'severity'
+                    AND value = coalesce(OLD.severity, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'severity', coalesce(NEW.severity, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_incident_type_update
+            AFTER UPDATE OF incident_type ON cyber_incidents
+            WHEN coalesce(OLD.incident_type, '') IS NOT coalesce(NEW.incident_type, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'incident_type'
+                    AND value = coalesce(OLD.incident_type, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'incident_type', coalesce(NEW.incident_type, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_insert
+            AFTER INSERT ON IT_tickets
+        BEGIN
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'day', coalesce(substr(NEW.created_date, 1, 10), ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'status', coalesce(NEW.status, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'priority', coalesce(NEW.priority, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'category', coalesce(NEW.category, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'all', coalesce('', ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_delete
+            AFTER DELETE ON IT_tickets
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'day'
+                    AND value = coalesce(substr(OLD.created_date, 1, 10), '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'status'
+                    AND value = coalesce(OLD.status, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'priority'
+                    AND value = coalesce(OLD.priority, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'category'
+                    AND value = coalesce(OLD.category, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'all' AND value = coalesce('', '');
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_day_update
+            AFTER UPDATE OF created_date ON IT_tickets
+            WHEN coalesce(substr(OLD.created_date, 1, 10),
+                '') IS NOT coalesce(substr(NEW.created_date, 1, 10), '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'day'
+                    AND value = coalesce(substr(OLD.created_date, 1, 10), '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'day', coalesce(substr(NEW.created_date, 1, 10), ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_status_update
+            AFTER UPDATE OF status ON IT_tickets
+            WHEN coalesce(OLD.status, '') IS NOT coalesce(NEW.status, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'status'
+                    AND value = coalesce(OLD.status, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'status', coalesce(NEW.status, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_priority_update
+            AFTER UPDATE OF priority ON IT_tickets
+            WHEN coalesce(OLD.priority, '') IS NOT coalesce(NEW.priority, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'priority'
+                    AND value = coalesce(OLD.priority, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'priority', coalesce(NEW.priority, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_category_update
+            AFTER UPDATE OF category ON IT_tickets
+            WHEN coalesce(OLD.category, '') IS NOT coalesce(NEW.category, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'category'
+                    AND value = coalesce(OLD.category, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'category', coalesce(NEW.category, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_datasets_metadata_insert
+            AFTER INSERT ON datasets_metadata
+        BEGIN
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('datasets_metadata', 'category', coalesce(NEW.category, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('datasets_metadata', 'all', coalesce('', ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_totals (source, measure, total)
+                VALUES ('datasets_metadata', 'record_count', coalesce(NEW.record_count, 0))
+                ON CONFLICT (source,
+                    measure) DO UPDATE SET total = total + (coalesce(NEW.record_count, 0));
+            INSERT INTO summary_totals (source, measure, total)
+                VALUES ('datasets_metadata', 'file_size_mb', coalesce(NEW.file_size_mb, 0))
+                ON CONFLICT (source,
+                    measure) DO UPDATE SET total = total + (coalesce(NEW.file_size_mb, 0));
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_datasets_metadata_delete
+            AFTER DELETE ON datasets_metadata
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'datasets_metadata' AND dimension = 'category'
+                    AND value = coalesce(OLD.category, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'datasets_metadata' AND dimension = 'all'
+                    AND value = coalesce('', '');
+            INSERT INTO summary_totals (source, measure, total)
+                VALUES ('datasets_metadata', 'record_count', -coalesce(OLD.record_count, 0))
+                ON CONFLICT (source,
+                    measure) DO UPDATE SET total = total + (-coalesce(OLD.record_count, 0));
+            INSERT INTO summary_totals (source, measure, total)
+                VALUES ('datasets_metadata', 'file_size_mb', -coalesce(OLD.file_size_mb, 0))
+                ON CONFLICT (source,
+                    measure) DO UPDATE SET total = total + (-coalesce(OLD.file_size_mb, 0));
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_datasets_metadata_category_update
+            AFTER UPDATE OF category ON datasets_metadata
+            WHEN coalesce(OLD.category, '') IS NOT coalesce(NEW.category, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'datasets_metadata' AND dimension = 'category'
+                    AND value = coalesce(OLD.category, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('datasets_metadata', 'category', coalesce(NEW.category, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_datasets_metadata_record_count_update
+            AFTER UPDATE OF record_count ON datasets_metadata
+        BEGIN
+            INSERT INTO summary_totals (source, measure, total)
+                VALUES ('datasets_metadata', 'record_count', coalesce(NEW.record_count,
+                    0) - coalesce(OLD.record_count, 0))
+                ON CONFLICT (source,
+                    measure) DO UPDATE SET total = total + (coalesce(NEW.record_count,
+                    0) - coalesce(OLD.record_count, 0));
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_datasets_metadata_file_size_mb_update
+            AFTER UPDATE OF file_size_mb ON datasets_metadata
+        BEGIN
+            INSERT INTO summary_totals (source, measure, total)
+                VALUES ('datasets_metadata', 'file_size_mb', coalesce(NEW.file_size_mb,
+                    0) - coalesce(OLD.file_size_mb, 0))
+                ON CONFLICT (source,
+                    measure) DO UPDATE SET total = total + (coalesce(NEW.file_size_mb,
+                    0) - coalesce(OLD.file_size_mb, 0));
+        END
+    """,
+    "DELETE FROM summary_counts WHERE source = 'cyber_incidents'",
+    "DELETE FROM summary_totals WHERE source = 'cyber_incidents'",
+    "DELETE FROM summary_counts WHERE source = 'IT_tickets'",
+    "DELETE FROM summary_totals WHERE source = 'IT_tickets'",
+    "DELETE FROM summary_counts WHERE source = 'datasets_metadata'",
+    "DELETE FROM summary_totals WHERE source = 'datasets_metadata'",
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'day', coalesce(substr(cyber_incidents.date, 1, 10), ''),
+            COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce(substr(cyber_incidents.date, 1, 10), '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'status', coalesce(cyber_incidents.status, ''), COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce(cyber_incidents.status, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'severity', coalesce(cyber_incidents.severity, ''), COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce(cyber_incidents.severity, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'incident_type', coalesce(cyber_incidents.incident_type, ''),
+            COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce(cyber_incidents.incident_type, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'all', coalesce('', ''), COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce('', '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'day', coalesce(substr(IT_tickets.created_date, 1, 10), ''),
+            COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce(substr(IT_tickets.created_date, 1, 10), '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'status', coalesce(IT_tickets.status, ''), COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce(IT_tickets.status, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'priority', coalesce(IT_tickets.priority, ''), COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce(IT_tickets.priority, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'category', coalesce(IT_tickets.category, ''), COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce(IT_tickets.category, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'all', coalesce('', ''), COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce('', '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'datasets_metadata', 'category', coalesce(datasets_metadata.category, ''),
+            COUNT(*)
+        FROM datasets_metadata
+        GROUP BY coalesce(datasets_metadata.category, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'datasets_metadata', 'all', coalesce('', ''), COUNT(*)
+        FROM datasets_metadata
+        GROUP BY coalesce('', '')
+    """,
+    """
+        INSERT INTO summary_totals (source, measure, total)
+        SELECT 'datasets_metadata', 'record_count', coalesce(SUM(record_count), 0)
+        FROM datasets_metadata
+    """,
+    """
+        INSERT INTO summary_totals (source, measure, total)
+        SELECT 'datasets_metadata', 'file_size_mb', coalesce(SUM(file_size_mb), 0)
+        FROM datasets_metadata
+    """,
+]
+
+
+V4_FULL_TEXT_SEARCH = [
+    """
+        CREATE VIRTUAL TABLE IF NOT EXISTS incidents_fts USING fts5(description,
+            content = 'cyber_incidents', content_rowid = 'id', tokenize = 'porter unicode61',
+            prefix = '2 3')
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_cyber_incidents_insert
+            AFTER INSERT ON cyber_incidents
+        BEGIN
+            INSERT INTO incidents_fts (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_cyber_incidents_delete
+            AFTER DELETE ON cyber_incidents
+        BEGIN
+            INSERT INTO incidents_fts (incidents_fts, rowid, description)
+                VALUES ('delete', OLD.id, OLD.description);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_cyber_incidents_update
+            AFTER UPDATE OF description ON cyber_incidents
+        BEGIN
+            INSERT INTO incidents_fts (incidents_fts, rowid, description)
+                VALUES ('delete', OLD.id, OLD.description);
+            INSERT INTO incidents_fts (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    """,
+    """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(subject, description,
+            content = 'IT_tickets', content_rowid = 'id', tokenize = 'porter unicode61',
+            prefix = '2 3')
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_IT_tickets_insert
+            AFTER INSERT ON IT_tickets
+        BEGIN
+            INSERT INTO tickets_fts (rowid, subject, description)
+                VALUES (NEW.id, NEW.subject, NEW.description);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_IT_tickets_delete
+            AFTER DELETE ON IT_tickets
+        BEGIN
+            INSERT INTO tickets_fts (tickets_fts, rowid, subject, description)
+                VALUES ('delete', OLD.id, OLD.subject, OLD.description);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_IT_tickets_update
+            AFTER UPDATE OF subject, description ON IT_tickets
+        BEGIN
+            INSERT INTO tickets_fts (tickets_fts, rowid, subject, description)
+                VALUES ('delete', OLD.id, OLD.subject, OLD.description);
+            INSERT INTO tickets_fts (rowid, subject, description)
+                VALUES (NEW.id, NEW.subject, NEW.description);
+        END
+    """,
+    "INSERT INTO incidents_fts (incidents_fts) VALUES ('rebuild')",
+    "INSERT INTO tickets_fts (tickets_fts) VALUES ('rebuild')",
+]
+
+
+V5_MONTHLY_SUMMARIES = [
+    "DROP TRIGGER IF EXISTS trg_summary_cyber_incidents_insert",
+    "DROP TRIGGER IF EXISTS trg_summary_cyber_incidents_delete",
+    "DROP TRIGGER IF EXISTS trg_summary_cyber_incidents_day_update",
+    "DROP TRIGGER IF EXISTS trg_summary_cyber_incidents_status_update",
+    "DROP TRIGGER IF EXISTS trg_summary_cyber_incidents_severity_update",
+    "DROP TRIGGER IF EXISTS trg_summary_cyber_incidents_incident_type_update",
+    "DROP TRIGGER IF EXISTS trg_summary_cyber_incidents_month_type_update",
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_insert
+            AFTER INSERT ON cyber_incidents
+        BEGIN
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'day', coalesce(substr(NEW.date, 1, 10), ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'status', coalesce(NEW.status, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'severity', coalesce(NEW.severity, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'incident_type', coalesce(NEW.incident_type, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'month_type', coalesce(substr(NEW.date, 1, 7) || ' '
+                    || NEW.incident_type, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'all', coalesce('', ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_delete
+            AFTER DELETE ON cyber_incidents
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'day'
+                    AND value = coalesce(substr(OLD.date, 1, 10), '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'status'
+                    AND value = coalesce(OLD.status, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'severity'
+                    AND value = coalesce(OLD.severity, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'incident_type'
+                    AND value = coalesce(OLD.incident_type, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'month_type'
+                    AND value = coalesce(substr(OLD.date, 1, 7)
+                || ' ' || OLD.incident_type, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'all'
+                    AND value = coalesce('', '');
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_day_update
+            AFTER UPDATE OF date ON cyber_incidents
+            WHEN coalesce(substr(OLD.date, 1, 10), '') IS NOT coalesce(substr(NEW.date, 1, 10),
+                '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'day'
+                    AND value = coalesce(substr(OLD.date, 1, 10), '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'day', coalesce(substr(NEW.date, 1, 10), ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_status_update
+            AFTER UPDATE OF status ON cyber_incidents
+            WHEN coalesce(OLD.status, '') IS NOT coalesce(NEW.status, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'status'
+                    AND value = coalesce(OLD.status, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'status', coalesce(NEW.status, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_severity_update
+            AFTER UPDATE OF severity ON cyber_incidents
+            WHEN coalesce(OLD.severity, '') IS NOT coalesce(NEW.severity, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'severity'
+                    AND value = coalesce(OLD.severity, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'severity', coalesce(NEW.severity, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_incident_type_update
+            AFTER UPDATE OF incident_type ON cyber_incidents
+            WHEN coalesce(OLD.incident_type, '') IS NOT coalesce(NEW.incident_type, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'incident_type'
+                    AND value = coalesce(OLD.incident_type, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'incident_type', coalesce(NEW.incident_type, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_cyber_incidents_month_type_update
+            AFTER UPDATE OF date, incident_type ON cyber_incidents
+            WHEN coalesce(substr(OLD.date, 1, 7) || ' '
+                || OLD.incident_type, '') IS NOT coalesce(substr(NEW.date, 1, 7) || ' '
+                || NEW.incident_type, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'cyber_incidents' AND dimension = 'month_type'
+                    AND value = coalesce(substr(OLD.date, 1, 7)
+                || ' ' || OLD.incident_type, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('cyber_incidents', 'month_type', coalesce(substr(NEW.date, 1, 7) || ' '
+                    || NEW.incident_type, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    "DROP TRIGGER IF EXISTS trg_summary_IT_tickets_insert",
+    "DROP TRIGGER IF EXISTS trg_summary_IT_tickets_delete",
+    "DROP TRIGGER IF EXISTS trg_summary_IT_tickets_day_update",
+    "DROP TRIGGER IF EXISTS trg_summary_IT_tickets_status_update",
+    "DROP TRIGGER IF EXISTS trg_summary_IT_tickets_priority_update",
+    "DROP TRIGGER IF EXISTS trg_summary_IT_tickets_category_update",
+    "DROP TRIGGER IF EXISTS trg_summary_IT_tickets_month_category_update",
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_insert
+            AFTER INSERT ON IT_tickets
+        BEGIN
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'day', coalesce(substr(NEW.created_date, 1, 10), ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'status', coalesce(NEW.status, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'priority', coalesce(NEW.priority, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'category', coalesce(NEW.category, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'month_category', coalesce(substr(NEW.created_date, 1, 7)
+                    || ' ' || NEW.category, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'all', coalesce('', ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_delete
+            AFTER DELETE ON IT_tickets
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'day'
+                    AND value = coalesce(substr(OLD.created_date, 1, 10), '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'status'
+                    AND value = coalesce(OLD.status, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'priority'
+                    AND value = coalesce(OLD.priority, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'category'
+                    AND value = coalesce(OLD.category, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'month_category'
+                    AND value = coalesce(substr(OLD.created_date, 1, 7)
+                || ' ' || OLD.category, '');
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'all' AND value = coalesce('', '');
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_day_update
+            AFTER UPDATE OF created_date ON IT_tickets
+            WHEN coalesce(substr(OLD.created_date, 1, 10),
+                '') IS NOT coalesce(substr(NEW.created_date, 1, 10), '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'day'
+                    AND value = coalesce(substr(OLD.created_date, 1, 10), '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'day', coalesce(substr(NEW.created_date, 1, 10), ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_status_update
+            AFTER UPDATE OF status ON IT_tickets
+            WHEN coalesce(OLD.status, '') IS NOT coalesce(NEW.status, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'status'
+                    AND value = coalesce(OLD.status, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'status', coalesce(NEW.status, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_priority_update
+            AFTER UPDATE OF priority ON IT_tickets
+            WHEN coalesce(OLD.priority, '') IS NOT coalesce(NEW.priority, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'priority'
+                    AND value = coalesce(OLD.priority, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'priority', coalesce(NEW.priority, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_category_update
+            AFTER UPDATE OF category ON IT_tickets
+            WHEN coalesce(OLD.category, '') IS NOT coalesce(NEW.category, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'category'
+                    AND value = coalesce(OLD.category, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'category', coalesce(NEW.category, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_summary_IT_tickets_month_category_update
+            AFTER UPDATE OF created_date, category ON IT_tickets
+            WHEN coalesce(substr(OLD.created_date, 1, 7) || ' '
+                || OLD.category, '') IS NOT coalesce(substr(NEW.created_date, 1, 7) || ' '
+                || NEW.category, '')
+        BEGIN
+            UPDATE summary_counts SET count = count - 1
+                WHERE source = 'IT_tickets' AND dimension = 'month_category'
+                    AND value = coalesce(substr(OLD.created_date, 1, 7)
+                || ' ' || OLD.category, '');
+            INSERT INTO summary_counts (source, dimension, value, count)
+                VALUES ('IT_tickets', 'month_category', coalesce(substr(NEW.created_date, 1, 7)
+                    || ' ' || NEW.category, ''), 1)
+                ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + 1;
+        END
+    """,
+    "DELETE FROM summary_counts WHERE source = 'cyber_incidents'",
+    "DELETE FROM summary_totals WHERE source = 'cyber_incidents'",
+    "DELETE FROM summary_counts WHERE source = 'IT_tickets'",
+    "DELETE FROM summary_totals WHERE source = 'IT_tickets'",
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'day', coalesce(substr(cyber_incidents.date, 1, 10), ''),
+            COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce(substr(cyber_incidents.date, 1, 10), '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'status', coalesce(cyber_incidents.status, ''), COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce(cyber_incidents.status, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'severity', coalesce(cyber_incidents.severity, ''), COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce(cyber_incidents.severity, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'incident_type', coalesce(cyber_incidents.incident_type, ''),
+            COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce(cyber_incidents.incident_type, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'month_type', coalesce(substr(cyber_incidents.date, 1, 7)
+            || ' ' || cyber_incidents.incident_type, ''), COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce(substr(cyber_incidents.date, 1, 7) || ' '
+            || cyber_incidents.incident_type, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'cyber_incidents', 'all', coalesce('', ''), COUNT(*)
+        FROM cyber_incidents
+        GROUP BY coalesce('', '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'day', coalesce(substr(IT_tickets.created_date, 1, 10), ''),
+            COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce(substr(IT_tickets.created_date, 1, 10), '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'status', coalesce(IT_tickets.status, ''), COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce(IT_tickets.status, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'priority', coalesce(IT_tickets.priority, ''), COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce(IT_tickets.priority, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'category', coalesce(IT_tickets.category, ''), COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce(IT_tickets.category, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'month_category', coalesce(substr(IT_tickets.created_date, 1, 7)
+            || ' ' || IT_tickets.category, ''), COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce(substr(IT_tickets.created_date, 1, 7) || ' '
+            || IT_tickets.category, '')
+    """,
+    """
+        INSERT INTO summary_counts (source, dimension, value, count)
+        SELECT 'IT_tickets', 'all', coalesce('', ''), COUNT(*)
+        FROM IT_tickets
+        GROUP BY coalesce('', '')
+    """,
+    """
+        CREATE VIRTUAL TABLE IF NOT EXISTS datasets_fts USING fts5(dataset_name, category,
+            source, content = 'datasets_metadata', content_rowid = 'id',
+            tokenize = 'porter unicode61', prefix = '2 3')
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_datasets_metadata_insert
+            AFTER INSERT ON datasets_metadata
+        BEGIN
+            INSERT INTO datasets_fts (rowid, dataset_name, category, source)
+                VALUES (NEW.id, NEW.dataset_name, NEW.category, NEW.source);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_datasets_metadata_delete
+            AFTER DELETE ON datasets_metadata
+        BEGIN
+            INSERT INTO datasets_fts (datasets_fts, rowid, dataset_name, category, source)
+                VALUES ('delete', OLD.id, OLD.dataset_name, OLD.category, OLD.source);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_datasets_metadata_update
+            AFTER UPDATE OF dataset_name, category, source ON datasets_metadata
+        BEGIN
+            INSERT INTO datasets_fts (datasets_fts, rowid, dataset_name, category, source)
+                VALUES ('delete', OLD.id, OLD.dataset_name, OLD.category, OLD.source);
+            INSERT INTO datasets_fts (rowid, dataset_name, category, source)
+                VALUES (NEW.id, NEW.dataset_name, NEW.category, NEW.source);
+        END
+    """,
+    "INSERT INTO datasets_fts (datasets_fts) VALUES ('rebuild')",
+]
+
+
+V6_TABLE_VERSIONS = [
+    """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """,
+    """
+        INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('cyber_incidents', 0)
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_version_cyber_incidents_insert
+            AFTER INSERT ON cyber_incidents
+        BEGIN
+            UPDATE table_versions SET version = version + 1
+                WHERE table_name = 'cyber_incidents';
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_version_cyber_incidents_update
+            AFTER UPDATE ON cyber_incidents
+        BEGIN
+            UPDATE table_versions SET version = version + 1
+                WHERE table_name = 'cyber_incidents';
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_version_cyber_incidents_delete
+            AFTER DELETE ON cyber_incidents
+        BEGIN
+            UPDATE table_versions SET version = version + 1
+                WHERE table_name = 'cyber_incidents';
+        END
+    """,
+    """
+        INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('IT_tickets', 0)
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_version_IT_tickets_insert
+            AFTER INSERT ON IT_tickets
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = 'IT_tickets';
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_version_IT_tickets_update
+            AFTER UPDATE ON IT_tickets
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = 'IT_tickets';
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_version_IT_tickets_delete
+            AFTER DELETE ON IT_tickets
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = 'IT_tickets';
+        END
+    """,
+    """
+        INSERT OR IGNORE INTO table_versions (table_name, version)
+            VALUES ('datasets_metadata', 0)
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_version_datasets_metadata_insert
+            AFTER INSERT ON datasets_metadata
+        BEGIN
+            UPDATE table_versions SET version = version + 1
+                WHERE table_name = 'datasets_metadata';
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_version_datasets_metadata_update
+            AFTER UPDATE ON datasets_metadata
+        BEGIN
+            UPDATE table_versions SET version = version + 1
+                WHERE table_name = 'datasets_metadata';
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_version_datasets_metadata_delete
+            AFTER DELETE ON datasets_metadata
+        BEGIN
+            UPDATE table_versions SET version = version + 1
+                WHERE table_name = 'datasets_metadata';
+        END
+    """,
+]
+
+
+V7_CHANGE_LOG = [
+    """
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL,
+            pk INTEGER,
+            changed_columns TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_cyber_incidents_insert
+            AFTER INSERT ON cyber_incidents
+        BEGIN
+            INSERT INTO change_log (table_name, op, pk, changed_columns)
+                VALUES ('cyber_incidents', 'insert', NEW.id, NULL);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_cyber_incidents_update
+            AFTER UPDATE ON cyber_incidents
+            WHEN OLD.id IS NOT NEW.id OR OLD.date IS NOT NEW.date
+                OR OLD.incident_type IS NOT NEW.incident_type
+                    OR OLD.severity IS NOT NEW.severity
+                OR OLD.status IS NOT NEW.status OR OLD.description IS NOT NEW.description
+                OR OLD.reported_by IS NOT NEW.reported_by
+                    OR OLD.created_at IS NOT NEW.created_at
+        BEGIN
+            INSERT INTO change_log (table_name, op, pk, changed_columns)
+                VALUES ('cyber_incidents', 'update', NEW.id,
+                    rtrim(CASE WHEN OLD.id IS NOT NEW.id THEN 'id,' ELSE '' END
+                    || CASE WHEN OLD.date IS NOT NEW.date THEN 'date,' ELSE '' END
+                    || CASE WHEN OLD.incident_type IS NOT NEW.incident_type THEN 'incident_type,' ELSE '' END
+                    || CASE WHEN OLD.severity IS NOT NEW.severity THEN 'severity,' ELSE '' END
+                    || CASE WHEN OLD.status IS NOT NEW.status THEN 'status,' ELSE '' END
+                    || CASE WHEN OLD.description IS NOT NEW.description THEN 'description,' ELSE '' END
+                    || CASE WHEN OLD.reported_by IS NOT NEW.reported_by THEN 'reported_by,' ELSE '' END
+                    || CASE WHEN OLD.created_at IS NOT NEW.created_at THEN 'created_at,' ELSE '' END,
+                        ','));
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_cyber_incidents_delete
+            AFTER DELETE ON cyber_incidents
+        BEGIN
+            INSERT INTO change_log (table_name, op, pk, changed_columns)
+                VALUES ('cyber_incidents', 'delete', OLD.id, NULL);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_IT_tickets_insert
+            AFTER INSERT ON IT_tickets
+        BEGIN
+            INSERT INTO change_log (table_name, op, pk, changed_columns)
+                VALUES ('IT_tickets', 'insert', NEW.id, NULL);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_IT_tickets_update
+            AFTER UPDATE ON IT_tickets
+            WHEN OLD.id IS NOT NEW.id OR OLD.ticket_id IS NOT NEW.ticket_id
+                OR OLD.priority IS NOT NEW.priority OR OLD.status IS NOT NEW.status
+                OR OLD.category IS NOT NEW.category OR OLD.subject IS NOT NEW.subject
+                OR OLD.description IS NOT NEW.description
+                OR OLD.created_date IS NOT NEW.created_date
+                OR OLD.resolved_date IS NOT NEW.resolved_date
+                OR OLD.assigned_to IS NOT NEW.assigned_to
+                    OR OLD.created_at IS NOT NEW.created_at
+        BEGIN
+            INSERT INTO change_log (table_name, op, pk, changed_columns)
+                VALUES ('IT_tickets', 'update', NEW.id,
+                    rtrim(CASE WHEN OLD.id IS NOT NEW.id THEN 'id,' ELSE '' END
+                    || CASE WHEN OLD.ticket_id IS NOT NEW.ticket_id THEN 'ticket_id,' ELSE '' END
+                    || CASE WHEN OLD.priority IS NOT NEW.priority THEN 'priority,' ELSE '' END
+                    || CASE WHEN OLD.status IS NOT NEW.status THEN 'status,' ELSE '' END
+                    || CASE WHEN OLD.category IS NOT NEW.category THEN 'category,' ELSE '' END
+                    || CASE WHEN OLD.subject IS NOT NEW.subject THEN 'subject,' ELSE '' END
+                    || CASE WHEN OLD.description IS NOT NEW.description THEN 'description,' ELSE '' END
+                    || CASE WHEN OLD.created_date IS NOT NEW.created_date THEN 'created_date,' ELSE '' END
+                    || CASE WHEN OLD.resolved_date IS NOT NEW.resolved_date THEN 'resolved_date,' ELSE '' END
+                    || CASE WHEN OLD.assigned_to IS NOT NEW.assigned_to THEN 'assigned_to,' ELSE '' END
+                    || CASE WHEN OLD.created_at IS NOT NEW.created_at THEN 'created_at,' ELSE '' END,
+                        ','));
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_IT_tickets_delete
+            AFTER DELETE ON IT_tickets
+        BEGIN
+            INSERT INTO change_log (table_name, op, pk, changed_columns)
+                VALUES ('IT_tickets', 'delete', OLD.id, NULL);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_datasets_metadata_insert
+            AFTER INSERT ON datasets_metadata
+        BEGIN
+            INSERT INTO change_log (table_name, op, pk, changed_columns)
+                VALUES ('datasets_metadata', 'insert', NEW.id, NULL);
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_datasets_metadata_update
+            AFTER UPDATE ON datasets_metadata
+            WHEN OLD.id IS NOT NEW.id OR OLD.dataset_name IS NOT NEW.dataset_name
+                OR OLD.category IS NOT NEW.category OR OLD.source IS NOT NEW.source
+                OR OLD.last_updated IS NOT NEW.last_updated
+                OR OLD.record_count IS NOT NEW.record_count
+                OR OLD.file_size_mb IS NOT NEW.file_size_mb
+                    OR OLD.created_at IS NOT NEW.created_at
+        BEGIN
+            INSERT INTO change_log (table_name, op, pk, changed_columns)
+                VALUES ('datasets_metadata', 'update', NEW.id,
+                    rtrim(CASE WHEN OLD.id IS NOT NEW.id THEN 'id,' ELSE '' END
+                    || CASE WHEN OLD.dataset_name IS NOT NEW.dataset_name THEN 'dataset_name,' ELSE '' END
+                    || CASE WHEN OLD.category IS NOT NEW.category THEN 'category,' ELSE '' END
+                    || CASE WHEN OLD.source IS NOT NEW.source THEN 'source,' ELSE '' END
+                    || CASE WHEN OLD.last_updated IS NOT NEW.last_updated THEN 'last_updated,' ELSE '' END
+                    || CASE WHEN OLD.record_count IS NOT NEW.record_count THEN 'record_count,' ELSE '' END
+                    || CASE WHEN OLD.file_size_mb IS NOT NEW.file_size_mb THEN 'file_size_mb,' ELSE '' END
+                    || CASE WHEN OLD.created_at IS NOT NEW.created_at THEN 'created_at,' ELSE '' END,
+                        ','));
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_changes_datasets_metadata_delete
+            AFTER DELETE ON datasets_metadata
+        BEGIN
+            INSERT INTO change_log (table_name, op, pk, changed_columns)
+                VALUES ('datasets_metadata', 'delete', OLD.id, NULL);
+        END
+    """,
+]
+
+
+V8_CHANGE_LOG_COMPACTION = [
+    """
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_compact AFTER INSERT ON change_log
+        WHEN NEW.seq % 1000 = 0
+        BEGIN
+            INSERT OR REPLACE INTO schema_meta (key, value)
+                SELECT 'change_log_floor', max(seq) FROM (
+                    SELECT seq, changed_at FROM change_log ORDER BY seq LIMIT 2000
+                ) WHERE changed_at < datetime('now', '-86400 seconds')
+                HAVING max(seq) IS NOT NULL;
+            DELETE FROM change_log WHERE seq <= (
+                SELECT CAST(value AS INTEGER) FROM schema_meta WHERE key = 'change_log_floor'
+            );
+        END
+    """,
+    # Clears the backlog the trigger would otherwise work through slowly.
+    """
+        INSERT OR REPLACE INTO schema_meta (key, value)
+            SELECT 'change_log_floor', max(seq) FROM change_log
+            WHERE changed_at < datetime('now', '-86400 seconds')
+            HAVING max(seq) IS NOT NULL
+    """,
+    """
+        DELETE FROM change_log WHERE seq <= (
+            SELECT CAST(value AS INTEGER) FROM schema_meta WHERE key = 'change_log_floor'
+        )
+    """,
+]
@@ -0,0 +1,106 @@
+import time
+from app.data import migration_sql as sql
+
+# Schema history, tracked in PRAGMA user_version. Never edit a shipped
+# step; append a new one instead.
+#
+# Each step is (version, description, statements, online). statements are
+# the SQL strings frozen in migration_sql.py (or callables taking the
+# connection), never built from the live schema helpers, so editing those
+# cannot change what a shipped step does:
+#   online=False  all statements and the version bump commit together;
+#   online=True   every statement commits on its own (e.g. one index build
+#                 at a time), so WAL readers are never blocked and other
+#                 writers only wait for one statement. Statements must be
+#                 idempotent so an interrupted step can simply re-run.
+
+
+MIGRATIONS = [
+    (1, "base tables", sql.V1_BASE_TABLES, False),
+    (2, "secondary indexes", sql.V2_SECONDARY_INDEXES, True),
+    (3, "summary tables and triggers", sql.V3_SUMMARY_TABLES, False),
+    (4, "full-text search", sql.V4_FULL_TEXT_SEARCH, False),
+    (5, "monthly summaries and dataset search", sql.V5_MONTHLY_SUMMARIES, False),
+    (6, "table versions for snapshots", sql.V6_TABLE_VERSIONS, False),
+    (7, "change log", sql.V7_CHANGE_LOG, False),
+    (8, "change log compaction on write", sql.V8_CHANGE_LOG_COMPACTION, False),
+]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _run(conn, statement):
+    # Statements are SQL strings or callables taking the connection.
+    if callable(statement):
+        statement(conn)
+    else:
+        conn.execute(statement)
+
+
+def _apply(conn, version, statements, online):
+    if online:
+        for statement in statements:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                _run(conn, statement)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        conn.execute(f"PRAGMA user_version = {version}")
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for statement in statements:
+            _run(conn, statement)
+        conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def run_migrations(conn, target=None, verbose=True):
+    """
+    Apply every pending migration up to target (default: latest), in order.
+
+    Returns a list of (version, description, seconds) for the steps that
+    ran. A failed step is rolled back and leaves user_version at the last
+    step that completed.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    target = MIGRATIONS[-1][0] if target is None else target
+    current = get_schema_version(conn)
+    pending = [m for m in MIGRATIONS if current < m[0] <= target]
+
+    if any(online for *_, online in pending):
+        # Online steps rely on WAL so readers keep going during index builds.
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+
+    report = []
+    for version, description, statements, online in pending:
+        start = time.perf_counter()
+        _apply(conn, version, statements, online)
+        seconds = time.perf_counter() - start
+        report.append((version, description, seconds))
+        if verbose:
+            mode = "online" if online else "transactional"
+            print(f"  v{version:03d} {description} ({mode}): {seconds * 1000:.1f} ms")
+
+    if verbose and not pending:
+        print(f"  Schema is up to date (v{current}).")
+    return report
+
+
+if __name__ == "__main__":
+    from app.data.db import connect_database
+    conn = connect_database()
+    try:
+        run_migrations(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,124 @@
+import pandas as pd
+from app.data.db import get_connection
+
+DEFAULT_PAGE_SIZE = 50
+
+# Tables that can be paged, with the columns a page may be sorted or
+# filtered on. Only indexed columns are sortable, so every page is an
+# index range scan instead of a full sort (see schema.INDEXES).
+PAGEABLE_TABLES = {
+    "cyber_incidents": {
+        "sort": ["id", "date", "status", "incident_type"],
+        "filter": ["status", "severity", "incident_type", "reported_by"],
+    },
+    "IT_tickets": {
+        "sort": ["id", "ticket_id", "status", "priority", "created_date"],
+        "filter": ["status", "priority", "category", "assigned_to"],
+    },
+    "datasets_metadata": {
+        "sort": ["id", "dataset_name", "category"],
+        "filter": ["category", "source"],
+    },
+}
+
+
+def filter_sql(table, filters):
+    """
+    WHERE conditions and parameters for whitelisted equality filters.
+
+    filters maps a column to a value or a list of values.
+    """
+    allowed = PAGEABLE_TABLES[table]["filter"]
+    where, params = [], []
+    for column, value in (filters or {}).items():
+        if column not in allowed:
+            raise ValueError(f"Cannot filter {table} by {column}.")
+        if isinstance(value, (list, tuple, set)):
+            where.append(f"{column} IN ({', '.join('?' for _ in value)})")
+            params += list(value)
+        else:
+            where.append(f"{column} = ?")
+            params.append(value)
+    return where, params
+
+
+def _segments(sort, descending, after):
+    """
+    (clause, params) for each index range still to read, in display order.
+
+    SQLite sorts NULL first ascending and last descending. A row-value
+    comparison never matches NULL, so the NULL and non-NULL sort values
+    are read as separate ranges. Each range is then a plain index seek.
+    """
+    op = "<" if descending else ">"
+    if sort == "id":
+        return [(f"id {op} ?", [after[1]]) if after else ("1", [])]
+
+    if after is None:
+        nulls = (f"{sort} IS NULL", [])
+        values = (f"{sort} IS NOT NULL", [])
+    elif after[0] is None:
+        nulls = (f"{sort} IS NULL AND id {op} ?", [after[1]])
+        values = (f"{sort} IS NOT NULL", [])
+    else:
+        nulls = (f"{sort} IS NULL", [])
+        values = (f"({sort}, id) {op} (?, ?)", list(after))
+
+    in_nulls = after is not None and after[0] is None
+    if descending:
+        # NULLs come last; once inside them the value range is done.
+        return [nulls] if in_nulls else [values, nulls]
+    # NULLs come first; once past them the NULL range is done.
+    return [values] if after is not None and not in_nulls else [nulls, values]
+
+
+def fetch_pages(table, after=None, page_size=DEFAULT_PAGE_SIZE, pages=1,
+                sort="id", descending=False, filters=None):
+    """
+    Keyset pagination over one table.
+
+    Returns up to `pages` consecutive pages as a list of (DataFrame,
+    next_cursor) from one call, e.g. pages=2 for the visible page plus a
+    prefetched next one. Pass a page's next_cursor as `after` to continue;
+    it is None on the last page. filters are as for filter_sql().
+    Sorting and filtering happen in SQL, and the cost of a page does not
+    grow with how deep it is.
+    """
+    spec = PAGEABLE_TABLES.get(table)
+    if spec is None:
+        raise ValueError(f"Table {table} cannot be paged.")
+    if sort not in spec["sort"]:
+        raise ValueError(f"Cannot sort {table} by {sort}.")
+
+    where, params = filter_sql(table, filters)
+
+    direction = "DESC" if descending else "ASC"
+    order = f"id {direction}" if sort == "id" else f"{sort} {direction}, id {direction}"
+    limit = page_size * pages + 1
+    rows = []
+    with get_connection() as conn:
+        for clause, args in _segments(sort, descending, after):
+            sql = f"SELECT * FROM {table} WHERE " + " AND ".join(where + [clause])
+            cursor = conn.execute(f"{sql} ORDER BY {order} LIMIT ?",
+                                  params + args + [limit - len(rows)])
+            columns = [d[0] for d in cursor.description]
+            rows += cursor.fetchall()
+            if len(rows) >= limit:
+                break
+
+    sort_pos, id_pos = columns.index(sort), columns.index("id")
+    result = []
+    for i in range(pages):
+        chunk = rows[i * page_size:(i + 1) * page_size]
+        if not chunk and i:
+            break
+        more = len(rows) > (i + 1) * page_size
+        next_cursor = (chunk[-1][sort_pos], chunk[-1][id_pos]) if more else None
+        result.append((pd.DataFrame(chunk, columns=columns), next_cursor))
+    return result
+
+
+def fetch_page(table, after=None, page_size=DEFAULT_PAGE_SIZE, sort="id",
+               descending=False, filters=None):
+    """One page as (DataFrame, next_cursor)."""
+    return fetch_pages(table, after, page_size, 1, sort, descending, filters)[0]
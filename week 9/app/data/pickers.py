@@ -0,0 +1,91 @@
+from app.data.db import get_connection
+from app.data.pagination import filter_sql
+from app.data.search import FTS_TABLES, SEARCH_CANDIDATES, to_match_query
+
+PICK_LIMIT = 20
+
+# Record pickers: the indexed column typed into, and the option label,
+# built in SQL so no Python loop runs over the rows. Prefixes match
+# regardless of ASCII case, through the column's NOCASE index in
+# schema.INDEXES. With "fts" set the text is matched as words via the
+# table's full-text index instead.
+PICKERS = {
+    "IT_tickets": {
+        "column": "ticket_id",
+        "label": "ticket_id || ' (ID: ' || id || ')'",
+    },
+    "cyber_incidents": {
+        "column": "description",
+        "fts": True,
+        "label": "'ID ' || id || ' - ' || coalesce(incident_type, '?') || ' (' || coalesce(severity, '?') || ')'",
+    },
+    "datasets_metadata": {
+        "column": "dataset_name",
+        "label": "dataset_name || ' (' || coalesce(category, '') || ', ID: ' || id || ')'",
+    },
+}
+
+
+def _prefix_bounds(prefix):
+    """[low, high) range of every string starting with prefix (NOCASE collation)."""
+    # NOCASE compares with A-Z folded to a-z, so the bounds are folded the
+    # same way; otherwise "TCKT-Z" would end at "TCKT-[", below "tckt-z".
+    prefix = "".join(c.lower() if "A" <= c <= "Z" else c for c in prefix)
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def pick_records(table, text="", limit=PICK_LIMIT, filters=None):
+    """
+    Top `limit` records whose picker column starts with (or, for full-text
+    pickers, contains the words of) text, as (id, label) pairs.
+
+    A number also matches the record with that id. Matching is an index
+    range or FTS lookup, so the cost depends on `limit`, not on the table
+    size. filters are as for pagination.filter_sql().
+    """
+    spec = PICKERS.get(table)
+    if spec is None:
+        raise ValueError(f"No record picker for {table}.")
+    column, label = spec["column"], spec["label"]
+    where, params = filter_sql(table, filters)
+    text = text.strip()
+
+    # (FROM clause, conditions, params, ORDER BY) per lookup, best first.
+    order = f"{column} COLLATE NOCASE, id"
+    queries = []
+    if text.isdigit():
+        queries.append((table, where + ["id = ?"], params + [int(text)], order))
+    if text and spec.get("fts"):
+        # Same bounded candidate ranking as search.search().
+        fts = FTS_TABLES[table]["fts"]
+        match = " AND ".join([f"{fts} MATCH ?"] + [f"{table}.{cond}" for cond in where])
+        queries.append((
+            f"(SELECT {fts}.rowid AS rowid, bm25({fts}) AS rank "
+            f"FROM {fts} JOIN {table} ON {table}.id = {fts}.rowid WHERE {match} "
+            f"ORDER BY {fts}.rowid DESC LIMIT {SEARCH_CANDIDATES}) m "
+            f"JOIN {table} ON {table}.id = m.rowid",
+            [],
+            [to_match_query(text) or '""'] + params,
+            "m.rank",
+        ))
+    elif text:
+        low, high = _prefix_bounds(text)
+        queries.append((table, where + [f"{column} COLLATE NOCASE >= ?",
+                                        f"{column} COLLATE NOCASE < ?"],
+                        params + [low, high], order))
+    else:
+        # Nothing typed yet: the newest records.
+        queries.append((table, where, params, "id DESC"))
+
+    results = []
+    with get_connection() as conn:
+        for source, conditions, args, order_by in queries:
+            sql = f"SELECT {table}.id, {label} FROM {source}"
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            sql += f" ORDER BY {order_by} LIMIT ?"
+            results += conn.execute(sql, args + [limit]).fetchall()
+
+    seen = set()
+    unique = [r for r in results if not (r[0] in seen or seen.add(r[0]))]
+    return unique[:limit]
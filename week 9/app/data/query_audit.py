@@ -0,0 +1,88 @@
+"""
+EXPLAIN QUERY PLAN audit for the SQL in app/data.
+
+Finds every literal SQL string in the data modules, asks SQLite how it
+would run each one and flags full table scans and temp B-tree sorts.
+
+    python -m app.data.query_audit [path/to/database.db]
+"""
+import ast
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from app.data.db import DB_PATH
+
+DATA_PACKAGE = Path(__file__).resolve().parent
+SQL_START = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def collect_queries(package_dir=DATA_PACKAGE):
+    """Return (module, line, sql) for every plain string literal that is a query."""
+    queries = []
+    for path in sorted(package_dir.glob("*.py")):
+        tree = ast.parse(path.read_text(), filename=str(path))
+        # Pieces of f-strings are built at runtime and cannot be planned.
+        fstring_parts = {
+            id(value) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr)
+            for value in node.values
+        }
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Constant) and isinstance(node.value, str)
+                    and id(node) not in fstring_parts and SQL_START.match(node.value)):
+                queries.append((path.stem, node.lineno, " ".join(node.value.split())))
+    return queries
+
+
+def explain(conn, sql):
+    """Return the EXPLAIN QUERY PLAN detail lines for one query."""
+    params = [None] * sql.count("?")
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def audit(db_path=DB_PATH):
+    """Plan every query; return dicts with module, line, sql, plan, issues and skipped."""
+    conn = sqlite3.connect(f"file:{Path(db_path).resolve()}?mode=ro", uri=True)
+    results = []
+    try:
+        for module, line, sql in collect_queries():
+            try:
+                plan = explain(conn, sql)
+            except sqlite3.Error as e:
+                # e.g. temp tables that only exist inside a running sync
+                results.append({"module": module, "line": line, "sql": sql,
+                                "plan": [f"could not plan: {e}"], "issues": [],
+                                "skipped": True})
+                continue
+            issues = []
+            for detail in plan:
+                match = FULL_SCAN.match(detail)
+                if match and not match.group(1).startswith("sqlite_"):
+                    issues.append(f"full scan of {match.group(1)}")
+                elif detail.startswith("USE TEMP B-TREE"):
+                    issues.append(detail.lower())
+            results.append({"module": module, "line": line, "sql": sql,
+                            "plan": plan, "issues": issues, "skipped": False})
+    finally:
+        conn.close()
+    return results
+
+
+def print_report(results):
+    flagged = [r for r in results if r["issues"]]
+    for r in results:
+        marker = "FLAG" if r["issues"] else "skip" if r["skipped"] else " ok "
+        print(f"[{marker}] {r['module']}.py:{r['line']}  {r['sql'][:90]}")
+        for detail in r["plan"]:
+            print(f"         {detail}")
+        for issue in r["issues"]:
+            print(f"      -> {issue}")
+    print(f"\n{len(results)} queries planned, {len(flagged)} flagged.")
+    return flagged
+
+
+if __name__ == "__main__":
+    db_path = Path(sys.argv[1]) if len(sys.argv) > 1 else DB_PATH
+    flagged = print_report(audit(db_path))
+    sys.exit(1 if flagged else 0)
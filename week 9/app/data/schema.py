@@ -1,51 +1,103 @@
+# Secondary indexes owned by create_indexes(): name -> "table(columns)".
+# Bump INDEX_SET_VERSION whenever this set changes so existing
+# databases are reconciled (new indexes built, retired ones dropped).
+INDEX_SET_VERSION = 4
+INDEXES = {
+    # get_incidents_by_type_count / type bar chart (covering for GROUP BY)
+    "idx_incidents_type": "cyber_incidents(incident_type)",
+    # get_high_severity_by_status (covering for WHERE severity + GROUP BY status)
+    "idx_incidents_severity_status": "cyber_incidents(severity, status)",
+    # "Active Cases" / update-tab filter on status
+    "idx_incidents_status": "cyber_incidents(status)",
+    "idx_incidents_date": "cyber_incidents(date)",
+    "idx_it_tickets_status": "IT_tickets(status)",
+    "idx_it_tickets_priority": "IT_tickets(priority)",
+    "idx_it_tickets_created_date": "IT_tickets(created_date)",
+    "idx_datasets_category": "datasets_metadata(category)",
+    # record picker prefix search, case-insensitive (the incident picker
+    # matches descriptions through incidents_fts)
+    "idx_it_tickets_ticket_id_nocase": "IT_tickets(ticket_id COLLATE NOCASE)",
+    "idx_datasets_name_nocase": "datasets_metadata(dataset_name COLLATE NOCASE)",
+}
+
+# Table definitions, shared with the migration steps in migrations.py.
+USERS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        role TEXT DEFAULT 'user'
+    )
+"""
+
+CYBER_INCIDENTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS cyber_incidents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        incident_type TEXT,
+        severity TEXT,
+        status TEXT,
+        description TEXT,
+        reported_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        -- Optional: Add a foreign key constraint for data integrity
+        FOREIGN KEY (reported_by) REFERENCES users(username)
+    )
+"""
+
+DATASETS_METADATA_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS datasets_metadata (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dataset_name TEXT NOT NULL,
+        category TEXT,
+        source TEXT,
+        last_updated TEXT,
+        record_count INTEGER,
+        file_size_mb REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+IT_TICKETS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS IT_tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_id TEXT UNIQUE NOT NULL,
+        priority TEXT ,
+        status TEXT ,
+        category TEXT,
+        subject TEXT NOT NULL,
+        description TEXT,
+        created_date TEXT,
+        resolved_date TEXT,
+        assigned_to TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+SCHEMA_META_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+"""
+
 def create_users_table(conn):
     """Create users table."""
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL UNIQUE,
-            password_hash TEXT NOT NULL,
-            role TEXT DEFAULT 'user'
-        )
-    """)
+    cursor.execute(USERS_TABLE_SQL)
     conn.commit()
     print("Users table created successfully!")
 
 def create_cyber_incidents_table(conn):
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS cyber_incidents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT,
-            incident_type TEXT,
-            severity TEXT,
-            status TEXT,
-            description TEXT,
-            reported_by TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            -- Optional: Add a foreign key constraint for data integrity
-            FOREIGN KEY (reported_by) REFERENCES users(username)
-        )
-    """)
+    cursor.execute(CYBER_INCIDENTS_TABLE_SQL)
     conn.commit()
     print("Cyber incidents table created successfully!")
 
 
 def create_datasets_metadata_table(conn):
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS datasets_metadata (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            dataset_name TEXT NOT NULL,
-            category TEXT,
-            source TEXT,
-            last_updated TEXT,
-            record_count INTEGER,
-            file_size_mb REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    cursor.execute(DATASETS_METADATA_TABLE_SQL)
     conn.commit()
     print("Datasets metadata table created successfully!")
 
@@ -54,30 +106,53 @@ def Create_IT_Tickets_Table(conn):
     Create the it_tickets table.
     """
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS IT_tickets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticket_id TEXT UNIQUE NOT NULL,
-            priority TEXT ,
-            status TEXT ,
-            category TEXT,
-            subject TEXT NOT NULL,
-            description TEXT,
-            created_date TEXT,
-            resolved_date TEXT,
-            assigned_to TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    cursor.execute(IT_TICKETS_TABLE_SQL)
     conn.commit()
     print(" IT tickets table created successfully!")
 
+def _create_index(cursor, name):
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {INDEXES[name]}")
+
+def create_it_tickets_indexes(conn):
+    """Index the IT_tickets columns the dashboard filters and groups on."""
+    cursor = conn.cursor()
+    for name, target in INDEXES.items():
+        if target.startswith("IT_tickets("):
+            _create_index(cursor, name)
+    conn.commit()
+
+def create_indexes(conn):
+    """
+    Bring the database's managed indexes in line with INDEXES.
+
+    Does nothing when the stored index set version is current. Otherwise
+    builds missing indexes, drops retired idx_* ones, refreshes planner
+    statistics and records INDEX_SET_VERSION in schema_meta.
+    """
+    cursor = conn.cursor()
+    cursor.execute(SCHEMA_META_TABLE_SQL)
+    cursor.execute("SELECT value FROM schema_meta WHERE key = 'index_set_version'")
+    row = cursor.fetchone()
+    if row and int(row[0]) == INDEX_SET_VERSION:
+        return
+
+    for name in INDEXES:
+        _create_index(cursor, name)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'")
+    for (name,) in cursor.fetchall():
+        if name not in INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    cursor.execute("ANALYZE")
+    cursor.execute(
+        "INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('index_set_version', ?)",
+        (str(INDEX_SET_VERSION),)
+    )
+    conn.commit()
+    print(f"Indexes created successfully (index set v{INDEX_SET_VERSION})!")
 
 
 def create_all_tables(conn):
-    """Create all tables."""
-    create_users_table(conn)
-    create_cyber_incidents_table(conn)
-    create_datasets_metadata_table(conn)
-    Create_IT_Tickets_Table(conn)
-    
\ No newline at end of file
+    """Create all tables by applying any pending schema migrations."""
+    from app.data.migrations import run_migrations
+    run_migrations(conn)
+    create_indexes(conn)
@@ -0,0 +1,254 @@
+import math
+import re
+import pandas as pd
+from app.data.db import get_connection
+from app.data.pagination import filter_sql
+
+SEARCH_LIMIT = 20
+# Matches ranked per query (newest first); see search().
+SEARCH_CANDIDATES = 2000
+SNIPPET_WORDS = 12
+# Newest matches read per keyword by search_any(), and keywords used.
+SAMPLE_PER_TERM = 200
+MAX_TERMS = 8
+
+# Full-text indexes: source table -> FTS5 table, indexed text columns and
+# the source columns returned with each hit. The FTS tables are external
+# content tables (rowid = source id), so the text is not stored twice.
+FTS_TABLES = {
+    "cyber_incidents": {
+        "fts": "incidents_fts",
+        "columns": ["description"],
+        "result": ["id", "date", "incident_type", "severity", "status"],
+    },
+    "IT_tickets": {
+        "fts": "tickets_fts",
+        "columns": ["subject", "description"],
+        "result": ["id", "ticket_id", "priority", "status", "category", "subject"],
+    },
+    "datasets_metadata": {
+        "fts": "datasets_fts",
+        "columns": ["dataset_name", "category", "source"],
+        "result": ["id", "dataset_name", "category", "source", "record_count", "last_updated"],
+    },
+}
+
+# porter: "failed" finds "failure"; prefix: fast "phish*" style matching.
+FTS_OPTIONS = "tokenize = 'porter unicode61', prefix = '2 3'"
+
+# Words dropped from questions passed to search_any().
+STOPWORDS = set("""
+    a an and are as at be by can could did do does for from had has have how i
+    in is it its last me my of on or our please show should tell that the their
+    them there these this those to was we were what when where which who why
+    will with would you your any all many much most more month week year day
+    today yesterday recent recently latest
+""".split())
+
+
+def _fts_sql(source):
+    """CREATE VIRTUAL TABLE and the triggers that keep one FTS index in sync."""
+    spec = FTS_TABLES[source]
+    fts, columns = spec["fts"], spec["columns"]
+    col_list = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{col}" for col in columns)
+    old_values = ", ".join(f"OLD.{col}" for col in columns)
+    add = f"INSERT INTO {fts} (rowid, {col_list}) VALUES (NEW.id, {new_values});"
+    remove = (f"INSERT INTO {fts} ({fts}, rowid, {col_list}) "
+              f"VALUES ('delete', OLD.id, {old_values});")
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{col_list}, content = '{source}', content_rowid = 'id', {FTS_OPTIONS})",
+        f"CREATE TRIGGER IF NOT EXISTS trg_fts_{source}_insert "
+        f"AFTER INSERT ON {source} BEGIN {add} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_fts_{source}_delete "
+        f"AFTER DELETE ON {source} BEGIN {remove} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_fts_{source}_update "
+        f"AFTER UPDATE OF {col_list} ON {source} BEGIN {remove} {add} END",
+    ]
+
+
+def search_schema_sql(sources=None):
+    """Every statement needed to create the FTS tables and their triggers."""
+    statements = []
+    for source in (list(FTS_TABLES) if sources is None else sources):
+        statements += _fts_sql(source)
+    return statements
+
+
+def fts_source(table_name):
+    """Return the FTS_TABLES key for a table name, or None."""
+    for source in FTS_TABLES:
+        if source.lower() == table_name.lower():
+            return source
+    return None
+
+
+def create_fts_triggers(conn, source):
+    for statement in _fts_sql(source)[1:]:
+        conn.execute(statement)
+
+
+def drop_fts_triggers(conn, source):
+    """Drop one source's FTS triggers, e.g. around a bulk load."""
+    for action in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_fts_{source}_{action}")
+
+
+def rebuild_search_index(conn, sources=None):
+    """Re-index the source tables from scratch (backfill or repair). Does not commit."""
+    for source in (list(FTS_TABLES) if sources is None else sources):
+        fts = FTS_TABLES[source]["fts"]
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _query_words(text):
+    return re.findall(r"\w+", text)
+
+
+def to_match_query(text):
+    """
+    Turn free text into a safe FTS5 query: every word must match and the
+    last word (two letters or more) may be a prefix ('vpn fail' -> '"vpn" "fail"*').
+    """
+    words = _query_words(text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) >= 2:
+        # Single-letter prefixes are not in the prefix index (see FTS_OPTIONS).
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _snippet(text, words, width=SNIPPET_WORDS):
+    """
+    Up to `width` words of text around the first hit, hits in **bold**.
+
+    Done in Python for the few rows shown: FTS5's snippet() re-runs the
+    MATCH per row, which is slow for short prefixes. Words are matched on
+    a shared stem-like prefix, close to what the porter tokenizer matched.
+    """
+    stems = [w.lower()[:max(3, len(w) - 3)] for w in words[:-1]] + [words[-1].lower()]
+    tokens = (text or "").split()
+
+    def is_hit(token):
+        token = token.strip("*_.,;:!?()[]\"'").lower()
+        return any(token.startswith(stem) for stem in stems)
+
+    hits = [i for i, token in enumerate(tokens) if is_hit(token)]
+    if not hits:
+        return None
+    start = max(0, min(hits[0] - width // 3, len(tokens) - width))
+    window = tokens[start:start + width]
+    out = " ".join(f"**{t}**" if is_hit(t) else t for t in window)
+    return ("…" if start else "") + out + ("…" if start + width < len(tokens) else "")
+
+
+def search(table, text, limit=SEARCH_LIMIT, filters=None, candidates=SEARCH_CANDIDATES):
+    """
+    Ranked full-text search over one table.
+
+    Returns a DataFrame of the best `limit` matches (bm25 order) with the
+    table's result columns, a `snippet` with the matched words in **bold**,
+    and `rank` (lower is better). filters are as for pagination.filter_sql().
+
+    Only the newest `candidates` matches are ranked, so a query matching
+    most of a million rows still answers in milliseconds. Queries with
+    fewer matches than that are ranked exactly.
+    """
+    spec = FTS_TABLES.get(table)
+    if spec is None:
+        raise ValueError(f"No full-text index for {table}.")
+    result_columns = spec["result"] + ["snippet", "rank"]
+    query = to_match_query(text)
+    if query is None:
+        return pd.DataFrame(columns=result_columns)
+
+    fts, text_columns = spec["fts"], spec["columns"]
+    where, params = filter_sql(table, filters)
+    conditions = " AND ".join([f"{fts} MATCH ?"] + [f"t.{cond}" for cond in where])
+    # The base table is only needed inside the candidate query to filter.
+    candidates_from = f"{fts} JOIN {table} t ON t.id = {fts}.rowid" if where else fts
+    columns = ", ".join(f"t.{col}" for col in spec["result"] + text_columns)
+    sql = (
+        f"SELECT {columns}, m.rank FROM ("
+        f"SELECT {fts}.rowid AS rowid, bm25({fts}) AS rank "
+        f"FROM {candidates_from} "
+        f"WHERE {conditions} ORDER BY {fts}.rowid DESC LIMIT ?"
+        f") m JOIN {table} t ON t.id = m.rowid ORDER BY m.rank LIMIT ?"
+    )
+    with get_connection() as conn:
+        rows = conn.execute(sql, [query] + params + [candidates, limit]).fetchall()
+
+    words = _query_words(text)
+    n = len(spec["result"])
+    results = []
+    for row in rows:
+        texts = row[n:n + len(text_columns)]
+        snippet = next((s for s in (_snippet(t, words) for t in texts) if s), texts[0])
+        results.append(row[:n] + (snippet, row[-1]))
+    return pd.DataFrame(results, columns=result_columns)
+
+
+def question_terms(text):
+    """The distinct non-stopword keywords of a question, at most MAX_TERMS."""
+    words = [w.lower() for w in _query_words(text) if w.lower() not in STOPWORDS]
+    return list(dict.fromkeys(words))[:MAX_TERMS]
+
+
+def search_any(table, text, limit=SEARCH_LIMIT, sample=SAMPLE_PER_TERM):
+    """
+    Rows matching any keyword of a question, best first; same columns as
+    search(), with rank = -score.
+
+    bm25() counts every match of every term to weigh it, which costs tens
+    of ms per common word at a million rows. Here only the newest `sample`
+    matches of each term are read. A term's document frequency is
+    estimated from the rowid span of its sample, and each row scores the
+    BM25 idf of the terms it matched: rows matching more and rarer terms
+    come first, newer rows break ties.
+    """
+    spec = FTS_TABLES.get(table)
+    if spec is None:
+        raise ValueError(f"No full-text index for {table}.")
+    result_columns = spec["result"] + ["snippet", "rank"]
+    terms = question_terms(text)
+    if not terms:
+        return pd.DataFrame(columns=result_columns)
+
+    fts, text_columns = spec["fts"], spec["columns"]
+    scores = {}
+    with get_connection() as conn:
+        # Ids only grow, so the newest id stands in for the row count.
+        newest = conn.execute(f"SELECT max(id) FROM {table}").fetchone()[0] or 0
+        for term in terms:
+            rowids = [r[0] for r in conn.execute(
+                f"SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY rowid DESC LIMIT ?",
+                (f'"{term}"', sample)
+            )]
+            if not rowids:
+                continue
+            df = len(rowids)
+            if df == sample:
+                df = min(newest, sample * newest / (newest - rowids[-1] + 1))
+            idf = math.log(1 + (newest - df + 0.5) / (df + 0.5))
+            for rowid in rowids:
+                scores[rowid] = scores.get(rowid, 0.0) + idf
+        best = sorted(scores, key=lambda rowid: (-scores[rowid], -rowid))[:limit]
+        columns = ", ".join(spec["result"] + text_columns)
+        marks = ", ".join("?" for _ in best)
+        rows = {row[0]: row for row in conn.execute(
+            f"SELECT {columns} FROM {table} WHERE id IN ({marks})", best
+        )} if best else {}
+
+    n = len(spec["result"])
+    results = []
+    for rowid in best:
+        row = rows.get(rowid)
+        if row is None:  # deleted since the index was read
+            continue
+        texts = [t or "" for t in row[n:]]
+        snippet = next((s for s in (_snippet(t, terms) for t in texts) if s), texts[0])
+        results.append(row[:n] + (snippet, -scores[rowid]))
+    return pd.DataFrame(results, columns=result_columns)
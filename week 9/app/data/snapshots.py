@@ -0,0 +1,297 @@
+"""
+Columnar snapshots of the domain tables, for fast cold starts.
+
+Each table is exported to DATA/snapshots/<table>.feather (Arrow IPC,
+uncompressed so it can be memory-mapped) in its compact dtypes (see
+dtypes.py). A JSON sidecar records the table's version (table_versions,
+bumped by triggers on every insert, update and delete) and the change
+log seq the snapshot was taken at.
+
+load_snapshot() never re-exports because of a write: a stale file is
+read as is and brought up to date with the rows the change log says
+were touched since (apply_changes()). Exports happen on a cold start
+(no usable file, or the log no longer covers it) and, once a file is
+REFRESH_AFTER changes behind, on a background thread. pyarrow is in
+requirements.txt; without it the typed DataFrame is pickled instead,
+which still skips SQL parsing and type inference but is read fully into
+memory.
+
+    python -m app.data.snapshots     # benchmark against CSV and SQLite loads
+"""
+import json
+import os
+import threading
+import time
+import pandas as pd
+from app.data import changes
+from app.data.db import DATA_DIR, DB_PATH, get_connection
+from app.data.dtypes import apply_dtypes, megabytes
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # optional; falls back to pickle
+    feather = None
+
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+# Bump when the snapshot layout changes so old files are rebuilt.
+SNAPSHOT_VERSION = 3
+# Changes a snapshot file may fall behind before it is re-exported in the background.
+REFRESH_AFTER = 1000
+
+SNAPSHOT_TABLES = ("cyber_incidents", "IT_tickets", "datasets_metadata")
+
+TABLE_VERSIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS table_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+"""
+
+_lock = threading.Lock()
+# Tables being re-exported in the background.
+_refreshing = set()
+
+
+def _bump_sql(table):
+    return f"UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';"
+
+
+def version_schema_sql():
+    """The table_versions table, its rows and the triggers that bump them."""
+    statements = [TABLE_VERSIONS_SQL]
+    for table in SNAPSHOT_TABLES:
+        statements.append(
+            f"INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('{table}', 0)"
+        )
+        for action in ("INSERT", "UPDATE", "DELETE"):
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS trg_version_{table}_{action.lower()} "
+                f"AFTER {action} ON {table} BEGIN {_bump_sql(table)} END"
+            )
+    return statements
+
+
+def bump_table_version(conn, table):
+    """Mark a table changed after writes that bypassed the triggers (bulk loads)."""
+    if table in SNAPSHOT_TABLES:
+        conn.execute(_bump_sql(table))
+
+
+def table_version(conn, table):
+    row = conn.execute(
+        "SELECT version FROM table_versions WHERE table_name = ?", (table,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def snapshot_format():
+    return "feather" if feather is not None else "pickle"
+
+
+def _paths(table, directory):
+    base = directory / table.lower()
+    return base.with_suffix(f".{snapshot_format()}"), base.with_suffix(".json")
+
+
+def export_snapshot(table, directory=SNAPSHOT_DIR, db_path=DB_PATH):
+    """Write the table's snapshot and sidecar. Returns the typed DataFrame, indexed by id."""
+    # Read before the rows: changes made in between are applied again, harmlessly.
+    seq = changes.latest_seq(db_path)
+    with get_connection(db_path) as conn:
+        # One read transaction, so the version matches the rows read.
+        conn.execute("BEGIN")
+        version = table_version(conn, table)
+        df = pd.read_sql_query(f"SELECT * FROM {table} ORDER BY id", conn)
+    df = apply_dtypes(df, table)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path, meta_path = _paths(table, directory)
+    tmp = path.with_name(path.name + ".tmp")
+    if feather is not None:
+        feather.write_feather(df, tmp, compression="uncompressed")
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, path)
+    # The data file is replaced first, so a reader that sees this sidecar
+    # (they read it before the data) never pairs it with older rows.
+    meta = {"version": SNAPSHOT_VERSION, "format": snapshot_format(), "table_version": version,
+            "seq": seq, "rows": len(df), "written_at": time.time()}
+    meta_tmp = meta_path.with_name(meta_path.name + ".tmp")
+    meta_tmp.write_text(json.dumps(meta))
+    os.replace(meta_tmp, meta_path)
+    df.index = df["id"].values
+    return df
+
+
+def _read(path):
+    if feather is not None:
+        # Numeric columns are used straight from the mapped file.
+        df = feather.read_table(str(path), memory_map=True).to_pandas()
+    else:
+        df = pd.read_pickle(path)
+    df.index = df["id"].values
+    return df
+
+
+def _current_rows(df, table, ids, db_path):
+    """
+    The rows with these ids as they are now, in df's dtypes. Returns
+    (df, rows); df is replaced by a copy when its categoricals need new
+    values, and is never modified.
+    """
+    placeholders = ", ".join("?" for _ in ids)
+    with get_connection(db_path) as conn:
+        rows = pd.read_sql_query(
+            f"SELECT * FROM {table} WHERE id IN ({placeholders}) ORDER BY id", conn, params=ids
+        )
+    rows = apply_dtypes(rows[df.columns], table)
+    widened = df
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            new = set(rows[column].dropna()) - set(dtype.categories)
+            if new:
+                if widened is df:
+                    widened = df.copy(deep=False)
+                # Assigning a column replaces it in the copy only.
+                widened[column] = df[column].cat.add_categories(sorted(new))
+    rows = rows.astype(widened.dtypes.to_dict())
+    rows.index = rows["id"].values
+    return widened, rows
+
+
+def apply_changes(df, table, pending, db_path=DB_PATH):
+    """
+    Return df (indexed by id) with pending, from changes.changes_since(),
+    applied. Every id the changes touch gets its current row from the
+    database, or is dropped if the row is gone, so whatever the order of
+    inserts, updates and deletes on an id, the latest one wins. The result
+    is a new frame: df and anything already handed out stay as they were.
+    Only the columns whose values changed are copied for updates; inserts
+    and deletes cost one pass over the frame per call.
+    """
+    ids = sorted({change["pk"] for change in pending if change["pk"] is not None})
+    if not ids:
+        return df
+    patched, rows = _current_rows(df, table, ids, db_path)
+    # get_indexer uses the index's cached hash table, so lookups cost O(len(ids)).
+    positions = patched.index.get_indexer(rows.index)
+    present = positions >= 0
+    updated = rows[present]
+    if len(updated):
+        if patched is df:
+            patched = df.copy(deep=False)
+        where = positions[present]
+        for column in patched.columns:
+            old = patched[column].iloc[where]
+            if old.reset_index(drop=True).equals(updated[column].reset_index(drop=True)):
+                continue
+            values = patched[column].copy()
+            values.iloc[where] = updated[column].values
+            patched[column] = values
+    found = set(rows.index)
+    gone = patched.index.get_indexer([pk for pk in ids if pk not in found])
+    gone = gone[gone >= 0]
+    if len(gone):
+        patched = patched.drop(index=patched.index[gone])
+    added = rows[~present]
+    if len(added):
+        in_order = not len(patched) or added.index.min() > patched.index.max()
+        patched = pd.concat([patched, added])
+        if not in_order:
+            patched = patched.sort_index()
+    return patched
+
+
+def _refresh(table, directory, db_path):
+    try:
+        export_snapshot(table, directory, db_path)
+    finally:
+        with _lock:
+            _refreshing.discard(table)
+
+
+def _refresh_in_background(table, directory, db_path):
+    """Re-export a table on a daemon thread, unless that is already under way."""
+    with _lock:
+        if table in _refreshing:
+            return
+        _refreshing.add(table)
+    threading.Thread(target=_refresh, args=(table, directory, db_path),
+                     name=f"snapshot-{table}", daemon=True).start()
+
+
+def _load_from_file(table, directory, db_path):
+    """The last export brought up to date, or None when it cannot be."""
+    path, meta_path = _paths(table, directory)
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta["version"] != SNAPSHOT_VERSION or meta["format"] != snapshot_format():
+            return None
+        df = _read(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    with get_connection(db_path) as conn:
+        if table_version(conn, table) == meta["table_version"]:
+            return df
+    pending, _ = changes.changes_since(meta["seq"], [table], db_path=db_path)
+    if pending is None or any(change["op"] == "reload" for change in pending):
+        return None
+    if len(pending) >= REFRESH_AFTER:
+        _refresh_in_background(table, directory, db_path)
+    return apply_changes(df, table, pending, db_path)
+
+
+def load_snapshot(table, directory=SNAPSHOT_DIR, db_path=DB_PATH):
+    """
+    The whole table as a typed DataFrame indexed (and ordered) by id: the
+    last export, plus the changes made since. Only exports first when
+    there is no usable file or the change log cannot bring it up to date.
+    """
+    df = _load_from_file(table, directory, db_path)
+    if df is not None:
+        return df
+    # Cold start: one export at a time, and sessions that waited use it.
+    with _lock:
+        df = _load_from_file(table, directory, db_path)
+        return df if df is not None else export_snapshot(table, directory, db_path)
+
+
+def export_all(directory=SNAPSHOT_DIR, db_path=DB_PATH):
+    """Snapshot every table in SNAPSHOT_TABLES; returns {table: rows}."""
+    return {table: len(export_snapshot(table, directory, db_path)) for table in SNAPSHOT_TABLES}
+
+
+def _timed(load):
+    start = time.perf_counter()
+    df = load()
+    return df, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    from app.data.db import connect_database
+    from app.data.schema import create_all_tables
+    # An unmigrated database has no table_versions or change_log yet.
+    conn = connect_database()
+    try:
+        create_all_tables(conn)
+    finally:
+        conn.close()
+    csv_files = {"cyber_incidents": "cyber_incidents.csv", "IT_tickets": "it_tickets.csv",
+                 "datasets_metadata": "datasets_metadata.csv"}
+    print(f"Snapshot format: {snapshot_format()}")
+    export_all()
+    for table, csv_name in csv_files.items():
+        print(f"\n{table}")
+        csv_path = DATA_DIR / csv_name
+        if csv_path.exists():
+            df, ms = _timed(lambda: pd.read_csv(csv_path))
+            print(f"  read_csv        {ms:8.1f} ms  {megabytes(df):7.2f} MB  ({len(df)} rows in CSV)")
+
+        def from_sqlite():
+            with get_connection() as conn:
+                return pd.read_sql_query(f"SELECT * FROM {table} ORDER BY id", conn)
+        df, ms = _timed(from_sqlite)
+        print(f"  read_sql_query  {ms:8.1f} ms  {megabytes(df):7.2f} MB  ({len(df)} rows)")
+        df, ms = _timed(lambda: load_snapshot(table))
+        print(f"  load_snapshot   {ms:8.1f} ms  {megabytes(df):7.2f} MB")
@@ -0,0 +1,228 @@
+import pandas as pd
+from app.data.db import get_connection
+
+# Dimensions kept in summary_counts, per source table:
+#   dimension name -> (columns that trigger an update, SQL expression)
+SUMMARY_DIMENSIONS = {
+    "cyber_incidents": {
+        "day": ("date", "substr({row}.date, 1, 10)"),
+        "status": ("status", "{row}.status"),
+        "severity": ("severity", "{row}.severity"),
+        "incident_type": ("incident_type", "{row}.incident_type"),
+        # "2025-11 Phishing": monthly trend per type for the assistant.
+        "month_type": ("date, incident_type", "substr({row}.date, 1, 7) || ' ' || {row}.incident_type"),
+    },
+    "IT_tickets": {
+        "day": ("created_date", "substr({row}.created_date, 1, 10)"),
+        "status": ("status", "{row}.status"),
+        "priority": ("priority", "{row}.priority"),
+        "category": ("category", "{row}.category"),
+        "month_category": ("created_date, category",
+                           "substr({row}.created_date, 1, 7) || ' ' || {row}.category"),
+    },
+    "datasets_metadata": {
+        "category": ("category", "{row}.category"),
+    },
+}
+
+# Numeric columns summed into summary_totals.
+SUMMARY_MEASURES = {
+    "datasets_metadata": ["record_count", "file_size_mb"],
+}
+
+
+def _expr(template, row):
+    return f"coalesce({template.format(row=row)}, '')"
+
+
+def _bump(source, dimension, template, row, delta):
+    """SQL that adds delta to one summary_counts bucket."""
+    value = _expr(template, row)
+    if delta > 0:
+        return (
+            f"INSERT INTO summary_counts (source, dimension, value, count) "
+            f"VALUES ('{source}', '{dimension}', {value}, {delta}) "
+            f"ON CONFLICT (source, dimension, value) DO UPDATE SET count = count + {delta};"
+        )
+    return (
+        f"UPDATE summary_counts SET count = count - {-delta} "
+        f"WHERE source = '{source}' AND dimension = '{dimension}' AND value = {value};"
+    )
+
+
+def _add_total(source, measure, amount_sql):
+    return (
+        f"INSERT INTO summary_totals (source, measure, total) "
+        f"VALUES ('{source}', '{measure}', {amount_sql}) "
+        f"ON CONFLICT (source, measure) DO UPDATE SET total = total + ({amount_sql});"
+    )
+
+
+def _trigger_sql(source):
+    """CREATE TRIGGER statements that keep one source's summaries current."""
+    dimensions = dict(SUMMARY_DIMENSIONS[source])
+    dimensions["all"] = (None, "''")
+    measures = SUMMARY_MEASURES.get(source, [])
+    statements = []
+
+    on_insert = [_bump(source, d, t, "NEW", 1) for d, (_, t) in dimensions.items()]
+    on_insert += [_add_total(source, m, f"coalesce(NEW.{m}, 0)") for m in measures]
+    statements.append(
+        f"CREATE TRIGGER IF NOT EXISTS trg_summary_{source}_insert "
+        f"AFTER INSERT ON {source} BEGIN {' '.join(on_insert)} END"
+    )
+
+    on_delete = [_bump(source, d, t, "OLD", -1) for d, (_, t) in dimensions.items()]
+    on_delete += [_add_total(source, m, f"-coalesce(OLD.{m}, 0)") for m in measures]
+    statements.append(
+        f"CREATE TRIGGER IF NOT EXISTS trg_summary_{source}_delete "
+        f"AFTER DELETE ON {source} BEGIN {' '.join(on_delete)} END"
+    )
+
+    # One update trigger per dimension so untouched columns cost nothing.
+    for dimension, (column, template) in dimensions.items():
+        if column is None:
+            continue
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_summary_{source}_{dimension}_update "
+            f"AFTER UPDATE OF {column} ON {source} "
+            f"WHEN {_expr(template, 'OLD')} IS NOT {_expr(template, 'NEW')} BEGIN "
+            f"{_bump(source, dimension, template, 'OLD', -1)} "
+            f"{_bump(source, dimension, template, 'NEW', 1)} END"
+        )
+    for measure in measures:
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_summary_{source}_{measure}_update "
+            f"AFTER UPDATE OF {measure} ON {source} BEGIN "
+            f"{_add_total(source, measure, f'coalesce(NEW.{measure}, 0) - coalesce(OLD.{measure}, 0)')} END"
+        )
+    return statements
+
+
+SUMMARY_TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS summary_counts (
+        source TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (source, dimension, value)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS summary_totals (
+        source TEXT NOT NULL,
+        measure TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (source, measure)
+    ) WITHOUT ROWID
+    """,
+]
+
+
+def summary_schema_sql():
+    """Every statement needed to create the summary tables and triggers."""
+    statements = list(SUMMARY_TABLES_SQL)
+    for source in SUMMARY_DIMENSIONS:
+        statements += _trigger_sql(source)
+    return statements
+
+
+def create_summary_tables(conn):
+    """Create the summary tables and the triggers that maintain them."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'summary_counts'"
+    )
+    is_new = cursor.fetchone() is None
+
+    for statement in summary_schema_sql():
+        cursor.execute(statement)
+    if is_new:
+        rebuild_summaries(conn)
+    conn.commit()
+    print("Summary tables created successfully!")
+
+
+def summary_source(table_name):
+    """Return the SUMMARY_DIMENSIONS key for a table name, or None."""
+    for source in SUMMARY_DIMENSIONS:
+        if source.lower() == table_name.lower():
+            return source
+    return None
+
+
+def create_summary_triggers(conn, source):
+    for statement in _trigger_sql(source):
+        conn.execute(statement)
+
+
+def drop_summary_triggers(conn, source):
+    """Drop one source's summary triggers, e.g. around a bulk load."""
+    names = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?",
+        (f"trg_summary_{source}_%",)
+    ).fetchall()
+    for (name,) in names:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_summaries(conn, sources=None):
+    """Recompute summaries from the base tables (backfill or repair). Does not commit."""
+    cursor = conn.cursor()
+    sources = list(SUMMARY_DIMENSIONS) if sources is None else sources
+    for source in sources:
+        cursor.execute("DELETE FROM summary_counts WHERE source = ?", (source,))
+        cursor.execute("DELETE FROM summary_totals WHERE source = ?", (source,))
+    for source in sources:
+        dimensions = SUMMARY_DIMENSIONS[source]
+        for dimension, (_, template) in list(dimensions.items()) + [("all", (None, "''"))]:
+            value = _expr(template, source)
+            cursor.execute(f"""
+                INSERT INTO summary_counts (source, dimension, value, count)
+                SELECT '{source}', '{dimension}', {value}, COUNT(*)
+                FROM {source}
+                GROUP BY {value}
+            """)
+        for measure in SUMMARY_MEASURES.get(source, []):
+            cursor.execute(f"""
+                INSERT INTO summary_totals (source, measure, total)
+                SELECT '{source}', '{measure}', coalesce(SUM({measure}), 0)
+                FROM {source}
+            """)
+
+
+def get_counts(source, dimension):
+    """Return a Series of row counts per value of one dimension."""
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT value, count FROM summary_counts
+            WHERE source = ? AND dimension = ? AND count > 0 AND value != ''
+            ORDER BY value
+        """, (source, dimension)).fetchall()
+    return pd.Series(
+        [count for _, count in rows],
+        index=[value for value, _ in rows],
+        name="count",
+        dtype="int64",
+    )
+
+
+def get_row_count(source):
+    """Return the number of rows in a source table."""
+    with get_connection() as conn:
+        row = conn.execute("""
+            SELECT count FROM summary_counts
+            WHERE source = ? AND dimension = 'all' AND value = ''
+        """, (source,)).fetchone()
+    return row[0] if row else 0
+
+
+def get_total(source, measure):
+    """Return the running sum of a numeric column."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT total FROM summary_totals WHERE source = ? AND measure = ?",
+            (source, measure)
+        ).fetchone()
+    return row[0] if row else 0
@@ -1,48 +1,133 @@
+import csv
 import pandas as pd
-import os
+from app.data.db import get_connection, DB_PATH, DATA_DIR
+from app.data.cache import invalidate
+from app.data.dtypes import apply_dtypes
+from app.data.schema import IT_TICKETS_TABLE_SQL, create_it_tickets_indexes
 
-CSV_PATH = "CW2_CST1510_M01039503/week9/DATA/it_tickets.csv"
+CSV_PATH = DATA_DIR / "it_tickets.csv"
 
-def load_tickets():
-    if os.path.exists(CSV_PATH):
-        return pd.read_csv(CSV_PATH)
-    else:
-        os.makedirs(os.path.dirname(CSV_PATH), exist_ok=True)
-        cols = ["id", "ticket_id", "priority", "status", "category", "subject", "description", "created_at", "resolved_at", "assigned_to"]
-        pd.DataFrame(columns=cols).to_csv(CSV_PATH, index=False)
-        return pd.DataFrame(columns=cols)
+TICKET_COLUMNS = [
+    "ticket_id", "priority", "status", "category", "subject",
+    "description", "created_date", "resolved_date", "assigned_to",
+]
 
-def save_tickets(df):
-    os.makedirs(os.path.dirname(CSV_PATH), exist_ok=True)
-    df.to_csv(CSV_PATH, index=False)
+
+class TicketRepository:
+    """
+    IT tickets stored in the IT_tickets table.
+
+    Every write touches a single row inside its own transaction, so
+    concurrent sessions no longer overwrite each other's edits.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._schema_ready = False
+
+    def ensure_schema(self):
+        """Create the IT_tickets table and its indexes if they are missing (quietly)."""
+        with get_connection(self.db_path) as conn:
+            conn.execute(IT_TICKETS_TABLE_SQL)
+            create_it_tickets_indexes(conn)
+        self._schema_ready = True
+
+    def _connect(self):
+        if not self._schema_ready:
+            self.ensure_schema()
+        return get_connection(self.db_path)
+
+    def get_all_tickets(self):
+        with self._connect() as conn:
+            df = pd.read_sql_query("SELECT * FROM IT_tickets ORDER BY id", conn)
+        return apply_dtypes(df, "IT_tickets")
+
+    def get_ticket(self, pk_id):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM IT_tickets WHERE id = ?", (pk_id,))
+            return cursor.fetchone()
+
+    def insert_ticket(self, ticket_id, priority, status, category, subject,
+                      description, created_date, resolved_date=None, assigned_to=None):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO IT_tickets
+                (ticket_id, priority, status, category, subject, description,
+                 created_date, resolved_date, assigned_to)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (ticket_id, priority, status, category, subject, description,
+                  created_date, resolved_date, assigned_to))
+            ticket_pk = cursor.lastrowid
+        invalidate("IT_tickets")
+        return ticket_pk
+
+    def update_ticket_status(self, pk_id, new_status):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE IT_tickets SET status = ? WHERE id = ?",
+                (new_status, pk_id)
+            )
+            rows_affected = cursor.rowcount
+        invalidate("IT_tickets")
+        return rows_affected
+
+    def delete_ticket(self, pk_id):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM IT_tickets WHERE id = ?", (pk_id,))
+            rows_affected = cursor.rowcount
+        invalidate("IT_tickets")
+        return rows_affected
+
+    def import_from_csv(self, csv_path=CSV_PATH):
+        """
+        One-shot import of the legacy it_tickets.csv.
+
+        CSV ids are kept. Rows whose id or ticket_id already exists are
+        skipped, so the import can be re-run safely. Returns the number
+        of rows inserted.
+        """
+        columns = ["id"] + TICKET_COLUMNS
+        with open(csv_path, newline="") as f:
+            rows = [
+                tuple(row.get(col) or None for col in columns)
+                for row in csv.DictReader(f)
+            ]
+
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(f"""
+                INSERT OR IGNORE INTO IT_tickets ({", ".join(columns)})
+                VALUES ({", ".join("?" for _ in columns)})
+            """, rows)
+            imported = conn.total_changes - before
+        invalidate("IT_tickets")
+        return imported
+
+
+_repository = TicketRepository()
 
 def get_all_tickets():
-    return load_tickets().sort_values(by="id")
-
-def insert_ticket(ticket_id, priority, status, category, subject, description, created_at, resolved_at, assigned_to):
-    df = load_tickets()
-    new_id = df["id"].max() + 1 if not df.empty else 1
-    new_row = {
-        "id": new_id,
-        "ticket_id": ticket_id,
-        "priority": priority,
-        "status": status,
-        "category": category,
-        "subject": subject,
-        "description": description,
-        "created_at": created_at,
-        "resolved_at": resolved_at,
-        "assigned_to": assigned_to,
-    }
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    save_tickets(df)
+    return _repository.get_all_tickets()
+
+def insert_ticket(ticket_id, priority, status, category, subject, description,
+                  created_date, resolved_date=None, assigned_to=None):
+    return _repository.insert_ticket(ticket_id, priority, status, category, subject,
+                                     description, created_date, resolved_date, assigned_to)
 
 def update_ticket_status(pk_id, new_status):
-    df = load_tickets()
-    df.loc[df["id"] == pk_id, "status"] = new_status
-    save_tickets(df)
+    return _repository.update_ticket_status(pk_id, new_status)
 
 def delete_ticket(pk_id):
-    df = load_tickets()
-    df = df[df["id"] != pk_id]
-    save_tickets(df)
+    return _repository.delete_ticket(pk_id)
+
+def import_tickets_from_csv(csv_path=CSV_PATH):
+    return _repository.import_from_csv(csv_path)
+
+
+if __name__ == "__main__":
+    imported = import_tickets_from_csv()
+    print(f" Imported {imported} tickets from {CSV_PATH.name}")
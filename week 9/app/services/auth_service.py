@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+# bcrypt releases the GIL, so a small thread pool hashes in parallel
+# while Streamlit's script threads only wait on a future.
+MAX_WORKERS = 4
+# Requests allowed to wait for a worker before new ones are turned away.
+MAX_QUEUED = 32
+# Seconds a request may wait for a queue slot before giving up.
+QUEUE_TIMEOUT = 10
+# Cost factor for new hashes; on a successful login, hashes with a
+# different cost are transparently re-hashed when REHASH_ON_LOGIN is on.
+BCRYPT_ROUNDS = 12
+REHASH_ON_LOGIN = False
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="bcrypt")
+_slots = threading.BoundedSemaphore(MAX_WORKERS + MAX_QUEUED)
+_metrics_lock = threading.Lock()
+_metrics = {
+    "submitted": 0,
+    "completed": 0,
+    "rejected": 0,
+    "in_flight": 0,
+    "running": 0,
+    "wait_seconds": 0.0,
+    "run_seconds": 0.0,
+}
+
+
+def configure(max_workers=None, max_queued=None, bcrypt_rounds=None, rehash_on_login=None):
+    """Resize the pool or change the hashing policy (call before serving logins)."""
+    global _executor, _slots, MAX_WORKERS, MAX_QUEUED, BCRYPT_ROUNDS, REHASH_ON_LOGIN
+    if max_workers is not None or max_queued is not None:
+        MAX_WORKERS = max_workers or MAX_WORKERS
+        MAX_QUEUED = MAX_QUEUED if max_queued is None else max_queued
+        old = _executor
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="bcrypt")
+        _slots = threading.BoundedSemaphore(MAX_WORKERS + MAX_QUEUED)
+        old.shutdown(wait=False)
+    if bcrypt_rounds is not None:
+        BCRYPT_ROUNDS = bcrypt_rounds
+    if rehash_on_login is not None:
+        REHASH_ON_LOGIN = rehash_on_login
+
+
+def _bump(**changes):
+    with _metrics_lock:
+        for key, delta in changes.items():
+            _metrics[key] += delta
+
+
+def _submit(fn, *args, timeout=None):
+    """Queue fn on the bcrypt pool; raises TimeoutError when the queue stays full."""
+    slots = _slots
+    if not slots.acquire(timeout=QUEUE_TIMEOUT if timeout is None else timeout):
+        _bump(rejected=1)
+        raise TimeoutError("Authentication service is busy, please try again.")
+
+    queued_at = time.perf_counter()
+    _bump(submitted=1, in_flight=1)
+
+    def run():
+        started = time.perf_counter()
+        _bump(running=1, wait_seconds=started - queued_at)
+        try:
+            return fn(*args)
+        finally:
+            _bump(running=-1, in_flight=-1, completed=1,
+                  run_seconds=time.perf_counter() - started)
+            slots.release()
+
+    return _executor.submit(run)
+
+
+def get_rounds(password_hash):
+    """Cost factor of a bcrypt hash ('$2b$12$...' -> 12), or None if unparsable."""
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(password, password_hash):
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    except ValueError:
+        return False
+
+
+def hash_password(password, rounds=None):
+    """Hash a password on the bcrypt pool and wait for the result."""
+    return _submit(_hash, password, rounds or BCRYPT_ROUNDS).result()
+
+
+def check_password(password, password_hash):
+    """Verify a password on the bcrypt pool and wait for the result."""
+    return _submit(_check, password, password_hash).result()
+
+
+def needs_rehash(password_hash):
+    return REHASH_ON_LOGIN and get_rounds(password_hash) != BCRYPT_ROUNDS
+
+
+def rehash_in_background(password, on_done):
+    """
+    Hash password at BCRYPT_ROUNDS without blocking the caller.
+
+    on_done(new_hash) runs on the pool thread. If the pool is saturated
+    the rehash is simply skipped and retried at the next login.
+    """
+    try:
+        future = _submit(_hash, password, BCRYPT_ROUNDS, timeout=0)
+    except TimeoutError:
+        return None
+
+    def finished(f):
+        if f.exception() is None:
+            on_done(f.result())
+
+    future.add_done_callback(finished)
+    return future
+
+
+def pool_metrics():
+    """Counters and averages for the bcrypt pool (queue depth, wait and run times)."""
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics["queued"] = metrics["in_flight"] - metrics["running"]
+    metrics["max_workers"] = MAX_WORKERS
+    metrics["max_queued"] = MAX_QUEUED
+    done = metrics["completed"]
+    metrics["avg_wait_ms"] = metrics["wait_seconds"] / done * 1000 if done else 0.0
+    metrics["avg_run_ms"] = metrics["run_seconds"] / done * 1000 if done else 0.0
+    return metrics
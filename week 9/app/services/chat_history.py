@@ -0,0 +1,166 @@
+"""
+Keeps assistant requests under a token budget.
+
+The full conversation stays in the page's session state for display. What
+is sent to the model is the system prompt, then a rolling summary of older
+turns, then the last KEEP_TURNS turns verbatim. Each turn is a user
+message plus the replies that follow it.
+"""
+import json
+import logging
+import re
+
+try:
+    import tiktoken
+except ImportError:  # optional; falls back to a character-based estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BUDGET = 3000
+KEEP_TURNS = 4
+SUMMARY_MAX_TOKENS = 600
+# Words kept from each folded message by the local summarizer.
+SUMMARY_WORDS = 40
+# Per-message overhead of the chat format (role, separators).
+MESSAGE_OVERHEAD = 4
+# Messages kept in session state; older ones live on in the summary.
+MAX_KEPT_MESSAGES = 60
+
+_encoding = None
+
+
+def estimate_tokens(text):
+    """Token count of text; exact with tiktoken installed, else about 4 chars per token."""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        return len(_encoding.encode(text or ""))
+    return (len(text or "") + 3) // 4
+
+
+def count_tokens(messages):
+    return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+
+
+def _clip_to_tokens(text, max_tokens):
+    """Keep the newest lines of text that fit in max_tokens."""
+    lines = text.splitlines()
+    while lines and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def local_summarizer(summary, messages):
+    """
+    Fold messages into the running summary without a model call: one line
+    per message holding its first SUMMARY_WORDS words. The oldest lines
+    drop off once the summary passes SUMMARY_MAX_TOKENS.
+    """
+    lines = [summary] if summary else []
+    for m in messages:
+        words = re.sub(r"\s+", " ", m["content"] or "").strip().split(" ")
+        text = " ".join(words[:SUMMARY_WORDS]) + (" …" if len(words) > SUMMARY_WORDS else "")
+        lines.append(f"- {m['role']}: {text}")
+    return _clip_to_tokens("\n".join(lines), SUMMARY_MAX_TOKENS)
+
+
+def model_summarizer(client, model="gpt-4o-mini"):
+    """A summarizer that asks the model to merge messages into the summary."""
+    def summarize(summary, messages):
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        reply = client.chat.completions.create(model=model, messages=[
+            {"role": "system", "content":
+                "Update the running summary of a support conversation. Keep facts, "
+                f"names, IDs and open questions. At most {SUMMARY_MAX_TOKENS} tokens."},
+            {"role": "user", "content": f"Summary so far:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"},
+        ])
+        return _clip_to_tokens(reply.choices[0].message.content, SUMMARY_MAX_TOKENS)
+    return summarize
+
+
+def _turn_starts(body):
+    return [i for i, m in enumerate(body) if m["role"] == "user"]
+
+
+def prepare_messages(messages, state, budget=TOKEN_BUDGET, keep_turns=KEEP_TURNS,
+                     summarizer=local_summarizer):
+    """
+    Return (request_messages, report) for one assistant request.
+
+    state is a dict kept between requests (e.g. in st.session_state); it
+    holds the rolling summary and how many messages it already covers, so
+    each message is summarized once. If the request is still over budget,
+    fewer turns are kept verbatim (never less than the last one) and then
+    the summary is clipped. report holds the tokens and bytes sent and
+    saved.
+    """
+    system = [m for m in messages[:1] if m["role"] == "system"]
+    body = messages[len(system):]
+    if state.get("folded", 0) > len(body) or state.get("system") != system:
+        # The chat was cleared or the system prompt changed: start over.
+        state.clear()
+        state["system"] = system
+
+    def build(keep):
+        starts = _turn_starts(body)
+        cut = starts[-keep] if len(starts) >= keep else 0
+        cut = max(cut, state.get("folded", 0))
+        if cut > state.get("folded", 0):
+            state["summary"] = summarizer(state.get("summary", ""), body[state.get("folded", 0):cut])
+            state["folded"] = cut
+        summary = state.get("summary")
+        note = [{"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}] if summary else []
+        return system + note + body[cut:]
+
+    keep = keep_turns
+    request = build(keep)
+    while count_tokens(request) > budget and keep > 1:
+        keep -= 1
+        request = build(keep)
+    if count_tokens(request) > budget and state.get("summary"):
+        note = request[len(system)]
+        room = budget - (count_tokens(request) - count_tokens([note]))
+        state["summary"] = _clip_to_tokens(state["summary"], max(room, 0))
+        request = build(keep)
+
+    full_tokens, sent_tokens = count_tokens(messages), count_tokens(request)
+    full_bytes = len(json.dumps(messages).encode("utf-8"))
+    sent_bytes = len(json.dumps(request).encode("utf-8"))
+    report = {
+        "messages": len(messages),
+        "sent_messages": len(request),
+        "tokens": sent_tokens,
+        "tokens_saved": full_tokens - sent_tokens,
+        "bytes": sent_bytes,
+        "bytes_saved": full_bytes - sent_bytes,
+    }
+    state["last_report"] = report
+    logger.info("chat request: %d/%d messages, %d tokens (%d saved), %d bytes (%d saved)",
+                report["sent_messages"], report["messages"], sent_tokens,
+                report["tokens_saved"], sent_bytes, report["bytes_saved"])
+    return request, report
+
+
+def compact_history(messages, state, max_messages=MAX_KEPT_MESSAGES, summarizer=local_summarizer):
+    """
+    Drop the oldest messages (in place) once there are more than
+    max_messages after the system prompt, folding any not yet summarized
+    into state's summary first. Returns the number dropped.
+    """
+    system = [m for m in messages[:1] if m["role"] == "system"]
+    body = messages[len(system):]
+    drop = len(body) - max_messages
+    if drop <= 0:
+        return 0
+    if state.get("system") != system:
+        state.clear()
+        state["system"] = system
+    folded = state.get("folded", 0)
+    if drop > folded:
+        state["summary"] = summarizer(state.get("summary", ""), body[folded:drop])
+        folded = drop
+    state["folded"] = folded - drop
+    del messages[len(system):len(system) + drop]
+    return drop
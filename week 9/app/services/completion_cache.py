@@ -0,0 +1,180 @@
+"""
+Local cache for assistant completions.
+
+Replies are stored in their own SQLite file, keyed on a hash of the
+model, request parameters and the normalized message history (system
+prompt included). Entries expire after CACHE_TTL seconds, and the least
+recently used ones are evicted once the cache grows past CACHE_MAX_BYTES.
+A hit is replayed as a stream, so callers render it like a live reply.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from app.data.db import DATA_DIR, get_connection
+
+CACHE_PATH = DATA_DIR / "completion_cache.db"
+CACHE_TTL = 7 * 24 * 3600
+CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_ready = set()
+
+
+def _bump(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _connection(path):
+    """Pooled connection to the cache file; creates the table on first use."""
+    if path not in _ready:
+        with get_connection(path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    reply TEXT NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions(last_used)"
+            )
+        _ready.add(path)
+    return get_connection(path)
+
+
+def _normalize(text):
+    """Case and whitespace differences do not change the answer."""
+    return re.sub(r"\s+", " ", text or "").strip().casefold()
+
+
+def cache_key(model, messages, **params):
+    """Stable hash of model, parameters and the normalized conversation."""
+    payload = {
+        "model": model,
+        "params": params,
+        "messages": [[m["role"], _normalize(m["content"])] for m in messages],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def get_reply(key, path=CACHE_PATH, ttl=CACHE_TTL):
+    """Cached reply for key, or None if missing or older than ttl."""
+    now = time.time()
+    with _connection(path) as conn:
+        row = conn.execute(
+            "SELECT reply, created_at FROM completions WHERE key = ?", (key,)
+        ).fetchone()
+        if row and now - row[1] <= ttl:
+            conn.execute(
+                "UPDATE completions SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (now, key)
+            )
+            _bump("hits")
+            return row[0]
+        if row:
+            conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+    _bump("misses")
+    return None
+
+
+def put_reply(key, model, reply, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+    """Store a reply, then evict least recently used entries over max_bytes."""
+    now = time.time()
+    size = len(reply.encode("utf-8"))
+    with _connection(path) as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO completions (key, model, reply, bytes, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (key, model, reply, size, now, now))
+        total = conn.execute("SELECT coalesce(SUM(bytes), 0) FROM completions").fetchone()[0]
+        evicted = 0
+        if total > max_bytes:
+            for old_key, old_bytes in conn.execute(
+                "SELECT key, bytes FROM completions ORDER BY last_used"
+            ).fetchall():
+                if total <= max_bytes:
+                    break
+                conn.execute("DELETE FROM completions WHERE key = ?", (old_key,))
+                total -= old_bytes
+                evicted += 1
+    _bump("stores")
+    _bump("evictions", evicted)
+
+
+def chunk_text(chunk):
+    """The text of one streamed completion chunk (plain strings pass through), or ''."""
+    if isinstance(chunk, str):  # the gateway streams plain text
+        return chunk
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return ""
+    return getattr(getattr(choices[0], "delta", None), "content", None) or ""
+
+
+def iter_content(completion):
+    """Yield the text pieces of a streamed chat completion (or of plain strings)."""
+    for chunk in completion:
+        content = chunk_text(chunk)
+        if content:
+            yield content
+
+
+def replay(reply):
+    """Yield a cached reply word by word, like a streamed completion."""
+    for piece in re.findall(r"\S+\s*|\s+", reply):
+        yield piece
+
+
+def cached_completion(client, model, messages, path=CACHE_PATH, ttl=CACHE_TTL, **params):
+    """
+    Stream a chat completion as text pieces, from the cache when possible.
+
+    On a miss the request goes to client.chat.completions.create(...,
+    stream=True), which may stream chunks or plain text. The reply is
+    stored only after the stream finishes, so an interrupted reply is
+    never cached.
+    """
+    key = cache_key(model, messages, **params)
+    reply = get_reply(key, path, ttl)
+    if reply is not None:
+        yield from replay(reply)
+        return
+
+    completion = client.chat.completions.create(
+        model=model, messages=messages, stream=True, **params
+    )
+    parts = []
+    for content in iter_content(completion):
+        parts.append(content)
+        yield content
+    if parts:
+        put_reply(key, model, "".join(parts), path)
+
+
+def cache_stats(path=CACHE_PATH):
+    """Process-wide hit/miss counters plus the size of the cache file's contents."""
+    with _stats_lock:
+        stats = dict(_stats)
+    with _connection(path) as conn:
+        entries, size = conn.execute(
+            "SELECT COUNT(*), coalesce(SUM(bytes), 0) FROM completions"
+        ).fetchone()
+    lookups = stats["hits"] + stats["misses"]
+    stats.update(entries=entries, bytes=size,
+                 hit_rate=stats["hits"] / lookups if lookups else 0.0)
+    return stats
+
+
+def clear_cache(path=CACHE_PATH):
+    with _connection(path) as conn:
+        conn.execute("DELETE FROM completions")
+
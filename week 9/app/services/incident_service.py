@@ -0,0 +1,110 @@
+import threading
+from app.data import changes, cyber_incidents, snapshots
+from app.data.cache import table_token, record_access
+
+# One snapshot per process, shared by every dashboard session. It is
+# indexed by incident id and kept current from the change log
+# (app/data/changes.py): writes from any session or process produce a
+# patched copy that replaces it, instead of a full reload. A frame is
+# never modified once handed out.
+_lock = threading.Lock()
+_snapshot = None
+_token = None
+_version = 0
+_seq = 0
+
+
+def _load_snapshot():
+    """Full load (caller holds _lock); the change log is followed from here."""
+    global _seq
+    # Read the seq first: changes made during the load are applied again, harmlessly.
+    _seq = changes.latest_seq()
+    # Typed columnar snapshot on disk (indexed by id), plus the changes since it was written.
+    return snapshots.load_snapshot("cyber_incidents")
+
+
+def _apply_changes():
+    """
+    Bring the snapshot up to date from the change log (caller holds _lock).
+    Returns True if anything changed.
+    """
+    global _snapshot, _seq
+    pending, latest = changes.changes_since(_seq, ["cyber_incidents"])
+    if pending is None or any(change["op"] == "reload" for change in pending):
+        _snapshot = _load_snapshot()
+        return True
+    _seq = latest
+    if not pending:
+        return False
+    # Copy-on-write: sessions still reading the old frame are unaffected.
+    _snapshot = snapshots.apply_changes(_snapshot, "cyber_incidents", pending)
+    return True
+
+
+def _catch_up():
+    """Apply pending changes after a write (caller holds _lock)."""
+    global _token, _version
+    if _snapshot is not None and _apply_changes():
+        _version += 1
+    _token = table_token("cyber_incidents")
+
+
+def get_incidents(page=None):
+    """
+    Return (snapshot, version) for the cyber_incidents table.
+
+    The snapshot is shared between sessions and must be treated as
+    read-only. It is never modified after being returned: changes replace
+    it with a new frame and a higher version. Writes made outside this
+    service are applied from the change log.
+    """
+    global _snapshot, _token, _version
+    token = table_token("cyber_incidents")
+    with _lock:
+        hit = _snapshot is not None and token == _token
+        if _snapshot is None:
+            _snapshot = _load_snapshot()
+            _version += 1
+        elif not hit and _apply_changes():
+            _version += 1
+        _token = token
+        record_access(page or "cyber_incidents", hit)
+        return _snapshot, _version
+
+
+def reload_incidents():
+    """Drop the snapshot and rebuild it from the database."""
+    global _snapshot, _token, _version
+    with _lock:
+        _snapshot = _load_snapshot()
+        _token = table_token("cyber_incidents")
+        _version += 1
+        return _snapshot, _version
+
+
+def insert_incident(date, incident_type, severity, status, description, reported_by=None):
+    """Insert an incident and append it to the snapshot."""
+    incident_id = cyber_incidents.insert_incident(
+        date, incident_type, severity, status, description, reported_by
+    )
+    with _lock:
+        _catch_up()
+    return incident_id
+
+
+def update_incident_status(incident_id, new_status):
+    """Update one incident's status and bring the snapshot up to date."""
+    rows_affected = cyber_incidents.update_incident_status(incident_id, new_status)
+    if rows_affected:
+        with _lock:
+            _catch_up()
+    return rows_affected
+
+
+def delete_incident(incident_id):
+    """Delete one incident and bring the snapshot up to date."""
+    rows_affected = cyber_incidents.delete_incident(incident_id)
+    if rows_affected:
+        with _lock:
+            _catch_up()
+    return rows_affected
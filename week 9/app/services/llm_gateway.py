@@ -0,0 +1,419 @@
+"""
+Process-wide gateway for assistant requests.
+
+Every Streamlit session shares one asyncio event loop running in a daemon
+thread and one pooled AsyncOpenAI client. Upstream calls are capped
+globally (MAX_CONCURRENT) and per user (MAX_PER_USER); callers past the
+caps wait up to SLOT_TIMEOUT seconds for a slot. Identical requests that
+are already in flight share one upstream stream, and failed calls are
+retried with jittered exponential backoff as long as nothing has been
+streamed yet.
+
+Pages use the synchronous facade:
+
+    llm_gateway.configure(api_key=...)
+    client = llm_gateway.client_for(username)   # drop-in for OpenAI(...)
+
+    python -m app.services.llm_gateway          # end-to-end check against a local mock server
+"""
+import asyncio
+import json
+import queue
+import random
+import threading
+import time
+from app.services.completion_cache import cache_key, chunk_text
+
+try:
+    import openai
+except ImportError:  # only needed for the default client; see configure()
+    openai = None
+
+MAX_CONCURRENT = 8
+MAX_PER_USER = 2
+# Seconds a request may wait for a slot before it is turned away.
+SLOT_TIMEOUT = 30
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUSES = {408, 409, 429}
+# Pooled keep-alive connections to the API.
+MAX_CONNECTIONS = 20
+REQUEST_TIMEOUT = 60.0
+# Seconds a caller waits for the next piece of a reply.
+READ_TIMEOUT = 120
+
+_settings = {"api_key": None, "base_url": None, "client": None}
+_start_lock = threading.Lock()
+_loop = None
+_client = None
+_client_owned = False
+# Streams using each client, and replaced clients waiting for theirs to end.
+_in_use = {}
+_retired = set()
+_global_slots = None
+_user_slots = {}
+_flights = {}
+_DONE = object()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "coalesced": 0,
+    "upstream_calls": 0,
+    "retries": 0,
+    "failures": 0,
+    "rejected": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+}
+
+
+def _bump(**changes):
+    with _stats_lock:
+        for name, delta in changes.items():
+            _stats[name] += delta
+        _stats["peak_in_flight"] = max(_stats["peak_in_flight"], _stats["in_flight"])
+
+
+def configure(api_key=None, base_url=None, client=None, max_concurrent=None, max_per_user=None):
+    """
+    Set the API credentials and limits. Cheap to call on every page run:
+    the pooled client is only rebuilt when a setting changes. client may
+    be any AsyncOpenAI-compatible object and replaces the default one.
+    """
+    global MAX_CONCURRENT, MAX_PER_USER
+    with _start_lock:
+        changes = {name: value for name, value in
+                   (("api_key", api_key), ("base_url", base_url), ("client", client))
+                   if value is not None and _settings[name] != value}
+        _settings.update(changes)
+        new_limit = max_concurrent is not None and max_concurrent != MAX_CONCURRENT
+        if new_limit:
+            MAX_CONCURRENT = max_concurrent
+        new_user_limit = max_per_user is not None and max_per_user != MAX_PER_USER
+        if new_user_limit:
+            MAX_PER_USER = max_per_user
+        if not (changes or new_limit or new_user_limit):
+            return
+        if _loop is None:
+            # No loop thread yet, so nothing else touches its state.
+            _reset(bool(changes), new_limit, new_user_limit)
+            return
+        loop = _loop
+    # The client and semaphores belong to the loop thread; swap them there.
+    asyncio.run_coroutine_threadsafe(
+        _reset_on_loop(bool(changes), new_limit, new_user_limit), loop
+    ).result()
+
+
+def _ensure_loop():
+    """Start the gateway's event loop thread on first use."""
+    global _loop
+    with _start_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-gateway", daemon=True).start()
+        return _loop
+
+
+def _make_client():
+    """Returns (client, owned); owned clients were built here and are closed when replaced."""
+    if _settings["client"] is not None:
+        return _settings["client"], False
+    if openai is None:
+        raise RuntimeError("The openai package is required for the assistant.")
+    import httpx
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                            max_keepalive_connections=MAX_CONNECTIONS),
+        timeout=REQUEST_TIMEOUT,
+    )
+    # Retries are done here, with backoff shared across sessions.
+    client = openai.AsyncOpenAI(api_key=_settings["api_key"], base_url=_settings["base_url"],
+                                http_client=http_client, max_retries=0)
+    return client, True
+
+
+# Everything below until the facade runs on the gateway's loop thread,
+# so the shared state needs no locking.
+
+def _reset(client=False, slots=False, user_slots=False):
+    """Drop the state a configure() change invalidates; it is rebuilt on next use."""
+    global _client, _client_owned, _global_slots
+    if client:
+        if _client is not None and _client_owned:
+            _retire(_client)
+        _client, _client_owned = None, False
+    if slots:
+        _global_slots = None
+    if user_slots:
+        _user_slots.clear()
+
+
+async def _reset_on_loop(client, slots, user_slots):
+    _reset(client, slots, user_slots)
+
+
+def _retire(client):
+    """Close a replaced client's connection pool once no stream is using it."""
+    if _in_use.get(client):
+        _retired.add(client)
+    else:
+        asyncio.get_running_loop().create_task(client.close())
+
+
+def _checkout_client():
+    global _client, _client_owned
+    if _client is None:
+        _client, _client_owned = _make_client()
+    _in_use[_client] = _in_use.get(_client, 0) + 1
+    return _client
+
+
+def _checkin_client(client):
+    _in_use[client] -= 1
+    if not _in_use[client]:
+        del _in_use[client]
+        if client in _retired:
+            _retired.discard(client)
+            _retire(client)
+
+
+def _slots_for(user):
+    global _global_slots
+    if _global_slots is None:
+        _global_slots = asyncio.Semaphore(MAX_CONCURRENT)
+    if user not in _user_slots:
+        _user_slots[user] = asyncio.Semaphore(MAX_PER_USER)
+    return _global_slots, _user_slots[user]
+
+
+async def _acquire(slots):
+    try:
+        await asyncio.wait_for(slots.acquire(), SLOT_TIMEOUT)
+    except asyncio.TimeoutError:
+        _bump(rejected=1)
+        raise TimeoutError("The assistant is busy, please try again.") from None
+
+
+def _retryable(error):
+    if openai is not None and isinstance(error, openai.APIConnectionError):
+        return True  # includes timeouts
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    return isinstance(error, (ConnectionError, asyncio.TimeoutError))
+
+
+async def _upstream(user, model, messages, params):
+    """Yield the text pieces of one completion, within the caps and with retries."""
+    global_slots, user_slots = _slots_for(user)
+    await _acquire(user_slots)
+    try:
+        for attempt in range(MAX_RETRIES + 1):
+            streamed = False
+            await _acquire(global_slots)
+            _bump(in_flight=1, upstream_calls=1)
+            client = None
+            try:
+                client = _checkout_client()
+                stream = await client.chat.completions.create(
+                    model=model, messages=messages, stream=True, **params
+                )
+                async for chunk in stream:
+                    content = chunk_text(chunk)
+                    if content:
+                        streamed = True
+                        yield content
+                return
+            except Exception as error:
+                # A retry after partial output would repeat text already shown.
+                if streamed or attempt == MAX_RETRIES or not _retryable(error):
+                    raise
+            finally:
+                if client is not None:
+                    _checkin_client(client)
+                _bump(in_flight=-1)
+                global_slots.release()
+            _bump(retries=1)
+            # Full jitter: sessions that failed together retry apart.
+            await asyncio.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+    finally:
+        user_slots.release()
+
+
+async def _lead(key, flight, user, model, messages, params):
+    """Run one upstream request and fan its pieces out to every listener."""
+    error = None
+    try:
+        async for piece in _upstream(user, model, messages, params):
+            flight["pieces"].append(piece)
+            for listener in flight["listeners"]:
+                listener.put(piece)
+    except asyncio.CancelledError:
+        error = TimeoutError("The request was cancelled.")
+    except Exception as e:
+        error = e
+        _bump(failures=1)
+    finally:
+        _flights.pop(key, None)
+        for listener in flight["listeners"]:
+            listener.put((_DONE, error))
+
+
+async def _join(key, listener, user, model, messages, params):
+    """Attach listener to the identical in-flight request, or start one."""
+    flight = _flights.get(key)
+    if flight is not None:
+        _bump(coalesced=1)
+        for piece in flight["pieces"]:
+            listener.put(piece)
+        flight["listeners"].append(listener)
+        return
+    flight = {"pieces": [], "listeners": [listener]}
+    _flights[key] = flight
+    flight["task"] = asyncio.create_task(_lead(key, flight, user, model, messages, params))
+
+
+def _leave(key, listener):
+    """Detach a listener; the upstream call is cancelled once nobody is left."""
+    flight = _flights.get(key)
+    if flight is None or listener not in flight["listeners"]:
+        return
+    flight["listeners"].remove(listener)
+    if not flight["listeners"]:
+        flight["task"].cancel()
+
+
+# --- Synchronous facade (called from Streamlit script threads) ---
+
+def stream_chat(model, messages, user=None, **params):
+    """
+    Yield the text of a streamed chat completion sent through the gateway.
+    Raises the upstream error, or TimeoutError when the gateway is busy.
+    """
+    loop = _ensure_loop()
+    key = cache_key(model, messages, **params)
+    listener = queue.Queue()
+    _bump(requests=1)
+    asyncio.run_coroutine_threadsafe(
+        _join(key, listener, user, model, list(messages), params), loop
+    ).result()
+    finished = False
+    try:
+        while True:
+            try:
+                item = listener.get(timeout=READ_TIMEOUT)
+            except queue.Empty:
+                raise TimeoutError("The assistant did not answer in time.") from None
+            if isinstance(item, tuple) and item[0] is _DONE:
+                finished = True
+                if item[1] is not None:
+                    raise item[1]
+                return
+            yield item
+    finally:
+        if not finished:
+            loop.call_soon_threadsafe(_leave, key, listener)
+
+
+class _SessionClient:
+    """OpenAI()-shaped client whose completions go through the gateway."""
+
+    def __init__(self, user):
+        self.user = user
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, stream=True, **params):
+        return stream_chat(model, messages, user=self.user, **params)
+
+
+def client_for(user=None):
+    """A drop-in for OpenAI(...) in the pages; streams plain text pieces."""
+    return _SessionClient(user)
+
+
+def gateway_stats():
+    """Request, coalescing, retry and concurrency counters for this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update(max_concurrent=MAX_CONCURRENT, max_per_user=MAX_PER_USER)
+    return stats
+
+
+def _mock_server(fail_every=4, delay=0.02):
+    """
+    Local OpenAI-compatible server for the self-check. Streams the last
+    user message back word by word, answers every fail_every-th request
+    with a 503, and records its peak number of concurrent requests.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    state = {"requests": 0, "active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                state["requests"] += 1
+                number = state["requests"]
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            try:
+                if fail_every and number % fail_every == 0:
+                    self.send_response(503)
+                    self.send_header("Content-Type", "application/json")
+                    self.end_headers()
+                    self.wfile.write(b'{"error": {"message": "overloaded"}}')
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for word in body["messages"][-1]["content"].split():
+                    time.sleep(delay)
+                    chunk = {"id": "mock", "object": "chat.completion.chunk", "created": 0,
+                             "model": body["model"],
+                             "choices": [{"index": 0, "delta": {"content": word + " "},
+                                          "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+            finally:
+                with lock:
+                    state["active"] -= 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+    server, upstream = _mock_server()
+    BACKOFF_BASE = 0.05
+    configure(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1",
+              max_concurrent=4, max_per_user=2)
+
+    def ask(n):
+        # Half the sessions ask the same question; the rest differ per user.
+        user = f"analyst{n % 5}"
+        text = "explain phishing in one line" if n % 2 else f"status of ticket {n} please"
+        reply = "".join(client_for(user).create(
+            "gpt-4o-mini", [{"role": "user", "content": text}]))
+        assert reply.split() == text.split(), reply
+        return reply
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        replies = list(pool.map(ask, range(20)))
+    print(f"{len(replies)} replies in {time.perf_counter() - start:.2f} s")
+    print("upstream:", upstream)
+    print("gateway:", gateway_stats())
+    assert upstream["peak"] <= 4
+    assert gateway_stats()["coalesced"] > 0
+    server.shutdown()
@@ -0,0 +1,114 @@
+"""
+Grounds the dashboard assistants in the platform's data.
+
+For each question the TOP_K rows best matching its keywords (see
+search.search_any) and the precomputed summary counts are added to the
+request as a system message. The FTS and summary tables are kept current
+by triggers on every insert, update and delete, so nothing is rebuilt per
+question: retrieval is a few bounded index reads plus primary-key lookups
+on summary_counts, a few ms at a million rows.
+"""
+import time
+from app.data import search, summary
+
+TOP_K = 5
+MONTHS_SHOWN = 3
+
+# Assistant -> tables it answers about.
+DOMAINS = {
+    "it": ["IT_tickets"],
+    "cyber": ["cyber_incidents"],
+    "ai": ["datasets_metadata"],
+}
+
+# Per table: summary dimensions listed as counts, and the monthly
+# "YYYY-MM value" dimension used for trends.
+AGGREGATES = {
+    "cyber_incidents": {"counts": ["severity", "status", "incident_type"], "monthly": "month_type"},
+    "IT_tickets": {"counts": ["priority", "status", "category"], "monthly": "month_category"},
+    "datasets_metadata": {"counts": ["category"], "monthly": None},
+}
+
+TOTALS = {
+    "datasets_metadata": ["record_count", "file_size_mb"],
+}
+
+
+def relevant_rows(table, question, k=TOP_K):
+    """The k rows best matching the question's keywords (may be empty)."""
+    return search.search_any(table, question, limit=k)
+
+
+def _format_row(table, row):
+    fields = ", ".join(f"{col}={row[col]}" for col in search.FTS_TABLES[table]["result"])
+    return f"- {fields}: {(row['snippet'] or '').replace('**', '')}"
+
+
+def _monthly_lines(table, dimension):
+    """Counts per value for the latest MONTHS_SHOWN months, with change vs the month before."""
+    counts = summary.get_counts(table, dimension)
+    by_month = {}
+    for value, count in counts.items():
+        month, _, name = value.partition(" ")
+        by_month.setdefault(month, {})[name] = count
+    months = sorted(by_month)
+    lines = []
+    for i in range(max(0, len(months) - MONTHS_SHOWN), len(months)):
+        month = months[i]
+        previous = by_month[months[i - 1]] if i else {}
+        parts = []
+        for name, count in sorted(by_month[month].items(), key=lambda item: -item[1]):
+            before = previous.get(name)
+            change = f" ({(count - before) / before:+.0%})" if before else ""
+            parts.append(f"{name} {count}{change}")
+        lines.append(f"  {month}: " + ", ".join(parts))
+    return lines
+
+
+def aggregates(table):
+    """Summary lines for one table, from the trigger-maintained summary tables."""
+    spec = AGGREGATES[table]
+    lines = [f"{table}: {summary.get_row_count(table)} rows"]
+    for dimension in spec["counts"]:
+        counts = summary.get_counts(table, dimension).sort_values(ascending=False)
+        lines.append(f"  by {dimension}: " + ", ".join(f"{v} {c}" for v, c in counts.items()))
+    for measure in TOTALS.get(table, []):
+        lines.append(f"  total {measure}: {summary.get_total(table, measure):,.0f}")
+    if spec["monthly"]:
+        lines.append(f"  by month and {spec['monthly'].split('_', 1)[1]} "
+                     "(change vs previous month; the latest month may be partial):")
+        lines += _monthly_lines(table, spec["monthly"])
+    return lines
+
+
+def build_context(domain, question, k=TOP_K):
+    """
+    Return (text, stats): the grounding text for one question, and the
+    retrieval time in ms and number of rows found.
+    """
+    start = time.perf_counter()
+    sections, found = [], 0
+    for table in DOMAINS[domain]:
+        rows = relevant_rows(table, question, k)
+        found += len(rows)
+        sections += aggregates(table)
+        if len(rows):
+            sections.append(f"Records from {table} most relevant to the question:")
+            sections += [_format_row(table, row) for row in rows.to_dict("records")]
+    text = (
+        "Answer from the platform data below when it is relevant; say so if it "
+        "does not cover the question.\n" + "\n".join(sections)
+    )
+    return text, {"ms": (time.perf_counter() - start) * 1000, "rows": found}
+
+
+def ground_messages(messages, domain, question, k=TOP_K):
+    """
+    Return (messages, stats) with the context inserted just before the
+    last user message. The chat history itself is left unchanged.
+    """
+    text, stats = build_context(domain, question, k)
+    last_user = max((i for i, m in enumerate(messages) if m["role"] == "user"), default=len(messages))
+    grounded = list(messages)
+    grounded.insert(last_user, {"role": "system", "content": text})
+    return grounded, stats
@@ -0,0 +1,242 @@
+"""
+Compact, persistent per-session records for the Streamlit pages.
+
+Only the state worth keeping across a restart is stored (PERSISTED_KEYS:
+chat history and its rolling summary), as zlib-compressed JSON. Login is
+never stored: each record belongs to the username that saved it (None
+for pages without login) and is only loaded back for that owner.
+
+Records are written through to SQLite when they change. This module's
+own copies are an LRU of at most MAX_RESIDENT sessions /
+MAX_RESIDENT_BYTES; records idle for IDLE_SECONDS leave it (they stay on
+disk), and sessions idle for SESSION_TTL are deleted. The live
+st.session_state of connected sessions is Streamlit's and is not bounded
+here; chat_history caps what each session keeps there.
+
+    python -m app.services.session_store     # self-check and memory report
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from app.data.db import DATA_DIR, get_connection
+
+SESSIONS_PATH = DATA_DIR / "sessions.db"
+PERSISTED_KEYS = ("messages", "history_state")
+MAX_RESIDENT = 200
+MAX_RESIDENT_BYTES = 16 * 1024 * 1024
+IDLE_SECONDS = 30 * 60
+SESSION_TTL = 12 * 3600
+# Seconds between sweeps for expired sessions on disk.
+EXPIRE_EVERY = 600
+
+_lock = threading.Lock()
+# sid -> {"blob", "fingerprint", "raw_bytes", "username", "last_seen"}
+_resident = OrderedDict()
+_ready = set()
+_last_expiry = 0.0
+
+
+def _connection(path):
+    """Pooled connection to the session file; creates the table on first use."""
+    if path not in _ready:
+        with get_connection(path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    sid TEXT PRIMARY KEY,
+                    username TEXT,
+                    data BLOB NOT NULL,
+                    raw_bytes INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at)")
+        _ready.add(path)
+    return get_connection(path)
+
+
+def compact_record(state):
+    """The persisted subset of a session's state, as plain JSON-able values."""
+    return {key: state[key] for key in PERSISTED_KEYS if key in state}
+
+
+def _encode(record):
+    raw = json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    return zlib.compress(raw, 6), hashlib.sha1(raw).hexdigest(), len(raw)
+
+
+def _decode(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+def _evict(now):
+    """Drop idle and least recently used records from memory (caller holds _lock)."""
+    for sid in [sid for sid, entry in _resident.items() if now - entry["last_seen"] > IDLE_SECONDS]:
+        del _resident[sid]
+    total = sum(len(entry["blob"]) for entry in _resident.values())
+    while _resident and (len(_resident) > MAX_RESIDENT or total > MAX_RESIDENT_BYTES):
+        _, entry = _resident.popitem(last=False)
+        total -= len(entry["blob"])
+
+
+def expire_sessions(path=SESSIONS_PATH, ttl=SESSION_TTL):
+    """Delete stored sessions idle for longer than ttl. Returns the number deleted."""
+    with _connection(path) as conn:
+        return conn.execute(
+            "DELETE FROM sessions WHERE updated_at < ?", (time.time() - ttl,)
+        ).rowcount
+
+
+def save_session(sid, state, owner=None, path=SESSIONS_PATH):
+    """
+    Store the compact record of state for sid, owned by owner (a username).
+    A record saved by a different owner is left alone. The SQLite write
+    only happens when the record changed since the last save. Returns
+    True if it was written.
+    """
+    global _last_expiry
+    blob, fingerprint, raw_bytes = _encode(compact_record(state))
+    now = time.time()
+    with _lock:
+        entry = _resident.get(sid)
+        if entry is not None and (entry["username"] != owner or entry["fingerprint"] == fingerprint):
+            if entry["username"] == owner:
+                entry["last_seen"] = now
+                _resident.move_to_end(sid)
+            return False
+    with _connection(path) as conn:
+        written = conn.execute(
+            "INSERT INTO sessions (sid, username, data, raw_bytes, updated_at) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (sid) DO UPDATE SET data = excluded.data, raw_bytes = excluded.raw_bytes, "
+            "updated_at = excluded.updated_at WHERE sessions.username IS excluded.username",
+            (sid, owner, blob, raw_bytes, now)
+        ).rowcount
+    if not written:
+        return False
+    with _lock:
+        _resident[sid] = {"blob": blob, "fingerprint": fingerprint, "raw_bytes": raw_bytes,
+                          "username": owner, "last_seen": now}
+        _resident.move_to_end(sid)
+        _evict(now)
+        sweep = now - _last_expiry > EXPIRE_EVERY
+        if sweep:
+            _last_expiry = now
+    if sweep:
+        expire_sessions(path)
+    return True
+
+
+def load_session(sid, owner=None, path=SESSIONS_PATH, ttl=SESSION_TTL):
+    """
+    The stored record for sid (a fresh copy), or None if unknown, expired
+    or saved by someone other than owner.
+    """
+    now = time.time()
+    with _lock:
+        entry = _resident.get(sid)
+        if entry is not None:
+            if entry["username"] != owner:
+                return None
+            entry["last_seen"] = now
+            _resident.move_to_end(sid)
+            return _decode(entry["blob"])
+    with _connection(path) as conn:
+        row = conn.execute(
+            "SELECT data, raw_bytes, username, updated_at FROM sessions WHERE sid = ?", (sid,)
+        ).fetchone()
+    if row is None or now - row[3] > ttl or row[2] != owner:
+        return None
+    blob = row[0]
+    record = _decode(blob)
+    with _lock:
+        _resident[sid] = {"blob": blob, "fingerprint": _encode(record)[1], "raw_bytes": row[1],
+                          "username": row[2], "last_seen": now}
+        _evict(now)
+    return record
+
+
+def delete_session(sid, path=SESSIONS_PATH):
+    with _lock:
+        _resident.pop(sid, None)
+    with _connection(path) as conn:
+        conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+
+def deep_sizeof(obj, _seen=None):
+    """Approximate bytes held by obj and everything it references (DataFrames included)."""
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if hasattr(obj, "memory_usage") and hasattr(obj, "index"):  # pandas objects
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    return size
+
+
+def memory_report():
+    """
+    One row per resident session: compressed bytes held here, the size of
+    the record uncompressed, and seconds idle. Most recently used last.
+    """
+    now = time.time()
+    with _lock:
+        return [
+            {"sid": sid[:8], "username": entry["username"], "bytes": len(entry["blob"]),
+             "raw_bytes": entry["raw_bytes"], "idle_seconds": round(now - entry["last_seen"])}
+            for sid, entry in _resident.items()
+        ]
+
+
+def session_stats(path=SESSIONS_PATH):
+    """Totals for the resident LRU and the on-disk store."""
+    report = memory_report()
+    with _connection(path) as conn:
+        stored, stored_bytes = conn.execute(
+            "SELECT COUNT(*), coalesce(SUM(length(data)), 0) FROM sessions"
+        ).fetchone()
+    return {
+        "resident": len(report),
+        "resident_bytes": sum(row["bytes"] for row in report),
+        "stored": stored,
+        "stored_bytes": stored_bytes,
+    }
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sessions.db"
+        MAX_RESIDENT = 50
+        chat = [{"role": "system", "content": "You are a helpful IT assistant."}] + [
+            {"role": role, "content": f"message {i} about the VPN outage " * 20}
+            for i, role in enumerate(["user", "assistant"] * 30)
+        ]
+        state = {"logged_in": True, "username": "alice", "messages": chat,
+                 "refresh": False, "history_state": {"summary": "", "folded": 0}}
+        start = time.perf_counter()
+        for n in range(200):
+            save_session(f"{n:032x}", state, f"analyst{n}", path)
+        print(f"200 saves in {(time.perf_counter() - start) * 1000:.0f} ms")
+        assert not save_session(f"{199:032x}", state, "analyst199", path)
+        assert "logged_in" not in load_session(f"{199:032x}", "analyst199", path)
+        assert load_session(f"{0:032x}", "analyst0", path)["messages"] == chat  # from disk
+        assert load_session(f"{0:032x}", "mallory", path) is None
+        assert load_session(f"{0:032x}", path=path) is None
+        assert not save_session(f"{0:032x}", {"messages": []}, None, path)   # not the owner
+        assert load_session(f"{0:032x}", "analyst0", path)["messages"] == chat
+        stats = session_stats(path)
+        print(stats)
+        print(f"live state {deep_sizeof(state) / 1024:.0f} KB, "
+              f"stored record {memory_report()[-1]['bytes'] / 1024:.1f} KB compressed")
+        assert stats["resident"] <= MAX_RESIDENT and stats["stored"] == 200
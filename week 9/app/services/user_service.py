@@ -1,8 +1,20 @@
-import bcrypt
+import hashlib
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from app.data.db import connect_database
-from app.data.users import get_user_by_username, insert_user
-from app.data.schema import create_users_table
+from app.data.cache import invalidate
+from app.data.db import BASE_DIR
+from app.data.users import get_user_by_username, insert_user, update_password_hash
+from app.services import auth_service
+
+# Legacy week 7 user file migrated into the users table.
+USERS_FILE = BASE_DIR.parent / "week 7" / "users.txt"
+MIGRATION_BATCH_SIZE = 10_000
+MIGRATION_WORKERS = 2
+BCRYPT_HASH = re.compile(r"^\$2[abxy]\$\d{2}\$[./A-Za-z0-9]{53}$")
 
 def register_user(username, password, role='user'):
     """Register new user with password hashing."""
@@ -11,11 +23,11 @@ def register_user(username, password, role='user'):
     if existing:
         return False, f"Username '{username}' is already taken."
     
-    # Hash password
-    password_hash = bcrypt.hashpw(
-        password.encode('utf-8'),
-        bcrypt.gensalt()
-    ).decode('utf-8')
+    # Hash password (on the bounded bcrypt pool)
+    try:
+        password_hash = auth_service.hash_password(password)
+    except TimeoutError as e:
+        return False, str(e)
     
     # Insert into database
     insert_user(username, password_hash, role)
@@ -27,12 +39,195 @@ def login_user(username, password):
     if not user:
         return False, "User not found."
     
-    # Verify password
+    # Verify password (on the bounded bcrypt pool)
     stored_hash = user[2]  # password_hash column
-    if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
+    try:
+        valid = auth_service.check_password(password, stored_hash)
+    except TimeoutError as e:
+        return False, str(e)
+    if valid:
+        if auth_service.needs_rehash(stored_hash):
+            auth_service.rehash_in_background(
+                password, lambda new_hash: update_password_hash(username, new_hash)
+            )
         return True, f"Login successful!"
     return False, "Incorrect password."
 
-def migrate_users_from_file(filepath='week7/users.txt'):
-    """Migrate users from text file to database."""
-    # ... migration logic ...
\ No newline at end of file
+def create_migration_checkpoint_table(conn):
+    """Progress of each users.txt migration, so an interrupted run can resume."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_migration_checkpoints (
+            path TEXT PRIMARY KEY,
+            byte_offset INTEGER NOT NULL,
+            lines INTEGER NOT NULL,
+            migrated INTEGER NOT NULL,
+            skipped INTEGER NOT NULL,
+            invalid INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
+            checksum TEXT
+        )
+    """)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(user_migration_checkpoints)")]
+    if "checksum" not in columns:
+        # Checkpoints written before the checksum existed never match, so those files restart.
+        conn.execute("ALTER TABLE user_migration_checkpoints ADD COLUMN checksum TEXT")
+
+
+def _prefix_digest(path, length):
+    """sha256 (still open for updates) of the first `length` bytes of a file."""
+    digest = hashlib.sha256()
+    remaining = length
+    with open(path, "rb") as f:
+        while remaining > 0:
+            block = f.read(min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+
+def validate_user_lines(lines):
+    """
+    Parse raw 'username,password_hash' lines.
+
+    Returns (rows, invalid) where rows are (username, hash) tuples with a
+    well-formed bcrypt hash. Runs in a worker process.
+    """
+    rows = []
+    invalid = 0
+    for raw in lines:
+        line = raw.decode("utf-8", errors="replace").strip()
+        if not line:
+            continue
+        username, _, password_hash = line.partition(",")
+        password_hash = password_hash.split(",", 1)[0].strip()
+        username = username.strip()
+        if username and BCRYPT_HASH.match(password_hash):
+            rows.append((username, password_hash))
+        else:
+            invalid += 1
+    return rows, invalid
+
+
+def _read_batches(path, offset, batch_size):
+    """Yield (lines, end_offset) batches of complete lines starting at a byte offset."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        batch = []
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                # Half-written last line: leave it for the next run.
+                break
+            offset += len(raw)
+            batch.append(raw)
+            if len(batch) >= batch_size:
+                yield batch, offset
+                batch = []
+        if batch:
+            yield batch, offset
+
+
+def _print_progress(counts, rate):
+    print(f"      {counts['lines']:,} lines | migrated {counts['migrated']:,} | "
+          f"skipped {counts['skipped']:,} | invalid {counts['invalid']:,} | {rate:,.0f} lines/s")
+
+
+def migrate_users_from_file(conn, filepath=USERS_FILE, role='user',
+                            batch_size=MIGRATION_BATCH_SIZE, workers=MIGRATION_WORKERS,
+                            progress=_print_progress):
+    """
+    Bulk-migrate users from users.txt into the users table.
+
+    The file is streamed in batches. Hash validation runs in a process
+    pool (workers=0 validates inline), and each batch is written with one
+    executemany. The checkpoint is updated in the same transaction as the
+    batch, with a checksum of every byte migrated so far. If the run is
+    interrupted, the next call resumes after the last committed batch,
+    unless those bytes changed (the file was replaced or edited); then it
+    starts again from the top. Existing usernames are skipped, not
+    overwritten.
+
+    Returns a dict with this run's lines, migrated, skipped and invalid
+    counts (all 0 when nothing was added since the last run), seconds,
+    rows_per_sec and resumed_from (byte offset). The checkpoint keeps the
+    totals over all runs.
+    """
+    start = time.perf_counter()
+    path = Path(filepath).resolve()
+    counts = {"lines": 0, "migrated": 0, "skipped": 0, "invalid": 0}
+    totals = dict(counts)
+    if not path.exists():
+        print(f"      File not found: {path}. No users to migrate.")
+        return dict(counts, seconds=0.0, rows_per_sec=0.0, resumed_from=0)
+
+    create_migration_checkpoint_table(conn)
+    conn.commit()
+    checkpoint = conn.execute(
+        "SELECT byte_offset, lines, migrated, skipped, invalid, checksum "
+        "FROM user_migration_checkpoints WHERE path = ?",
+        (str(path),)
+    ).fetchone()
+    offset = 0
+    digest = hashlib.sha256()
+    if checkpoint and checkpoint[0] <= path.stat().st_size:
+        resumed = _prefix_digest(path, checkpoint[0])
+        if resumed.hexdigest() == checkpoint[5]:
+            offset, digest = checkpoint[0], resumed
+            totals.update(zip(("lines", "migrated", "skipped", "invalid"), checkpoint[1:5]))
+    resumed_from = offset
+
+    def rate():
+        seconds = time.perf_counter() - start
+        return counts["lines"] / seconds if seconds else 0.0
+
+    def write_batch(rows, invalid, lines, end_offset):
+        for raw in lines:
+            digest.update(raw)
+        before = conn.total_changes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                [(username, password_hash, role) for username, password_hash in rows]
+            )
+            migrated = conn.total_changes - before
+            for tally in (counts, totals):
+                tally["lines"] += len(lines)
+                tally["migrated"] += migrated
+                tally["skipped"] += len(rows) - migrated
+                tally["invalid"] += invalid
+            conn.execute("""
+                INSERT OR REPLACE INTO user_migration_checkpoints
+                    (path, byte_offset, lines, migrated, skipped, invalid, updated_at, checksum)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (str(path), end_offset, totals["lines"], totals["migrated"],
+                  totals["skipped"], totals["invalid"],
+                  datetime.now().isoformat(timespec="seconds"), digest.hexdigest()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if progress:
+            progress(counts, rate())
+
+    batches = _read_batches(path, offset, batch_size)
+    if workers:
+        # Keep a bounded window of batches in flight and write them in file order.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for lines, end_offset in batches:
+                pending.append((pool.submit(validate_user_lines, lines), lines, end_offset))
+                if len(pending) >= workers * 2:
+                    future, batch_lines, batch_end = pending.popleft()
+                    write_batch(*future.result(), batch_lines, batch_end)
+            while pending:
+                future, batch_lines, batch_end = pending.popleft()
+                write_batch(*future.result(), batch_lines, batch_end)
+    else:
+        for lines, end_offset in batches:
+            write_batch(*validate_user_lines(lines), lines, end_offset)
+
+    invalidate("users")
+    return dict(counts, seconds=time.perf_counter() - start,
+                rows_per_sec=rate(), resumed_from=resumed_from)
@@ -0,0 +1,74 @@
+import time
+import streamlit as st
+from app.data import changes
+
+# Live dashboard sections. The metric and chart sections of the IT and
+# cybersecurity pages are fragments that rerun every POLL_SECONDS while
+# live updates are on. Each run first reads the latest change seq (one
+# row of sqlite_sequence); when nothing changed, or nothing the section
+# reads, the section is redrawn from the values it computed last time
+# and the summary tables are not queried at all.
+POLL_SECONDS = 5
+# Poll timings kept in session state.
+STATS_KEPT = 200
+
+
+def refresh_interval(key):
+    """Sidebar toggle for live updates; returns the fragments' run_every (None when off)."""
+    live = st.sidebar.toggle("Live updates", value=True, key=key,
+                             help=f"Check for changes by other analysts every {POLL_SECONDS} s.")
+    return POLL_SECONDS if live else None
+
+
+def _touches(seq, table, columns):
+    """Whether any change to table after seq can affect columns."""
+    pending, _ = changes.changes_since(seq, [table])
+    if pending is None:
+        return True
+    # Inserts, deletes and reloads change every count.
+    return any(change["op"] != "update" or columns & set(change["columns"])
+               for change in pending)
+
+
+def live_data(key, table, columns, load):
+    """
+    This session's copy of load(), recomputed only when table has changed
+    in one of columns since it was last computed. Poll timings go to
+    st.session_state.live_stats.
+    """
+    start = time.perf_counter()
+    sections = st.session_state.setdefault("live_sections", {})
+    entry = sections.get(key)
+    seq = changes.latest_seq()
+    if entry is not None and entry["seq"] != seq:
+        if _touches(entry["seq"], table, set(columns)):
+            entry = None
+        else:
+            entry["seq"] = seq
+    idle = entry is not None
+    if not idle:
+        # seq was read first, so a change made during load() is picked up next time.
+        entry = {"seq": seq, "value": load()}
+        sections[key] = entry
+
+    history = st.session_state.setdefault("live_stats", [])
+    history.append({"idle": idle, "ms": (time.perf_counter() - start) * 1000})
+    del history[:-STATS_KEPT]
+    return entry["value"]
+
+
+def show_live_stats(container=None):
+    """Average cost of idle polls and of refreshes for this session."""
+    history = st.session_state.get("live_stats", [])
+    if not history:
+        return
+    container = container or st
+    idle = [s["ms"] for s in history if s["idle"]]
+    refreshed = [s["ms"] for s in history if not s["idle"]]
+    text = f"Live updates: {len(idle)} idle polls"
+    if idle:
+        text += f" at {sum(idle) / len(idle):.2f} ms"
+    text += f", {len(refreshed)} refreshes"
+    if refreshed:
+        text += f" at {sum(refreshed) / len(refreshed):.1f} ms"
+    container.caption(text + f" (last {len(history)} section runs).")
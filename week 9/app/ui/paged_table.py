@@ -0,0 +1,76 @@
+import streamlit as st
+from app.data.cache import table_token, record_access
+from app.data.pagination import PAGEABLE_TABLES, DEFAULT_PAGE_SIZE, fetch_pages
+
+PAGE_SIZES = [25, DEFAULT_PAGE_SIZE, 100, 250]
+
+
+def _go_next(state, cursor):
+    state["stack"].append(cursor)
+
+
+def _go_back(state):
+    if len(state["stack"]) > 1:
+        state["stack"].pop()
+
+
+def paged_table(table, key, filter_options=None, page=None):
+    """
+    Show one page of a table at a time, keyset-paged in SQL.
+
+    The visible page is fetched together with the next one. Both are kept
+    in session state until the query or the table changes, so reruns and
+    "Next" clicks usually need no query at all. filter_options maps a
+    filterable column to the values offered in its selectbox. Page hits
+    and misses count towards cache_stats(page).
+    """
+    state = st.session_state.setdefault(key, {"stack": [None], "query": None,
+                                              "token": None, "pages": {}})
+
+    spec = PAGEABLE_TABLES[table]
+    controls = st.columns(3 + len(filter_options or {}))
+    sort = controls[0].selectbox("Sort by", spec["sort"], key=f"{key}_sort")
+    order = controls[1].selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order")
+    page_size = controls[2].selectbox("Rows per page", PAGE_SIZES,
+                                      index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                                      key=f"{key}_size")
+    filters = {}
+    for col, (column, options) in zip(controls[3:], (filter_options or {}).items()):
+        choice = col.selectbox(column.replace("_", " ").title(), ["All"] + list(options),
+                               key=f"{key}_filter_{column}")
+        if choice != "All":
+            filters[column] = choice
+
+    query = (sort, order, page_size, tuple(sorted(filters.items())))
+    if query != state["query"]:
+        state.update(stack=[None], query=query, pages={})
+    token = table_token(table)
+    if token != state["token"]:
+        # Keyset cursors stay valid after edits; only cached rows go stale.
+        state.update(token=token, pages={})
+
+    cursor = state["stack"][-1]
+    descending = order == "Descending"
+    if page is not None:
+        record_access(page, cursor in state["pages"])
+    if cursor not in state["pages"]:
+        fetched = fetch_pages(table, cursor, page_size, 2, sort, descending, filters)
+        state["pages"][cursor] = fetched[0]
+        if len(fetched) > 1:
+            state["pages"][fetched[0][1]] = fetched[1]
+    df, next_cursor = state["pages"][cursor]
+    if next_cursor is not None and next_cursor not in state["pages"]:
+        state["pages"][next_cursor] = fetch_pages(table, next_cursor, page_size, 1,
+                                                  sort, descending, filters)[0]
+    # Keep only the previous, visible and prefetched pages.
+    keep = {cursor, next_cursor, state["stack"][-2] if len(state["stack"]) > 1 else None}
+    state["pages"] = {c: p for c, p in state["pages"].items() if c in keep}
+
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    nav_prev, nav_label, nav_next = st.columns([0.2, 0.6, 0.2])
+    nav_prev.button("Previous", key=f"{key}_prev", disabled=len(state["stack"]) == 1,
+                    on_click=_go_back, args=(state,), use_container_width=True)
+    nav_label.caption(f"Page {len(state['stack'])} · {len(df)} rows")
+    nav_next.button("Next", key=f"{key}_next", disabled=next_cursor is None,
+                    on_click=_go_next, args=(state, next_cursor), use_container_width=True)
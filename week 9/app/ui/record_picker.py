@@ -0,0 +1,30 @@
+import streamlit as st
+from app.data.pickers import PICKERS, PICK_LIMIT, pick_records
+
+PLACEHOLDERS = {
+    "IT_tickets": "Ticket ID prefix, e.g. TCKT-10",
+    "cyber_incidents": "Words from the description, or incident ID",
+    "datasets_metadata": "Dataset name prefix",
+}
+
+
+def record_picker(table, label, key, filters=None, limit=PICK_LIMIT):
+    """
+    Search box plus a selectbox of the top matches; returns the chosen id or None.
+
+    Only `limit` rows are read per search, whatever the table size.
+    """
+    if table not in PICKERS:
+        raise ValueError(f"No record picker for {table}.")
+    text = st.text_input(f"Search - {label}", key=f"{key}_search",
+                         placeholder=PLACEHOLDERS.get(table, ""))
+    matches = pick_records(table, text, limit, filters)
+    if not matches:
+        st.info("No matching records.")
+        return None
+
+    labels = dict(matches)
+    selected = st.selectbox(label, list(labels), format_func=labels.get, key=f"{key}_select")
+    if len(matches) == limit:
+        st.caption(f"Showing the first {limit} matches; type more to narrow down.")
+    return selected
@@ -0,0 +1,32 @@
+import time
+import streamlit as st
+from app.data.search import SEARCH_LIMIT, search
+
+# How each hit is titled: table -> format string over the result columns.
+HEADINGS = {
+    "cyber_incidents": "**ID {id}** · {incident_type} · {severity} · {status} · {date}",
+    "IT_tickets": "**{ticket_id}** · {subject} · {priority} · {status}",
+}
+
+
+def search_box(table, key, label="Search", limit=SEARCH_LIMIT):
+    """
+    Full-text search box; shows ranked hits with highlighted snippets.
+
+    Returns True when a search was run, so the caller can hide its
+    default listing.
+    """
+    text = st.text_input(label, key=f"{key}_text",
+                         placeholder="Keywords, e.g. vpn timeout (last word may be partial)")
+    if not text.strip():
+        return False
+
+    start = time.perf_counter()
+    hits = search(table, text, limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    st.caption(f"{len(hits)} result(s) in {elapsed_ms:.1f} ms"
+               + (f" (top {limit})" if len(hits) == limit else ""))
+    for hit in hits.to_dict("records"):
+        st.markdown(HEADINGS[table].format(**hit))
+        st.caption(hit["snippet"])
+    return True
@@ -0,0 +1,82 @@
+import uuid
+import streamlit as st
+from app.services import chat_history, session_store
+
+
+def session_id():
+    """
+    This browser session's id. It is kept in the URL (?sid=...) so the
+    chat can be restored after a server restart, and in session state so
+    it survives page switches. The id never logs anyone in: a record is
+    only restored for the user who saved it (see start_session()).
+    """
+    sid = st.session_state.get("sid") or st.query_params.get("sid") or uuid.uuid4().hex
+    st.session_state.sid = sid
+    if st.query_params.get("sid") != sid:
+        st.query_params["sid"] = sid
+    return sid
+
+
+def _owner():
+    """The logged-in username, or None (also for pages without login)."""
+    return st.session_state.get("username") if st.session_state.get("logged_in") else None
+
+
+def _restore(sid, owner):
+    record = session_store.load_session(sid, owner) or {}
+    for key, value in record.items():
+        st.session_state.setdefault(key, value)
+    st.session_state.session_restored = True
+    return record
+
+
+def sync_session():
+    """
+    Restore the stored record into a fresh session, bound the chat history,
+    and store the record if it changed. Call at the top of each page and
+    after changing chat state.
+    """
+    sid = session_id()
+    if not st.session_state.get("session_restored"):
+        _restore(sid, _owner())
+    if "messages" in st.session_state:
+        chat_history.compact_history(st.session_state.messages,
+                                     st.session_state.setdefault("history_state", {}))
+    session_store.save_session(sid, st.session_state, _owner())
+
+
+def start_session(username):
+    """
+    Log username in under a new session id, so an id handed out before
+    login (say in a shared link) is never the logged-in one. The chat the
+    user left under the old id comes along, if it was theirs.
+    """
+    old = session_id()
+    for key in session_store.PERSISTED_KEYS:
+        st.session_state.pop(key, None)
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.sid = uuid.uuid4().hex
+    st.query_params["sid"] = st.session_state.sid
+    if _restore(old, username):
+        session_store.delete_session(old)
+    sync_session()
+
+
+def end_session():
+    """Log out: forget this session's stored record and its chat."""
+    session_store.delete_session(session_id())
+    st.session_state.logged_in = False
+    for key in session_store.PERSISTED_KEYS:
+        st.session_state.pop(key, None)
+
+
+def show_session_memory(container=None):
+    """Resident memory of this session and of the process-wide session store."""
+    container = container or st
+    own = session_store.deep_sizeof({key: st.session_state[key] for key in st.session_state})
+    stats = session_store.session_stats()
+    container.caption(
+        f"Session memory: {own / 1024:.0f} KB. Store: {stats['resident']} sessions "
+        f"resident ({stats['resident_bytes'] / 1024:.0f} KB), {stats['stored']} on disk."
+    )
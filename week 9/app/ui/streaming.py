@@ -0,0 +1,125 @@
+import time
+import streamlit as st
+from app.services import completion_cache, llm_gateway
+from app.services.completion_cache import iter_content
+
+# Redraw the reply at most every FLUSH_INTERVAL seconds, or sooner once
+# FLUSH_CHARS new characters are waiting. Each redraw re-sends the whole
+# markdown to the browser, so redrawing per token is what made long
+# replies slow.
+FLUSH_INTERVAL = 0.08
+FLUSH_CHARS = 400
+CURSOR = "▌"
+# Replies whose timing stats are kept in session state.
+STATS_KEPT = 50
+
+
+def render_stream(pieces, render, interval=FLUSH_INTERVAL, max_pending=FLUSH_CHARS):
+    """
+    Show streamed text through render(text, done) as it arrives.
+
+    Pieces are buffered in a list and joined once per flush, so building
+    the reply stays linear in its length. The first piece is shown at
+    once. Returns (text, stats) where stats holds ttft_ms, seconds,
+    tokens (stream chunks, about one token each), tokens_per_sec and
+    flushes.
+    """
+    start = time.perf_counter()
+    first_at = None
+    text = ""
+    pending = []
+    pending_chars = 0
+    tokens = 0
+    flushes = 0
+    last_flush = start
+
+    for piece in pieces:
+        now = time.perf_counter()
+        if first_at is None:
+            first_at = now
+        tokens += 1
+        pending.append(piece)
+        pending_chars += len(piece)
+        if flushes == 0 or pending_chars >= max_pending or now - last_flush >= interval:
+            text += "".join(pending)
+            pending, pending_chars = [], 0
+            render(text, False)
+            flushes += 1
+            last_flush = now
+
+    text += "".join(pending)
+    render(text, True)
+    flushes += 1
+
+    end = time.perf_counter()
+    generating = end - first_at if first_at is not None else 0.0
+    return text, {
+        "ttft_ms": (first_at - start) * 1000 if first_at is not None else None,
+        "seconds": end - start,
+        "tokens": tokens,
+        "tokens_per_sec": tokens / generating if generating else 0.0,
+        "flushes": flushes,
+    }
+
+
+def stream_reply(completion, placeholder, label=None):
+    """
+    Stream a chat completion into a Streamlit placeholder (st.empty()).
+
+    label is put in front of the text, e.g. "**Assistant:**". The reply's
+    stats are appended to st.session_state.stream_stats. Returns the text.
+    """
+    prefix = f"{label} " if label else ""
+    placeholder.markdown(f"{prefix}{CURSOR}")
+
+    def render(text, done):
+        placeholder.markdown(f"{prefix}{text}" if done else f"{prefix}{text}{CURSOR}")
+
+    text, stats = render_stream(iter_content(completion), render)
+    history = st.session_state.setdefault("stream_stats", [])
+    history.append(stats)
+    del history[:-STATS_KEPT]
+    return text
+
+
+def show_stream_stats(container=None):
+    """
+    Time-to-first-token and tokens/sec of the last reply and their
+    averages, plus reply cache, gateway, retrieval and context stats.
+    """
+    history = st.session_state.get("stream_stats", [])
+    if not history:
+        return
+    container = container or st
+    cache = completion_cache.cache_stats()
+    if cache["hits"] or cache["misses"]:
+        container.caption(
+            f"Reply cache: {cache['hit_rate']:.0%} hits "
+            f"({cache['hits']}/{cache['hits'] + cache['misses']}), "
+            f"{cache['entries']} replies, {cache['bytes'] / 1024:.0f} KB."
+        )
+    gateway = llm_gateway.gateway_stats()
+    if gateway["requests"]:
+        container.caption(
+            f"Gateway: {gateway['in_flight']}/{gateway['max_concurrent']} calls in flight, "
+            f"{gateway['coalesced']} shared, {gateway['retries']} retries, "
+            f"{gateway['rejected']} turned away."
+        )
+    grounding = st.session_state.get("retrieval_stats")
+    if grounding:
+        container.caption(f"Data context: {grounding['rows']} matching rows in {grounding['ms']:.1f} ms.")
+    report = st.session_state.get("history_state", {}).get("last_report")
+    if report and report["tokens_saved"] > 0:
+        container.caption(
+            f"Context: sent {report['sent_messages']} of {report['messages']} messages, "
+            f"~{report['tokens']} tokens ({report['tokens_saved']} saved by summarizing)."
+        )
+    last = history[-1]
+    with_ttft = [s["ttft_ms"] for s in history if s["ttft_ms"] is not None]
+    avg_ttft = sum(with_ttft) / len(with_ttft) if with_ttft else 0.0
+    avg_rate = sum(s["tokens_per_sec"] for s in history) / len(history)
+    container.caption(
+        f"Last reply: first token {last['ttft_ms'] or 0:.0f} ms, "
+        f"{last['tokens_per_sec']:.0f} tokens/s ({last['tokens']} tokens). "
+        f"Average over {len(history)}: {avg_ttft:.0f} ms, {avg_rate:.0f} tokens/s."
+    )
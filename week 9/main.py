@@ -2,15 +2,21 @@ import pandas as pd
 from pathlib import Path
 from app.data.db import connect_database, DB_PATH, DATA_DIR
 from app.data.schema import create_all_tables
-from app.data.cyber_incidents import insert_incident, get_all_incidents, update_incident_status, delete_incident
-from app.data.users import register_user, login_user, migrate_users_from_file
+from app.data.ingest import stream_csv_to_table
+from app.data.csv_sync import sync_csv_to_table
+from app.services import incident_service
+from app.services.user_service import register_user, login_user, migrate_users_from_file
 
 # -----------------------------
 # CSV Helper Functions
 # -----------------------------
 
-def load_csv_to_table(conn, csv_path, table_name):
-    """Load a CSV file into a database table using pandas."""
+# Rows per insert transaction; memory use stays bounded by this.
+CSV_CHUNK_SIZE = 50_000
+
+def load_csv_to_table(conn, csv_path, table_name, chunk_size=CSV_CHUNK_SIZE,
+                      rebuild_indexes=False, defer_summaries=False):
+    """Stream a CSV file into a database table in fixed-size chunks."""
     csv_file = Path(csv_path)
 
     if not csv_file.exists():
@@ -18,26 +24,48 @@ def load_csv_to_table(conn, csv_path, table_name):
         return 0
 
     try:
-        df = pd.read_csv(csv_file)
-        rows_loaded = df.to_sql(
-            name=table_name,
-            con=conn,
-            if_exists='append',
-            index=False
+        stats = stream_csv_to_table(
+            conn, csv_file, table_name,
+            chunk_size=chunk_size,
+            rebuild_indexes=rebuild_indexes,
+            defer_summaries=defer_summaries
         )
-        print(f" Loaded {rows_loaded} rows into {table_name} from {csv_file.name}.")
-        return rows_loaded
+        print(f" Loaded {stats['rows']} rows into {table_name} from {csv_file.name} "
+              f"({stats['rows_per_sec']:,.0f} rows/sec).")
+        return stats["rows"]
     except Exception as e:
         print(f"Error loading CSV {csv_file.name} into {table_name}: {e}")
         return 0
 
 
+def sync_csv_file(conn, csv_path, table_name):
+    """Incrementally sync one CSV file into a table (safe to re-run)."""
+    csv_file = Path(csv_path)
+
+    if not csv_file.exists():
+        print(f"  CSV file not found: {csv_file}. Skipping {table_name}.")
+        return 0
+
+    try:
+        stats = sync_csv_to_table(conn, csv_file, table_name, chunk_size=CSV_CHUNK_SIZE)
+        print(f" {csv_file.name}: {stats['mode']}, {stats['rows']} rows upserted into "
+              f"{table_name} in {stats['seconds'] * 1000:.1f} ms.")
+        if stats["skipped"]:
+            shown = ", ".join(str(key) for key in stats["skipped"][:10])
+            print(f"  Skipped {len(stats['skipped'])} rows whose unique values belong to "
+                  f"other rows (id {shown}{', ...' if len(stats['skipped']) > 10 else ''}).")
+        return stats["rows"]
+    except Exception as e:
+        print(f"Error syncing CSV {csv_file.name} into {table_name}: {e}")
+        return 0
+
+
 def load_all_csv_data(conn):
-    """Load data for all main tables from CSV files."""
+    """Sync data for all main tables from CSV files (idempotent upsert by id)."""
     total_rows = 0
-    total_rows += load_csv_to_table(conn, DATA_DIR / "cyber_incidents.csv", "cyber_incidents")
-    total_rows += load_csv_to_table(conn, DATA_DIR / "datasets_metadata.csv", "datasets_metadata")
-    total_rows += load_csv_to_table(conn, DATA_DIR / "it_tickets.csv", "it_tickets")
+    total_rows += sync_csv_file(conn, DATA_DIR / "cyber_incidents.csv", "cyber_incidents")
+    total_rows += sync_csv_file(conn, DATA_DIR / "datasets_metadata.csv", "datasets_metadata")
+    total_rows += sync_csv_file(conn, DATA_DIR / "it_tickets.csv", "it_tickets")
     return total_rows
 
 # Database Setup
@@ -48,7 +76,7 @@ def setup_database_complete():
     1. Connect to database
     2. Create all tables
     3. Migrate users from users.txt
-    4. Load CSV data
+    4. Sync CSV data (only new or changed rows)
     5. Verify setup
     """
     print("\n" + "=" * 60)
@@ -63,12 +91,17 @@ def setup_database_complete():
 
     # 3. Migrate users
     print("\n[3/5] Migrating users from users.txt...")
-    migrate_users_from_file()  
-
-    # 4. Load CSV data
-    print("\n[4/5] Loading CSV data...")
+    report = migrate_users_from_file(conn)
+    if report["lines"]:
+        print(f"      Migrated {report['migrated']}, skipped {report['skipped']}, "
+              f"invalid {report['invalid']} ({report['rows_per_sec']:,.0f} lines/s)")
+    else:
+        print("      users.txt unchanged since the last run, 0 migrated.")
+
+    # 4. Sync CSV data
+    print("\n[4/5] Syncing CSV data...")
     total_rows = load_all_csv_data(conn)
-    print(f"      Total {total_rows} rows loaded into domain tables.")
+    print(f"      Total {total_rows} rows upserted into domain tables.")
 
     # 5. Verify
     print("\n[5/5] Verifying database setup...")
@@ -96,8 +129,6 @@ def setup_database_complete():
 
 def run_test_queries():
     """Run simple tests on authentication and CRUD."""
-    conn = connect_database()
-
     print("\n" + "=" * 60)
     print(" RUNNING APPLICATION TESTS")
     print("=" * 60)
@@ -110,23 +141,20 @@ def run_test_queries():
     print(f" Login Test:    {'' if success else '❌'} {msg}")
 
     # Test 2: CRUD
-    incident_id = insert_incident(
-        conn,
+    incident_id = incident_service.insert_incident(
         "2025-12-08", "DDoS", "Critical", "Open", "Test attack", "analyst_test"
     )
     print(f" CRUD Create:    Incident #{incident_id} created")
 
-    update_incident_status(conn, incident_id, "Resolved")
+    incident_service.update_incident_status(incident_id, "Resolved")
     print(f" CRUD Update:    Status updated")
 
-    df = get_all_incidents(conn)
-    print(f" CRUD Read:      Total incidents: {len(df)}")
+    df, version = incident_service.get_incidents()
+    print(f" CRUD Read:      Total incidents: {len(df)} (snapshot v{version})")
 
-    delete_incident(conn, incident_id)
+    incident_service.delete_incident(incident_id)
     print(f" CRUD Delete:    Test incident deleted")
 
-    conn.close()
-
 
 # -----------------------------
 # Entry Point
@@ -1,10 +1,17 @@
 import streamlit as st
+import sys
+from pathlib import Path
+
+# Make the week 9 "app" package importable when run via `streamlit run`.
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from app.services import user_service
+from app.ui.session import start_session, sync_session
 
 st.set_page_config(page_title="Login / Register", page_icon="🔑", layout="centered")
 
 # ---------- Initialise session state ----------
-if "users" not in st.session_state:
-    st.session_state.users = {}
+# Login is never restored from the URL; see app/ui/session.py.
+sync_session()
 
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
@@ -34,10 +41,11 @@ with tab_login:
     login_password = st.text_input("Password", type="password", key="login_password")
 
     if st.button("Log in", type="primary"):
-        users = st.session_state.users
-        if login_username in users and users[login_username] == login_password:
-            st.session_state.logged_in = True
-            st.session_state.username = login_username
+        # Checked against the users table (bcrypt hashes).
+        success, message = user_service.login_user(login_username, login_password)
+        if success:
+            # New session id on login; the user's earlier chat comes along.
+            start_session(login_username)
             st.success(f"Welcome back, {login_username}! ")
 
             # Redirect to dashboard page
@@ -58,10 +66,10 @@ with tab_register:
             st.warning("Please fill in all fields.")
         elif new_password != confirm_password:
             st.error("Passwords do not match.")
-        elif new_username in st.session_state.users:
-            st.error("Username already exists. Choose another one.")
         else:
-            # "Save" user in our simple in-memory store
-            st.session_state.users[new_username] = new_password
-            st.success("Account created! Now log in from the Login tab.")
-            st.info("Tip: Switch to the Login tab and sign in with your new account.")
\ No newline at end of file
+            success, message = user_service.register_user(new_username, new_password)
+            if success:
+                st.success("Account created! Now log in from the Login tab.")
+                st.info("Tip: Switch to the Login tab and sign in with your new account.")
+            else:
+                st.error(message)
\ No newline at end of file
@@ -1,16 +1,36 @@
 import streamlit as st
 import pandas as pd
 import datetime
+import sqlite3
 import time
-import os
-from openai import OpenAI
+import sys
+from pathlib import Path
+
+# Make the week 9 "app" package importable when run via `streamlit run`.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from app.data import tickets
+from app.data.cache import cache_stats
+from app.data import summary
+from app.ui.paged_table import paged_table
+from app.ui.record_picker import record_picker
+from app.ui.search_box import search_box
+from app.ui.streaming import stream_reply, show_stream_stats
+from app.ui.session import sync_session, end_session, show_session_memory
+from app.ui import live
+from app.services.completion_cache import cached_completion
+from app.services.chat_history import prepare_messages
+from app.services import llm_gateway, retrieval
 
 # --- CONFIGURATION ---
-CSV_PATH = r"C:\Users\DELL\Desktop\CST1510\CW2_CST1510_M01039503\week 9\DATA\it_tickets.csv"
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+# Requests go through the shared gateway (pooled client, concurrency caps).
+llm_gateway.configure(api_key=st.secrets["OPENAI_API_KEY"])
+client = llm_gateway.client_for(st.session_state.get("username"))
 
 st.set_page_config(page_title="IT Operations", layout="wide")
 
+# Restores the user's chat after a server restart (see app/ui/session.py).
+sync_session()
+
 # --- AUTH CHECK ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
     st.error("You must be logged in to view the dashboard.")
@@ -24,81 +44,80 @@ with col_button:
     if st.button("AI Assistant (bottom of page)", use_container_width=True):
         st.session_state.show_chat = not st.session_state.get("show_chat", False)
 
-# --- DATA FUNCTIONS ---
-def load_tickets():
-    if not os.path.exists(CSV_PATH):
-        st.error(f"CSV file not found at {CSV_PATH}. Please ensure the file exists.")
-        return pd.DataFrame()
-    return pd.read_csv(CSV_PATH)
-
-def save_tickets(df):
-    df.to_csv(CSV_PATH, index=False)
-
-def get_all_tickets():
-    df = load_tickets()
-    return df.sort_values(by="id") if not df.empty else df
-
-def insert_ticket(ticket_id, priority, status, category, subject, description, created_at, resolved_at, assigned_to):
-    df = load_tickets()
-    new_id = df["id"].max() + 1 if not df.empty else 1
-    new_row = {
-        "id": new_id,
-        "ticket_id": ticket_id,
-        "priority": priority,
-        "status": status,
-        "category": category,
-        "subject": subject,
-        "description": description,
-        "created_at": created_at,
-        "resolved_at": resolved_at,
-        "assigned_to": assigned_to,
-    }
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    save_tickets(df)
-
-def update_ticket_status(pk_id, new_status):
-    df = load_tickets()
-    df.loc[df["id"] == pk_id, "status"] = new_status
-    save_tickets(df)
-
-def delete_ticket(pk_id):
-    df = load_tickets()
-    df = df[df["id"] != pk_id]
-    save_tickets(df)
-
-# --- REFRESH HANDLING ---
-if "refresh" in st.session_state and st.session_state.refresh:
-    df_tickets = get_all_tickets()
-    st.session_state.refresh = False
-else:
-    df_tickets = get_all_tickets()
+# --- DATA ACCESS ---
+# The page reads pages, picker matches and summaries; never the whole table.
+# Writes go through the process-wide repository in app.data.tickets, whose
+# schema check runs once per process rather than on every rerun.
+st.session_state.refresh = False
+
+if st.sidebar.checkbox("Show cache hit rate", key="it_cache_stats"):
+    stats = cache_stats("IT")
+    st.sidebar.metric("Cache hit rate (IT)", f"{stats['hit_rate']:.0%}",
+                      help=f"{stats['hits']} hits / {stats['misses']} misses")
 
 # --- METRICS ---
-st.subheader("Ticket Metrics")
+# Counts come from the trigger-maintained summary tables.
+# Each section is a fragment that, with live updates on, checks the change
+# log every few seconds and only re-reads the counts it shows when another
+# analyst changed them (see app/ui/live.py).
+total = summary.get_row_count("IT_tickets")
+refresh = live.refresh_interval("it_live")
+live.show_live_stats(st.sidebar)
+
+
+def load_metrics():
+    priority_counts = summary.get_counts("IT_tickets", "priority")
+    status_counts = summary.get_counts("IT_tickets", "status")
+    return {
+        "total": summary.get_row_count("IT_tickets"),
+        "high": int(priority_counts.get("High", 0)),
+        "open": int(status_counts.get("Open", 0)),
+    }
+
+
+def load_tickets_over_time():
+    tickets_over_time = summary.get_counts("IT_tickets", "day")
+    tickets_over_time_df = tickets_over_time.rename("Ticket Count").to_frame()
+    tickets_over_time_df.index = pd.to_datetime(tickets_over_time_df.index, errors="coerce")
+    return tickets_over_time_df
 
-if not df_tickets.empty:
-    total = len(df_tickets)
-    high = len(df_tickets[df_tickets['priority'] == 'High'])
-    open_t = len(df_tickets[df_tickets['status'] == 'Open'])
 
+@st.fragment(run_every=refresh)
+def ticket_metrics():
+    metrics = live.live_data("it_metrics", "IT_tickets", ["priority", "status"], load_metrics)
+    if not metrics["total"]:
+        st.info("No tickets found. Import the CSV with `python -m app.data.tickets`.")
+        return
+    st.subheader("Ticket Metrics")
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Tickets", total)
-    col2.metric("High Priority", high)
-    col3.metric("Open Tickets", open_t)
+    col1.metric("Total Tickets", metrics["total"])
+    col2.metric("High Priority", metrics["high"])
+    col3.metric("Open Tickets", metrics["open"])
 
+
+@st.fragment(run_every=refresh)
+def tickets_over_time_chart():
     # --- LINE CHART: Tickets Over Time ---
-    st.subheader("Tickets Created Over Time")
-    df_tickets["created_at"] = pd.to_datetime(df_tickets["created_at"], errors="coerce")
-    tickets_over_time = df_tickets.groupby(df_tickets["created_at"].dt.date).size()
-    tickets_over_time_df = tickets_over_time.reset_index()
-    tickets_over_time_df.columns = ["Date", "Ticket Count"]
-    st.line_chart(tickets_over_time_df.set_index("Date"))
+    tickets_over_time_df = live.live_data("it_timeline", "IT_tickets", ["created_date"],
+                                          load_tickets_over_time)
+    if len(tickets_over_time_df):
+        st.subheader("Tickets Created Over Time")
+        st.line_chart(tickets_over_time_df)
+
 
+@st.fragment(run_every=refresh)
+def ticket_status_chart():
     # --- BAR CHART: Current Ticket Status ---
-    st.subheader("Current Ticket Status")
-    st.bar_chart(df_tickets['status'].value_counts())
-else:
-    st.info("No tickets found.")
+    status_counts = live.live_data("it_status", "IT_tickets", ["status"],
+                                   lambda: summary.get_counts("IT_tickets", "status"))
+    if len(status_counts):
+        st.subheader("Current Ticket Status")
+        st.bar_chart(status_counts)
+
+
+ticket_metrics()
+tickets_over_time_chart()
+ticket_status_chart()
 
 # --- CRUD TABS ---
 st.divider()
@@ -109,7 +128,14 @@ tab_view, tab_add, tab_update, tab_delete = st.tabs([
 ])
 
 with tab_view:
-    st.dataframe(df_tickets, use_container_width=True)
+    # Full-text search (FTS5); the paged queue is shown when the box is empty.
+    if not search_box("IT_tickets", "it_search", "Search ticket subjects and descriptions"):
+        # Only the visible page (plus the next one) is read from SQLite.
+        paged_table("IT_tickets", "it_queue", filter_options={
+            "status": summary.get_counts("IT_tickets", "status").index,
+            "priority": summary.get_counts("IT_tickets", "priority").index,
+            "category": summary.get_counts("IT_tickets", "category").index,
+        }, page="IT")
 
 with tab_add:
     with st.form("add_tick"):
@@ -120,27 +146,27 @@ with tab_add:
         desc = st.text_area("Description")
         if st.form_submit_button("Submit"):
             today = str(datetime.date.today())
-            insert_ticket(tid, prio, "Open", cat, subj, desc, today, None, None)
-            st.success("Created!")
-            st.session_state.refresh = True
+            try:
+                tickets.insert_ticket(tid, prio, "Open", cat, subj, desc, today)
+                st.success("Created!")
+                st.session_state.refresh = True
+            except sqlite3.IntegrityError:
+                st.error(f"Ticket ID {tid} already exists.")
 
 with tab_update:
-    if not df_tickets.empty:
-        opts = {f"{row['ticket_id']} (ID: {row['id']})": row['id'] for _, row in df_tickets.iterrows()}
-        sel_lbl = st.selectbox("Select Ticket", list(opts.keys()))
-        sel_id = opts[sel_lbl]
+    sel_id = record_picker("IT_tickets", "Select Ticket", "it_update") if total else None
+    if sel_id is not None:
         new_stat = st.selectbox("New Status", ["Open", "In Progress", "Resolved", "Closed"])
         if st.button("Update Status"):
-            update_ticket_status(sel_id, new_stat)
+            tickets.update_ticket_status(sel_id, new_stat)
             st.success("Updated!")
             st.session_state.refresh = True
 
 with tab_delete:
-    if not df_tickets.empty:
-        ids = df_tickets['id'].tolist()
-        del_id = st.selectbox("Select ID to Delete", ids)
+    del_id = record_picker("IT_tickets", "Select Ticket to Delete", "it_delete") if total else None
+    if del_id is not None:
         if st.button("Confirm Delete", type="primary"):
-            delete_ticket(del_id)
+            tickets.delete_ticket(del_id)
             st.success("Deleted.")
             st.session_state.refresh = True
 
@@ -159,6 +185,8 @@ if st.session_state.get("show_chat"):
         st.subheader("Chat Controls")
         message_count = len([m for m in st.session_state.messages if m["role"] != "system"])
         st.metric("Messages", message_count)
+        show_stream_stats()
+        show_session_memory()
         if st.button("🗑 Clear Chat", use_container_width=True):
             st.session_state.messages = []
             st.success("Chat cleared.")
@@ -173,25 +201,25 @@ if st.session_state.get("show_chat"):
         st.session_state.messages.append({"role": "user", "content": prompt})
         st.session_state.chat_prompt = ""  # clear input
 
-        with st.spinner("Thinking..."):
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=st.session_state.messages,
-                stream=True
-            )
-
-        full_reply = ""
-        for chunk in completion:
-            delta = chunk.choices[0].delta
-            if delta.content:
-                full_reply += delta.content
+        chat_box.markdown(f"**User:** {prompt}")
+        # Older turns are folded into a summary to stay under the token budget.
+        request, _ = prepare_messages(st.session_state.messages,
+                                      st.session_state.setdefault("history_state", {}))
+        # Relevant rows and summary counts, for this question only.
+        request, st.session_state.retrieval_stats = retrieval.ground_messages(request, "it", prompt)
+        # Identical conversations are answered from the local reply cache.
+        completion = cached_completion(client, "gpt-4o-mini", request)
+        # Rendered as it streams; see app/ui/streaming.py.
+        full_reply = stream_reply(completion, chat_box.empty(), "**Assistant:**")
 
         st.session_state.messages.append({"role": "assistant", "content": full_reply})
+        sync_session()
 
 # --- LOGOUT BUTTON ---
 st.divider()
 if st.button("Logout", type="primary"):
     st.session_state.logged_in = False
+    end_session()
     st.success("You have been logged out.")
     time.sleep(1)
     st.switch_page("Home.py")
@@ -1,18 +1,35 @@
 import streamlit as st
 import pandas as pd
 import datetime
-import os
-from openai import OpenAI
-
-# --- ABSOLUTE FILE PATH TO EXISTING CSV ---
-CSV_PATH = r"C:\Users\DELL\Desktop\CST1510\CW2_CST1510_M01039503\week 9\DATA\cyber_incidents.csv"
-
-# --- Initialize OpenAI client ---
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+import sys
+from pathlib import Path
+
+# Make the week 9 "app" package importable when run via `streamlit run`.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from app.services import incident_service
+from app.data.cache import cache_stats
+from app.data import cyber_incidents, summary
+from app.ui.paged_table import paged_table
+from app.ui.record_picker import record_picker
+from app.ui.search_box import search_box
+from app.ui.streaming import stream_reply, show_stream_stats
+from app.ui.session import sync_session, end_session, show_session_memory
+from app.ui import live
+from app.services.completion_cache import cached_completion
+from app.services.chat_history import prepare_messages
+from app.services import llm_gateway, retrieval
+
+# --- Initialize assistant client ---
+# Requests go through the shared gateway (pooled client, concurrency caps).
+llm_gateway.configure(api_key=st.secrets["OPENAI_API_KEY"])
+client = llm_gateway.client_for(st.session_state.get("username"))
 
 # --- STREAMLIT PAGE SETUP ---
 st.set_page_config(page_title="Cybersecurity", page_icon="🛡️", layout="wide")
 
+# Restores the user's chat after a server restart (see app/ui/session.py).
+sync_session()
+
 # --- AUTH CHECK ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
     st.error("You must be logged in to view the dashboard.")
@@ -28,83 +45,83 @@ with col_button:
     if st.button("AI Assistant (bottom of page)", use_container_width=True):
         st.session_state.show_chat = not st.session_state.get("show_chat", False)
 
-# --- DB FUNCTIONS USING EXISTING CSV ONLY ---
-def load_incidents():
-    if not os.path.exists(CSV_PATH):
-        st.error(f"CSV file not found at {CSV_PATH}. Please ensure the file exists.")
-        return pd.DataFrame()
-    return pd.read_csv(CSV_PATH)
-
-def save_incidents(df):
-    df.to_csv(CSV_PATH, index=False)
-
-def get_all_incidents():
-    df = load_incidents()
-    return df.sort_values(by="id") if not df.empty else df
-
-def insert_incident(date, type, severity, status, description, reported_by, created_at):
-    df = load_incidents()
-    new_id = df["id"].max() + 1 if not df.empty else 1
-    new_row = {
-        "id": new_id,
-        "date": date,
-        "incident_type": type,
-        "severity": severity,
-        "status": status,
-        "description": description,
-        "reported_by": reported_by,
-        "created_at": created_at,
-    }
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    save_incidents(df)
+# --- REFRESH HANDLING ---
+# The page never loads the whole table: counts come from the summary
+# tables and the selected incident is read by id.
+total_incidents = summary.get_row_count("cyber_incidents")
+st.session_state.refresh = False
 
-def update_incident_status(pk_id, new_status):
-    df = load_incidents()
-    df.loc[df["id"] == pk_id, "status"] = new_status
-    save_incidents(df)
+if st.sidebar.checkbox("Show cache hit rate", key="cyber_cache_stats"):
+    stats = cache_stats("Cybersecurity")
+    st.sidebar.metric("Cache hit rate (Cybersecurity)", f"{stats['hit_rate']:.0%}",
+                      help=f"{stats['hits']} hits / {stats['misses']} misses")
 
-def delete_incident(pk_id):
-    df = load_incidents()
-    df = df[df["id"] != pk_id]
-    save_incidents(df)
+# --- METRICS & CHARTS ---
+# Counts come from the trigger-maintained summary tables.
+# Each section is a fragment that, with live updates on, checks the change
+# log every few seconds and only re-reads the counts it shows when another
+# analyst changed them (see app/ui/live.py).
+refresh = live.refresh_interval("cyber_live")
+live.show_live_stats(st.sidebar)
+
+
+def load_metrics():
+    severity_counts = summary.get_counts("cyber_incidents", "severity")
+    status_counts = summary.get_counts("cyber_incidents", "status")
+    return {
+        "total": summary.get_row_count("cyber_incidents"),
+        "critical": int(severity_counts.get("Critical", 0)),
+        "active": int(status_counts.reindex(["Active", "Triage"]).fillna(0).sum()),
+    }
 
-# --- REFRESH HANDLING ---
-if "refresh" in st.session_state and st.session_state.refresh:
-    df_incidents = get_all_incidents()
-    st.session_state.refresh = False
-else:
-    df_incidents = get_all_incidents()
 
-# --- METRICS & CHARTS ---
-if not df_incidents.empty:
-    st.subheader("Incident Metrics")
+def load_incidents_over_time():
+    incidents_over_time = summary.get_counts("cyber_incidents", "day")
+    incidents_over_time_df = incidents_over_time.rename("Incident Count").to_frame()
+    incidents_over_time_df.index = pd.to_datetime(incidents_over_time_df.index, errors="coerce")
+    return incidents_over_time_df
 
-    total = len(df_incidents)
-    critical_active = (df_incidents["severity"] == "Critical").sum()
-    active_incidents = (df_incidents["status"].isin(["Active", "Triage"])).sum()
 
+@st.fragment(run_every=refresh)
+def incident_metrics():
+    metrics = live.live_data("cyber_metrics", "cyber_incidents", ["severity", "status"], load_metrics)
+    if not metrics["total"]:
+        st.info("No incidents found. Use the 'Report Incident' tab to log a new case.")
+        return
+    st.subheader("Incident Metrics")
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Incidents", total)
-    col2.metric("Critical Severity", critical_active)
-    col3.metric("Active Cases", active_incidents)
+    col1.metric("Total Incidents", metrics["total"])
+    col2.metric("Critical Severity", metrics["critical"])
+    col3.metric("Active Cases", metrics["active"])
 
     st.markdown("---")
 
+
+@st.fragment(run_every=refresh)
+def incident_type_chart():
     # --- BAR CHART: Incident Type Distribution ---
-    st.subheader("Incident Type Distribution")
-    type_counts = df_incidents["incident_type"].value_counts()
-    st.bar_chart(type_counts)
+    type_counts = live.live_data(
+        "cyber_types", "cyber_incidents", ["incident_type"],
+        lambda: summary.get_counts("cyber_incidents", "incident_type").sort_values(ascending=False)
+    )
+    if len(type_counts):
+        st.subheader("Incident Type Distribution")
+        st.bar_chart(type_counts)
 
+
+@st.fragment(run_every=refresh)
+def incidents_over_time_chart():
     # --- LINE CHART: Incidents Over Time ---
-    st.subheader("Incidents Over Time")
-    df_incidents["date"] = pd.to_datetime(df_incidents["date"], errors="coerce")
-    incidents_over_time = df_incidents.groupby(df_incidents["date"].dt.date).size()
-    incidents_over_time_df = incidents_over_time.reset_index()
-    incidents_over_time_df.columns = ["Date", "Incident Count"]
-    st.line_chart(incidents_over_time_df.set_index("Date"))
+    incidents_over_time_df = live.live_data("cyber_timeline", "cyber_incidents", ["date"],
+                                            load_incidents_over_time)
+    if len(incidents_over_time_df):
+        st.subheader("Incidents Over Time")
+        st.line_chart(incidents_over_time_df)
+
 
-else:
-    st.info("No incidents found. Use the 'Report Incident' tab to log a new case.")
+incident_metrics()
+incident_type_chart()
+incidents_over_time_chart()
 
 # --- CRUD OPERATIONS (Incident Management) ---
 st.divider()
@@ -113,7 +130,14 @@ st.header("Incident Management")
 tab_view, tab_add, tab_update, tab_delete = st.tabs(["View Queue", "Report Incident", "Update Status", "Delete"])
 
 with tab_view:
-    st.dataframe(df_incidents, use_container_width=True, hide_index=True)
+    # Full-text search (FTS5); the paged queue is shown when the box is empty.
+    if not search_box("cyber_incidents", "incident_search", "Search incident descriptions"):
+        # Only the visible page (plus the next one) is read from SQLite.
+        paged_table("cyber_incidents", "incident_queue", filter_options={
+            "status": summary.get_counts("cyber_incidents", "status").index,
+            "severity": summary.get_counts("cyber_incidents", "severity").index,
+            "incident_type": summary.get_counts("cyber_incidents", "incident_type").index,
+        }, page="Cybersecurity")
 
 with tab_add:
     with st.form("add_incident"):
@@ -128,51 +152,41 @@ with tab_add:
             if not inc_desc:
                 st.error("Please provide a description.")
             else:
-                insert_incident(inc_date, inc_type, inc_sev, "Triage", inc_desc, inc_rpt, str(datetime.date.today()))
+                incident_service.insert_incident(inc_date, inc_type, inc_sev, "Triage", inc_desc, inc_rpt)
                 st.success(f"Incident of type **{inc_type}** reported successfully.")
                 st.session_state.refresh = True
 
 with tab_update:
-    if not df_incidents.empty:
-        active_incidents_df = df_incidents[df_incidents["status"].isin(["Triage", "Active"])]
-        if active_incidents_df.empty:
-            st.info("No incidents to update.")
-        else:
-            opts = {
-                f"ID {row['id']} - {row['incident_type']} ({row['severity']})": row["id"]
-                for _, row in active_incidents_df.iterrows()
-            }
-            sel_lbl = st.selectbox("Select Incident to Update", list(opts.keys()))
-
-            if sel_lbl:
-                sel_id = opts[sel_lbl]
-                current_status = active_incidents_df[active_incidents_df["id"] == sel_id]["status"].iloc[0]
-                status_options = ["Triage", "Active", "Contained", "Closed"]
-                default_index = status_options.index(current_status)
-
-                new_stat = st.selectbox("New Status", status_options, index=default_index)
-
-                if st.button("Update Status", type="primary"):
-                    update_incident_status(sel_id, new_stat)
-                    st.success(f"Incident status updated to **{new_stat}**.")
-                    st.session_state.refresh = True
+    if total_incidents:
+        sel_id = record_picker("cyber_incidents", "Select Incident to Update", "incident_update",
+                               filters={"status": ["Triage", "Active"]})
+        # The picker reads the live table, so the row may have just been deleted.
+        current = cyber_incidents.get_incident_by_id(sel_id) if sel_id is not None else None
+        if current is not None and current.empty:
+            st.info(f"Incident ID {sel_id} no longer exists.")
+        elif current is not None:
+            current_status = current.at[0, "status"]
+            status_options = ["Triage", "Active", "Contained", "Closed"]
+            default_index = status_options.index(current_status) if current_status in status_options else 0
+
+            new_stat = st.selectbox("New Status", status_options, index=default_index)
+
+            if st.button("Update Status", type="primary"):
+                incident_service.update_incident_status(sel_id, new_stat)
+                st.success(f"Incident status updated to **{new_stat}**.")
+                st.session_state.refresh = True
     else:
         st.info("No incidents available to update status.")
 
 with tab_delete:
-    if not df_incidents.empty:
-        del_opts = {
-            f"ID {row['id']} - {row['incident_type']} ({row['severity']})": row["id"]
-            for _, row in df_incidents.iterrows()
-        }
-        del_lbl = st.selectbox("Select Incident to Delete", list(del_opts.keys()))
+    if total_incidents:
+        del_id = record_picker("cyber_incidents", "Select Incident to Delete", "incident_delete")
 
-        if del_lbl:
-            del_id = del_opts[del_lbl]
-            st.warning(f"Confirm deletion of incident **{del_lbl}**.")
+        if del_id is not None:
+            st.warning(f"Confirm deletion of incident **ID {del_id}**.")
 
             if st.button("Confirm Delete", type="primary"):
-                delete_incident(del_id)
+                incident_service.delete_incident(del_id)
                 st.success("Incident deleted.")
                 st.session_state.refresh = True
     else:
@@ -193,6 +207,8 @@ if st.session_state.get("show_chat"):
         st.subheader("Chat Controls")
         message_count = len([m for m in st.session_state.messages if m["role"] != "system"])
         st.metric("Messages", message_count)
+        show_stream_stats()
+        show_session_memory()
         if st.button("🗑 Clear Chat", use_container_width=True):
             st.session_state.messages = []
             st.success("Chat cleared.")
@@ -208,24 +224,24 @@ if st.session_state.get("show_chat"):
         st.session_state.messages.append({"role": "user", "content": prompt})
         st.session_state.cyber_chat_prompt = ""  
 
-        with st.spinner("Thinking..."):
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=st.session_state.messages,
-                stream=True
-            )
-
-        full_reply = ""
-        for chunk in completion:
-            delta = chunk.choices[0].delta
-            if delta.content:
-                full_reply += delta.content
+        chat_box.markdown(f"**User:** {prompt}")
+        # Older turns are folded into a summary to stay under the token budget.
+        request, _ = prepare_messages(st.session_state.messages,
+                                      st.session_state.setdefault("history_state", {}))
+        # Relevant rows and summary counts, for this question only.
+        request, st.session_state.retrieval_stats = retrieval.ground_messages(request, "cyber", prompt)
+        # Identical conversations are answered from the local reply cache.
+        completion = cached_completion(client, "gpt-4o-mini", request)
+        # Rendered as it streams; see app/ui/streaming.py.
+        full_reply = stream_reply(completion, chat_box.empty(), "**Assistant:**")
 
         st.session_state.messages.append({"role": "assistant", "content": full_reply})
+        sync_session()
 
 # --- LOGOUT BUTTON ---
 st.divider()
 if st.button("Logout", type="primary"):
     st.session_state.logged_in = False
+    end_session()
     st.success("You have been logged out.")
     st.switch_page("Home.py")
@@ -2,79 +2,56 @@ import streamlit as st
 import pandas as pd
 import datetime
 import time
-import os
-from openai import OpenAI
-
-# --- FILE PATHS ---
-ABSOLUTE_PATH = r"C:\Users\DELL\Desktop\CST1510\CW2_CST1510_M01039503\week 9\DATA\datasets_metadata.csv"
-RELATIVE_PATH = os.path.join("week 9", "DATA", "datasets_metadata.csv")
-
-def resolve_csv_path():
-    if os.path.exists(ABSOLUTE_PATH):
-        return ABSOLUTE_PATH
-    elif os.path.exists(RELATIVE_PATH):
-        return RELATIVE_PATH
-    else:
-        return None
-
-CSV_PATH = resolve_csv_path()
+import sys
+from pathlib import Path
+
+# Make the week 9 "app" package importable when run via `streamlit run`.
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from app.data import datasets, snapshots, summary
+from app.data.cache import load_table, cache_stats
+from app.ui.paged_table import paged_table
+from app.ui.record_picker import record_picker
+from app.ui.streaming import stream_reply, show_stream_stats
+from app.ui.session import sync_session, end_session, show_session_memory
+from app.services.completion_cache import cached_completion
+from app.services.chat_history import prepare_messages
+from app.services import llm_gateway, retrieval
 
 # --- DATA ACCESS ---
 def get_all_datasets():
-    if not CSV_PATH:
-        st.error("CSV file not found. Please ensure datasets_metadata.csv exists.")
-        return pd.DataFrame()
-    df = pd.read_csv(CSV_PATH)
-    if 'id' not in df.columns:
-        df['id'] = range(1, len(df) + 1)
+    # Served from the shared cache until datasets_metadata changes; a cold
+    # start reads the typed snapshot instead of querying the whole table.
+    df = load_table("datasets_metadata", lambda: snapshots.load_snapshot("datasets_metadata"),
+                    page="AI")
     return df.sort_values(by='id')
 
-def save_to_csv(df):
-    if CSV_PATH:
-        df.to_csv(CSV_PATH, index=False)
-
 def insert_dataset(dataset_name, category, source, last_updated, record_count, file_size_mb):
-    df = get_all_datasets()
-    if dataset_name in df['dataset_name'].values:
+    if datasets.get_dataset_by_name(dataset_name):
         st.error(f"Dataset name {dataset_name} already exists.")
         return
-    new_id = df['id'].max() + 1 if not df.empty else 1
-    new_row = {
-        'id': new_id,
-        'dataset_name': dataset_name,
-        'category': category,
-        'source': source,
-        'last_updated': last_updated,
-        'record_count': record_count,
-        'file_size_mb': file_size_mb,
-    }
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    save_to_csv(df)
+    datasets.insert_dataset(dataset_name, category, source, last_updated, record_count, file_size_mb)
     st.success(f"Metadata for **{dataset_name}** created.")
 
 def update_dataset(pk_id, new_record_count, new_size_mb):
-    df = get_all_datasets()
-    if pk_id in df['id'].values:
-        df.loc[df['id'] == pk_id, 'record_count'] = new_record_count
-        df.loc[df['id'] == pk_id, 'file_size_mb'] = new_size_mb
-        df.loc[df['id'] == pk_id, 'last_updated'] = str(datetime.date.today())
-        save_to_csv(df)
+    if datasets.update_dataset(pk_id, new_record_count, new_size_mb, str(datetime.date.today())):
         st.success("Dataset updated.")
     else:
         st.error("Dataset ID not found.")
 
 def delete_dataset(pk_id):
-    df = get_all_datasets()
-    if pk_id in df['id'].values:
-        df = df[df['id'] != pk_id]
-        save_to_csv(df)
+    if datasets.delete_dataset(pk_id):
         st.success("Dataset deleted.")
     else:
         st.error("Dataset ID not found.")
 
 
 st.set_page_config(page_title="AI Operations", page_icon="🤖", layout="wide")
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+# Requests go through the shared gateway (pooled client, concurrency caps).
+llm_gateway.configure(api_key=st.secrets["OPENAI_API_KEY"])
+client = llm_gateway.client_for(st.session_state.get("username"))
+
+# Restores the user's chat after a server restart (see app/ui/session.py).
+sync_session()
 
 # --- AUTH CHECK ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
@@ -92,22 +69,22 @@ with col_button:
         st.session_state.show_chat = not st.session_state.get("show_chat", False)
 
 # --- REFRESH HANDLING ---
-if "refresh" not in st.session_state:
-    st.session_state.refresh = False
+# CRUD calls invalidate the datasets_metadata cache entry, so a plain load is enough.
+df_datasets = get_all_datasets()
+st.session_state.refresh = False
 
-# Load datasets (respect refresh flag)
-if st.session_state.refresh:
-    df_datasets = get_all_datasets()
-    st.session_state.refresh = False
-else:
-    df_datasets = get_all_datasets()
+if st.sidebar.checkbox("Show cache hit rate", key="ai_cache_stats"):
+    stats = cache_stats("AI")
+    st.sidebar.metric("Cache hit rate (AI)", f"{stats['hit_rate']:.0%}",
+                      help=f"{stats['hits']} hits / {stats['misses']} misses")
 
 # --- METRICS & GRAPHS ---
-if not df_datasets.empty:
+# Counts and totals come from the trigger-maintained summary tables.
+total = summary.get_row_count("datasets_metadata")
+if total:
     st.subheader("Data Metrics")
-    total = len(df_datasets)
-    total_records = df_datasets['record_count'].sum()
-    total_size = df_datasets['file_size_mb'].sum()
+    total_records = summary.get_total("datasets_metadata", "record_count")
+    total_size = summary.get_total("datasets_metadata", "file_size_mb")
 
     col1, col2, col3 = st.columns(3)
     col1.metric("Total Datasets", total)
@@ -118,7 +95,7 @@ if not df_datasets.empty:
 
     # --- BAR CHART: Dataset Category Distribution ---
     st.subheader("Dataset Category Distribution")
-    category_counts = df_datasets['category'].value_counts()
+    category_counts = summary.get_counts("datasets_metadata", "category").sort_values(ascending=False)
     st.bar_chart(category_counts)
 
     # --- SCATTER PLOT: Dataset Size vs Record Count ---
@@ -135,7 +112,10 @@ st.header("Dataset Metadata Management")
 tab_view, tab_add, tab_update, tab_delete = st.tabs(["View Metadata", "Create Metadata", "Update Records", "Delete"])
 
 with tab_view:
-    st.dataframe(df_datasets, use_container_width=True, hide_index=True)
+    # Only the visible page (plus the next one) is read from SQLite.
+    paged_table("datasets_metadata", "dataset_view", filter_options={
+        "category": summary.get_counts("datasets_metadata", "category").index,
+    }, page="AI")
 
 with tab_add:
     with st.form("add_dataset"):
@@ -155,12 +135,12 @@ with tab_add:
 
 with tab_update:
     if not df_datasets.empty:
-        opts = {f"{row['dataset_name']} ({row['category']})": row['id'] for _, row in df_datasets.iterrows()}
-        sel_lbl = st.selectbox("Select Dataset to Update", list(opts.keys()))
-        if sel_lbl:
-            sel_id = opts[sel_lbl]
-            current_recs = int(df_datasets[df_datasets['id'] == sel_id]['record_count'].iloc[0])
-            current_size = float(df_datasets[df_datasets['id'] == sel_id]['file_size_mb'].iloc[0])
+        sel_id = record_picker("datasets_metadata", "Select Dataset to Update", "dataset_update")
+        if sel_id is not None:
+            current = df_datasets.loc[df_datasets['id'] == sel_id].iloc[0]
+            current_recs = int(current['record_count'])
+            # Held as float32; sizes are stored to two decimals.
+            current_size = round(float(current['file_size_mb']), 2)
 
             new_recs = st.number_input("New Record Count", min_value=1, value=current_recs)
             new_size = st.number_input("New File Size (MB)", min_value=0.1, value=current_size)
@@ -173,11 +153,9 @@ with tab_update:
 
 with tab_delete:
     if not df_datasets.empty:
-        del_opts = {f"{row['dataset_name']} ({row['id']})": row['id'] for _, row in df_datasets.iterrows()}
-        del_lbl = st.selectbox("Select Dataset to Delete", list(del_opts.keys()))
-        if del_lbl:
-            del_id = del_opts[del_lbl]
-            st.warning(f"Confirm deletion of dataset metadata **{del_lbl}**.")
+        del_id = record_picker("datasets_metadata", "Select Dataset to Delete", "dataset_delete")
+        if del_id is not None:
+            st.warning(f"Confirm deletion of dataset metadata **ID {del_id}**.")
             if st.button("Confirm Delete", type="primary"):
                 delete_dataset(del_id)
                 st.session_state.refresh = True
@@ -198,6 +176,8 @@ if st.session_state.get("show_chat"):
         st.subheader("Chat Controls")
         message_count = len([m for m in st.session_state.messages if m["role"] != "system"])
         st.metric("Messages", message_count)
+        show_stream_stats()
+        show_session_memory()
         if st.button("Clear Chat", use_container_width=True):
             st.session_state.messages = []
             st.success("Chat cleared.")
@@ -212,32 +192,24 @@ if st.session_state.get("show_chat"):
         st.session_state.messages.append({"role": "user", "content": prompt})
         st.session_state.ai_chat_prompt = ""
 
-        with st.spinner("Thinking..."):
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=st.session_state.messages,
-                stream=True
-            )
-
-        full_reply = ""
-        for chunk in completion:
-            try:
-                delta = chunk.choices[0].delta
-                if hasattr(delta, "content") and delta.content:
-                    full_reply += delta.content
-            except Exception:
-                try:
-                    content = chunk.choices[0].message.get("content", "")
-                    if content:
-                        full_reply += content
-                except Exception:
-                    pass
+        chat_box.markdown(f"**User:** {prompt}")
+        # Older turns are folded into a summary to stay under the token budget.
+        request, _ = prepare_messages(st.session_state.messages,
+                                      st.session_state.setdefault("history_state", {}))
+        # Relevant rows and summary counts, for this question only.
+        request, st.session_state.retrieval_stats = retrieval.ground_messages(request, "ai", prompt)
+        # Identical conversations are answered from the local reply cache.
+        completion = cached_completion(client, "gpt-4o-mini", request)
+        # Rendered as it streams; see app/ui/streaming.py.
+        full_reply = stream_reply(completion, chat_box.empty(), "**Assistant:**")
 
         st.session_state.messages.append({"role": "assistant", "content": full_reply})
+        sync_session()
 
 st.divider()
 if st.button("Logout", type="primary"):
     st.session_state.logged_in = False
+    end_session()
 
     if "username" in st.session_state:
         st.session_state.username = ""
@@ -0,0 +1,26 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import pytest
+
+# Before anything imports app.data.db: every default path (the platform
+# database, sessions, reply cache, snapshots) lands in a scratch directory.
+DATA_DIR = tempfile.mkdtemp(prefix="platform-tests-")
+os.environ["PLATFORM_DATA_DIR"] = DATA_DIR
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _scratch_data_dir():
+    yield
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """A fresh, fully migrated database of its own."""
+    from app.data.migrations import run_migrations
+    conn = sqlite3.connect(tmp_path / "platform.db")
+    run_migrations(conn, verbose=False)
+    yield conn
+    conn.close()
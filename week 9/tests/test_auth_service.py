@@ -0,0 +1,56 @@
+import threading
+import pytest
+from app.services import auth_service
+
+
+@pytest.fixture
+def pool():
+    """A one-worker, one-slot queue; the defaults are restored afterwards."""
+    defaults = (auth_service.MAX_WORKERS, auth_service.MAX_QUEUED,
+                auth_service.BCRYPT_ROUNDS, auth_service.REHASH_ON_LOGIN)
+    auth_service.configure(max_workers=1, max_queued=1, bcrypt_rounds=4)
+    release = threading.Event()
+    yield release
+    release.set()
+    workers, queued, rounds, rehash = defaults
+    auth_service.configure(max_workers=workers, max_queued=queued,
+                           bcrypt_rounds=rounds, rehash_on_login=rehash)
+
+
+def fill(release):
+    """Occupy the worker and the queue slot until release is set."""
+    return [auth_service._submit(release.wait, timeout=0) for _ in range(2)]
+
+
+def test_full_queue_turns_requests_away(pool):
+    busy = fill(pool)
+    before = auth_service.pool_metrics()["rejected"]
+    with pytest.raises(TimeoutError):
+        auth_service._submit(len, "", timeout=0)
+    metrics = auth_service.pool_metrics()
+    assert metrics["rejected"] == before + 1
+    assert (metrics["running"], metrics["queued"]) == (1, 1)
+    pool.set()
+    for future in busy:
+        future.result(timeout=5)
+    assert auth_service._submit(len, "abc", timeout=0).result(timeout=5) == 3
+
+
+def test_background_rehash_is_skipped_when_saturated(pool):
+    fill(pool)
+    assert auth_service.rehash_in_background("secret", lambda new_hash: None) is None
+
+
+def test_hash_check_and_rehash(pool):
+    password_hash = auth_service.hash_password("secret")
+    assert auth_service.get_rounds(password_hash) == 4
+    assert auth_service.check_password("secret", password_hash)
+    assert not auth_service.check_password("wrong", password_hash)
+    assert not auth_service.check_password("secret", "not a hash")
+
+    auth_service.configure(bcrypt_rounds=5, rehash_on_login=True)
+    assert auth_service.needs_rehash(password_hash)
+    done = []
+    auth_service.rehash_in_background("secret", done.append).result(timeout=5)
+    assert auth_service.get_rounds(done[0]) == 5
+    assert auth_service.check_password("secret", done[0])
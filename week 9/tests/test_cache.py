@@ -0,0 +1,66 @@
+import sqlite3
+import pytest
+from app.data import cache
+from app.data.db import DB_PATH
+from app.data.migrations import run_migrations
+
+
+@pytest.fixture
+def platform_db():
+    """The default database (in the scratch data directory), migrated and emptied."""
+    conn = sqlite3.connect(DB_PATH)
+    run_migrations(conn, verbose=False)
+    conn.execute("DELETE FROM cyber_incidents")
+    conn.execute("DELETE FROM IT_tickets")
+    conn.commit()
+    cache._entries.clear()
+    yield conn
+    conn.close()
+
+
+def counting_loader(table):
+    calls = []
+
+    def load():
+        calls.append(table)
+        return len(calls)
+
+    return load, calls
+
+
+def test_unchanged_table_is_served_from_cache(platform_db):
+    load, calls = counting_loader("cyber_incidents")
+    assert [cache.load_table("cyber_incidents", load, page="t1") for _ in range(3)] == [1, 1, 1]
+    assert len(calls) == 1
+    assert cache.cache_stats("t1") == {"hits": 2, "misses": 1, "hit_rate": 2 / 3}
+
+
+def test_writes_from_other_connections_invalidate(platform_db):
+    load, calls = counting_loader("cyber_incidents")
+    cache.load_table("cyber_incidents", load)
+    platform_db.execute("INSERT INTO cyber_incidents (incident_type) VALUES ('Malware')")
+    platform_db.commit()
+    assert cache.load_table("cyber_incidents", load) == 2
+
+
+def test_writes_to_other_tables_do_not_invalidate(platform_db):
+    load, calls = counting_loader("cyber_incidents")
+    cache.load_table("cyber_incidents", load)
+    platform_db.execute("INSERT INTO IT_tickets (ticket_id, subject) VALUES ('TCKT-1', 'VPN')")
+    platform_db.commit()
+    assert cache.load_table("cyber_incidents", load) == 1
+
+
+def test_invalidate_forces_a_reload(platform_db):
+    load, calls = counting_loader("IT_tickets")
+    cache.load_table("IT_tickets", load)
+    cache.invalidate("it_tickets")
+    assert cache.load_table("IT_tickets", load) == 2
+
+
+def test_files_reload_when_they_change(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("one")
+    assert cache.load_file(path, path.read_text) == "one"
+    path.write_text("three")
+    assert cache.load_file(path, path.read_text) == "three"
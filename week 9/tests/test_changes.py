@@ -0,0 +1,65 @@
+import sqlite3
+from app.data import schema
+from app.data.changes import (CHANGE_LOG_SQL, change_log_stats, changes_since,
+                              compaction_trigger_sql, create_change_triggers, latest_seq)
+
+
+def add_incident(conn, status="Open"):
+    conn.execute("INSERT INTO cyber_incidents (incident_type, severity, status) "
+                 "VALUES ('Phishing', 'High', ?)", (status,))
+    conn.commit()
+
+
+def test_inserts_updates_and_deletes_are_logged(conn, tmp_path):
+    db_path = tmp_path / "platform.db"
+    start = latest_seq(db_path)
+    add_incident(conn)
+    conn.execute("UPDATE cyber_incidents SET status = 'Closed', severity = 'Low'")
+    conn.execute("UPDATE cyber_incidents SET status = 'Closed'")  # no change, not logged
+    conn.execute("DELETE FROM cyber_incidents")
+    conn.commit()
+
+    changes, latest = changes_since(start, db_path=db_path)
+    assert [(c["table"], c["op"], c["pk"]) for c in changes] == [
+        ("cyber_incidents", "insert", 1), ("cyber_incidents", "update", 1),
+        ("cyber_incidents", "delete", 1)]
+    assert changes[1]["columns"] == ["severity", "status"]
+    assert latest == changes[-1]["seq"]
+    assert changes_since(latest, db_path=db_path) == ([], latest)
+    assert changes_since(start, tables=["it_tickets"], db_path=db_path) == ([], latest)
+
+
+def test_falling_too_far_behind_means_reload(conn, tmp_path):
+    db_path = tmp_path / "platform.db"
+    for _ in range(3):
+        add_incident(conn)
+    assert changes_since(0, limit=2, db_path=db_path) == (None, 3)
+
+
+def test_reading_never_compacts(conn, tmp_path):
+    db_path = tmp_path / "platform.db"
+    add_incident(conn)
+    conn.execute("UPDATE change_log SET changed_at = datetime('now', '-2 days')")
+    conn.commit()
+    for _ in range(3):
+        changes_since(0, db_path=db_path)
+    assert change_log_stats(db_path)["entries"] == 1
+
+
+def test_writers_compact_and_stale_readers_reload(tmp_path):
+    db_path = tmp_path / "scratch.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(schema.SCHEMA_META_TABLE_SQL)
+    conn.execute(schema.CYBER_INCIDENTS_TABLE_SQL)
+    conn.execute(CHANGE_LOG_SQL)
+    conn.execute(compaction_trigger_sql(retain=-1, every=4))
+    create_change_triggers(conn, "cyber_incidents")
+    for _ in range(4):
+        add_incident(conn)
+
+    assert changes_since(0, db_path=db_path) == (None, 4)
+    assert changes_since(4, db_path=db_path) == ([], 4)
+    add_incident(conn)
+    changes, latest = changes_since(4, db_path=db_path)
+    assert [c["pk"] for c in changes] == [5] and latest == 5
+    conn.close()
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+import pytest
+from app.services import completion_cache
+from app.services.completion_cache import cached_completion, replay
+
+HISTORY = [{"role": "system", "content": "You are a helpful assistant."},
+           {"role": "user", "content": "What is phishing?"}]
+
+
+class StubClient:
+    """Stands in for OpenAI(): streams a canned reply and counts requests."""
+
+    def __init__(self, reply="Phishing is a social engineering attack.", plain=False, fail_after=None):
+        self.reply, self.plain, self.fail_after = reply, plain, fail_after
+        self.requests = 0
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, stream=True, **params):
+        self.requests += 1
+        for i, piece in enumerate(replay(self.reply)):
+            if i == self.fail_after:
+                raise ConnectionError("stream dropped")
+            if self.plain:
+                yield piece
+            else:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+def ask(client, path, messages=HISTORY, **kwargs):
+    return "".join(cached_completion(client, "gpt-4o-mini", messages, path=path, **kwargs))
+
+
+def test_repeat_question_is_served_from_cache(tmp_path):
+    path = tmp_path / "cache.db"
+    client = StubClient()
+    variant = [HISTORY[0], {"role": "user", "content": "  what is  PHISHING? "}]
+    replies = [ask(client, path, messages) for messages in (HISTORY, variant, HISTORY)]
+    assert replies == [client.reply] * 3
+    assert client.requests == 1
+
+
+def test_plain_text_streams_are_cached(tmp_path):
+    path = tmp_path / "cache.db"
+    client = StubClient(plain=True)
+    assert ask(client, path) == ask(client, path) == client.reply
+    assert client.requests == 1
+
+
+def test_parameters_are_part_of_the_key(tmp_path):
+    path = tmp_path / "cache.db"
+    client = StubClient()
+    ask(client, path, temperature=0)
+    ask(client, path, temperature=1)
+    assert client.requests == 2
+
+
+def test_expired_entries_are_refetched(tmp_path):
+    path = tmp_path / "cache.db"
+    client = StubClient()
+    ask(client, path)
+    ask(client, path, ttl=-1)
+    assert client.requests == 2
+    assert completion_cache.cache_stats(path)["entries"] == 1
+
+
+def test_interrupted_reply_is_not_cached(tmp_path):
+    path = tmp_path / "cache.db"
+    with pytest.raises(ConnectionError):
+        ask(StubClient(fail_after=2), path)
+    client = StubClient()
+    assert ask(client, path) == client.reply
+    assert client.requests == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    path = tmp_path / "cache.db"
+    reply = "x" * 100
+    for key in ("a", "b"):
+        completion_cache.put_reply(key, "m", reply, path, max_bytes=250)
+    assert completion_cache.get_reply("a", path) == reply   # b is now the oldest
+    completion_cache.put_reply("c", "m", reply, path, max_bytes=250)
+    assert completion_cache.get_reply("b", path) is None
+    assert completion_cache.get_reply("a", path) == completion_cache.get_reply("c", path) == reply
@@ -0,0 +1,54 @@
+import os
+from app.data.csv_sync import sync_csv_to_table
+
+HEADER = "id,ticket_id,priority,status,subject\n"
+ROWS = ["1,TCKT-1,Low,Open,VPN issue\n", "2,TCKT-2,High,Open,Account locked\n"]
+
+
+def write(path, rows, bump=0):
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+    if bump:  # same-size edits must not look untouched
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump))
+
+
+def tickets(conn):
+    return conn.execute("SELECT id, ticket_id, status FROM IT_tickets ORDER BY id").fetchall()
+
+
+def test_initial_load_then_unchanged(conn, tmp_path):
+    csv_path = tmp_path / "tickets.csv"
+    write(csv_path, ROWS)
+    report = sync_csv_to_table(conn, csv_path, "IT_tickets")
+    assert (report["mode"], report["rows"], report["skipped"]) == ("initial", 2, [])
+    assert sync_csv_to_table(conn, csv_path, "IT_tickets")["mode"] == "unchanged"
+    assert tickets(conn) == [(1, "TCKT-1", "Open"), (2, "TCKT-2", "Open")]
+
+
+def test_appended_rows_only_read_the_tail(conn, tmp_path):
+    csv_path = tmp_path / "tickets.csv"
+    write(csv_path, ROWS)
+    sync_csv_to_table(conn, csv_path, "IT_tickets")
+    write(csv_path, ROWS + ["3,TCKT-3,Medium,Closed,Printer jam\n"])
+    report = sync_csv_to_table(conn, csv_path, "IT_tickets")
+    assert (report["mode"], report["rows"]) == ("append", 1)
+    assert len(tickets(conn)) == 3
+
+
+def test_edited_rows_are_upserted_not_duplicated(conn, tmp_path):
+    csv_path = tmp_path / "tickets.csv"
+    write(csv_path, ROWS)
+    sync_csv_to_table(conn, csv_path, "IT_tickets")
+    write(csv_path, [ROWS[0].replace("Open", "Done"), ROWS[1]], bump=10**9)
+    report = sync_csv_to_table(conn, csv_path, "IT_tickets")
+    assert (report["mode"], report["rows"]) == ("full", 2)
+    assert tickets(conn) == [(1, "TCKT-1", "Done"), (2, "TCKT-2", "Open")]
+
+
+def test_duplicate_unique_values_are_skipped(conn, tmp_path):
+    csv_path = tmp_path / "tickets.csv"
+    write(csv_path, ROWS + ["3,TCKT-1,Low,Open,Same ticket again\n"])
+    report = sync_csv_to_table(conn, csv_path, "IT_tickets")
+    assert report["mode"] == "full"
+    assert report["skipped"] == [3]
+    assert [row[0] for row in tickets(conn)] == [1, 2]
@@ -0,0 +1,116 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+pytest.importorskip("openai")
+from app.services import llm_gateway  # noqa: E402
+
+
+@pytest.fixture
+def servers(monkeypatch):
+    """Starts local OpenAI-compatible servers and shuts them down afterwards."""
+    monkeypatch.setattr(llm_gateway, "BACKOFF_BASE", 0.01)
+    monkeypatch.setitem(llm_gateway._settings, "client", None)
+    started = []
+
+    def start(**kwargs):
+        server, state = llm_gateway._mock_server(**kwargs)
+        started.append(server)
+        return server, state
+
+    yield start
+    for server in started:
+        server.shutdown()
+
+
+def point_at(server, **limits):
+    llm_gateway.configure(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                          **limits)
+
+
+def ask(text, user="analyst"):
+    return "".join(llm_gateway.client_for(user).create(
+        "gpt-4o-mini", [{"role": "user", "content": text}]))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_caps_retries_and_coalescing(servers):
+    server, upstream = servers(fail_every=4)
+    point_at(server, max_concurrent=4, max_per_user=2)
+    before = llm_gateway.gateway_stats()
+
+    def one(n):
+        text = "explain phishing in one line" if n % 2 else f"status of ticket {n} please"
+        return ask(text, user=f"analyst{n % 5}").split() == text.split()
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        assert all(pool.map(one, range(20)))
+    after = llm_gateway.gateway_stats()
+    assert upstream["peak"] <= 4
+    assert after["coalesced"] > before["coalesced"]
+    assert after["retries"] > before["retries"]
+    assert after["in_flight"] == 0
+
+
+def test_reconfigure_swaps_and_closes_the_client(servers):
+    first, first_state = servers(fail_every=0)
+    second, second_state = servers(fail_every=0)
+    point_at(first)
+    assert ask("hello there") == "hello there "
+    old = llm_gateway._client
+
+    point_at(second)
+    assert wait_for(old.is_closed)
+    assert ask("hello again") == "hello again "
+    assert (first_state["requests"], second_state["requests"]) == (1, 1)
+    assert llm_gateway._client is not old
+
+
+def test_replaced_client_outlives_its_open_streams(servers):
+    slow, _ = servers(fail_every=0, delay=0.05)
+    other, _ = servers(fail_every=0)
+    point_at(slow)
+    pieces = llm_gateway.stream_chat("gpt-4o-mini", [{"role": "user", "content": "a b c d e f"}])
+    assert next(pieces) == "a "
+    old = llm_gateway._client
+
+    point_at(other)
+    assert not old.is_closed()
+    assert "".join(pieces) == "b c d e f "
+    assert wait_for(old.is_closed)
+
+
+def test_supplied_clients_are_not_closed(servers):
+    server, _ = servers(fail_every=0)
+    point_at(server)
+    ask("warm up")
+    built = llm_gateway._client
+
+    class Client:
+        closed = 0
+
+        def __init__(self):
+            self.chat = self.completions = self
+
+        async def create(self, messages, **kwargs):
+            async def pieces():
+                yield "from the supplied client"
+            return pieces()
+
+        async def close(self):
+            Client.closed += 1
+
+    llm_gateway.configure(client=Client())
+    assert ask("anything") == "from the supplied client"
+    assert wait_for(built.is_closed)
+    llm_gateway.configure(client=Client())
+    assert ask("anything else") == "from the supplied client"
+    assert Client.closed == 0
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import sqlite3
+import pytest
+from app.data import migrations
+from app.data.migrations import MIGRATIONS, get_schema_version, run_migrations
+
+LATEST = MIGRATIONS[-1][0]
+
+# sha256 prefixes of each shipped step's statements. A mismatch means a
+# shipped step was edited; add a new step instead.
+SHIPPED = {
+    1: "dad8e9e6008004c1",
+    2: "cf3a928a50b55b51",
+    3: "f13b4e77036697b1",
+    4: "00930dc5aece5740",
+    5: "f5c3c37c2b87e1b8",
+    6: "d0dc9dd07641c585",
+    7: "c24693a5c74e30eb",
+    8: "00280749ac9dd744",
+}
+
+
+def schema_of(conn):
+    return conn.execute(
+        "SELECT type, name, sql FROM sqlite_master ORDER BY type, name"
+    ).fetchall()
+
+
+def test_shipped_steps_are_frozen():
+    for version, _, statements, _ in MIGRATIONS:
+        if version in SHIPPED:
+            digest = hashlib.sha256(json.dumps(statements).encode()).hexdigest()[:16]
+            assert digest == SHIPPED[version], f"migration {version} was edited"
+
+
+def test_fresh_database_reaches_latest(conn):
+    assert get_schema_version(conn) == LATEST
+    names = {name for _, name, _ in schema_of(conn)}
+    assert {"users", "cyber_incidents", "IT_tickets", "datasets_metadata", "summary_counts",
+            "incidents_fts", "table_versions", "change_log", "trg_change_log_compact"} <= names
+
+
+def test_rerun_is_a_no_op(conn):
+    before = schema_of(conn)
+    assert run_migrations(conn, verbose=False) == []
+    assert schema_of(conn) == before
+
+
+def test_stepwise_upgrade_matches_fresh_install(conn, tmp_path):
+    stepwise = sqlite3.connect(tmp_path / "stepwise.db")
+    for version, *_ in MIGRATIONS:
+        assert [r[0] for r in run_migrations(stepwise, target=version, verbose=False)] == [version]
+    assert schema_of(stepwise) == schema_of(conn)
+    stepwise.close()
+
+
+def test_interrupted_online_step_resumes(tmp_path):
+    db = sqlite3.connect(tmp_path / "interrupted.db")
+    run_migrations(db, target=1, verbose=False)
+    version, _, statements, online = MIGRATIONS[1]
+    assert online
+    for statement in statements[:3]:  # some indexes built, then the process died
+        db.execute(statement)
+    db.commit()
+    assert get_schema_version(db) == 1
+    assert [r[0] for r in run_migrations(db, verbose=False)] == list(range(version, LATEST + 1))
+    db.close()
+
+
+def test_failed_step_rolls_back(tmp_path, monkeypatch):
+    broken = (LATEST + 1, "broken", ["CREATE TABLE half_done (x)", "NOT SQL"], False)
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [broken])
+    db = sqlite3.connect(tmp_path / "broken.db")
+    with pytest.raises(sqlite3.OperationalError):
+        run_migrations(db, verbose=False)
+    assert get_schema_version(db) == LATEST
+    assert db.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+    db.close()
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+import pytest
+from app.services import session_store
+from app.services.session_store import delete_session, expire_sessions, load_session, save_session
+
+STATE = {"messages": [{"role": "user", "content": "hi"}], "history_state": {"summary": ""},
+         "logged_in": True, "username": "alice", "chat_input": "draft"}
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_store, "_resident", OrderedDict())
+    return tmp_path / "sessions.db"
+
+
+def test_records_round_trip_for_their_owner(path):
+    assert save_session("s1", STATE, owner="alice", path=path)
+    assert load_session("s1", owner="alice", path=path) == {
+        "messages": STATE["messages"], "history_state": STATE["history_state"]}
+
+
+def test_only_persisted_keys_are_stored(path):
+    save_session("s1", STATE, owner="alice", path=path)
+    session_store._resident.clear()
+    assert set(load_session("s1", owner="alice", path=path)) == set(session_store.PERSISTED_KEYS)
+
+
+def test_unchanged_records_are_not_rewritten(path):
+    assert save_session("s1", STATE, owner="alice", path=path)
+    assert not save_session("s1", dict(STATE), owner="alice", path=path)
+
+
+def test_other_owners_cannot_read_or_overwrite(path):
+    save_session("s1", STATE, owner="alice", path=path)
+    assert load_session("s1", owner="bob", path=path) is None
+    assert load_session("s1", path=path) is None
+    assert not save_session("s1", {"messages": []}, path=path)
+    session_store._resident.clear()
+    assert not save_session("s1", {"messages": []}, owner="bob", path=path)
+    assert load_session("s1", owner="alice", path=path)["messages"] == STATE["messages"]
+
+
+def test_expired_sessions_are_not_loaded_and_are_swept(path):
+    save_session("s1", STATE, owner="alice", path=path)
+    session_store._resident.clear()
+    assert load_session("s1", owner="alice", path=path, ttl=-1) is None
+    assert expire_sessions(path, ttl=-1) == 1
+    assert load_session("s1", owner="alice", path=path) is None
+
+
+def test_evicted_sessions_still_load_from_disk(path, monkeypatch):
+    monkeypatch.setattr(session_store, "MAX_RESIDENT", 2)
+    for sid in ("s1", "s2", "s3"):
+        save_session(sid, STATE, owner="alice", path=path)
+    assert list(session_store._resident) == ["s2", "s3"]
+    assert load_session("s1", owner="alice", path=path)["messages"] == STATE["messages"]
+    assert list(session_store._resident) == ["s3", "s1"]
+    delete_session("s1", path=path)
+    assert load_session("s1", owner="alice", path=path) is None
@@ -1,8 +1,14 @@
 import streamlit as st
-from openai import OpenAI
+import sys
+from pathlib import Path
 
-# Initialize OpenAI client
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+# Share the streaming renderer with the week 9 dashboards.
+sys.path.append(str(Path(__file__).resolve().parents[1] / "week 9"))
+from app.ui.streaming import stream_reply, show_stream_stats
+from app.ui.session import session_id, sync_session, show_session_memory
+from app.services.completion_cache import cached_completion
+from app.services.chat_history import prepare_messages
+from app.services import llm_gateway
 
 # Page setup
 st.set_page_config(
@@ -11,6 +17,13 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restores the chat after a server restart (see app/ui/session.py).
+sync_session()
+
+# Requests go through the shared gateway (pooled client, concurrency caps).
+llm_gateway.configure(api_key=st.secrets["OPENAI_API_KEY"])
+client = llm_gateway.client_for(session_id())
+
 st.title("💬 ChatGPT - OpenAI API")
 st.caption("Powered by GPT-4o Mini")
 
@@ -26,11 +39,26 @@ with st.sidebar:
     st.subheader("Chat Controls")
     message_count = len([m for m in st.session_state.messages if m["role"] != "system"])
     st.metric("Messages", message_count)
+    show_stream_stats()
+    show_session_memory()
 
     if st.button("🗑 Clear Chat", use_container_width=True):
         st.session_state.messages = []
         st.rerun()
 
+def reply_to_history():
+    """Stream the assistant's answer to the current history and store it."""
+    # Older turns are folded into a summary to stay under the token budget.
+    request, _ = prepare_messages(st.session_state.messages,
+                                  st.session_state.setdefault("history_state", {}))
+    # Identical conversations are answered from the local reply cache.
+    completion = cached_completion(client, "gpt-4o-mini", request)
+    with st.chat_message("assistant"):
+        # Redrawn on a time/size cadence instead of on every token.
+        full_reply = stream_reply(completion, st.empty())
+    st.session_state.messages.append({"role": "assistant", "content": full_reply})
+    sync_session()
+
 # --- Display chat history ---
 for message in st.session_state.messages:
     if message["role"] != "system":
@@ -45,24 +73,7 @@ if (len(st.session_state.messages) == 2 and
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    with st.spinner("Thinking..."):
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=st.session_state.messages,
-            stream=True
-        )
-
-    with st.chat_message("assistant"):
-        container = st.empty()
-        full_reply = ""
-        for chunk in completion:
-            delta = chunk.choices[0].delta
-            if delta.content:
-                full_reply += delta.content
-                container.markdown(full_reply + "▌")
-        container.markdown(full_reply)
-
-    st.session_state.messages.append({"role": "assistant", "content": full_reply})
+    reply_to_history()
 
 # --- Handle new user input ---
 prompt = st.chat_input("Say something...")
@@ -71,21 +82,4 @@ if prompt:
         st.markdown(prompt)
     st.session_state.messages.append({"role": "user", "content": prompt})
 
-    with st.spinner("Thinking..."):
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=st.session_state.messages,
-            stream=True
-        )
-
-    with st.chat_message("assistant"):
-        container = st.empty()
-        full_reply = ""
-        for chunk in completion:
-            delta = chunk.choices[0].delta
-            if delta.content:
-                full_reply += delta.content
-                container.markdown(full_reply + "▌")
-        container.markdown(full_reply)
-
-    st.session_state.messages.append({"role": "assistant", "content": full_reply})
+    reply_to_history()